@@ -0,0 +1,189 @@
+import math
+import os
+import threading
+import time
+
+import sympy as sp
+
+from backend.expression_parser import ExpressionError, parse_expression
+from backend.polynomial import degree_bound
+
+# Control de admisión: antes de ejecutar una ruta se estima su costo (tamaño del árbol,
+# tipo de operación, grado polinomial) y se asigna a la cola barata o a la cara.
+# Cada clase tiene un número fijo de ejecuciones simultáneas y una cola de espera acotada;
+# si la cola cara está llena se rechaza con 503 + Retry-After y las operaciones baratas
+# (evaluar, derivar) siguen teniendo hilos libres.
+
+# Hilos de waitress y capacidad de cada clase (configurables por variables de entorno)
+SERVER_THREADS = int(os.environ.get("WAITRESS_THREADS", "8"))
+EXPENSIVE_SLOTS = int(os.environ.get("ADMISSION_EXPENSIVE_SLOTS", "2"))
+EXPENSIVE_QUEUE = int(os.environ.get("ADMISSION_EXPENSIVE_QUEUE", "4"))
+CHEAP_SLOTS = int(os.environ.get("ADMISSION_CHEAP_SLOTS", str(SERVER_THREADS)))
+CHEAP_QUEUE = int(os.environ.get("ADMISSION_CHEAP_QUEUE", "32"))
+QUEUE_TIMEOUT = float(os.environ.get("ADMISSION_QUEUE_TIMEOUT", "10"))
+
+# Costo base por ruta (endpoint de Flask); las rutas sin entrada no pasan por la admisión
+OPERATION_COST = {
+    "evaluate": 0.5,
+    "partials": 1.0,
+    "gradient": 1.0,
+    "point_gradient": 1.0,
+    "session_open": 1.0,
+    "gradient_n": 1.5,
+    "taylor": 1.5,
+    "gradient_field": 2.0,
+    "analyze_domain": 2.0,
+    "double_integral": 4.0,
+    "region_integral": 4.0,
+    "optimize": 4.0,
+    "optimize_n": 6.0,
+    "lagrange": 6.0,
+    "lagrange_n": 8.0,
+}
+
+# Rutas que llaman a sp.solve / sp.integrate: su costo depende de la forma de la expresión
+SOLVER_OPERATIONS = {"gradient_field", "double_integral", "region_integral", "optimize", "optimize_n", "lagrange", "lagrange_n"}
+
+EXPENSIVE_COST = 4.0
+NODES_SCALE = 25.0
+
+
+def _expressions(data):
+    # Expresiones de la solicitud: la función y, si hay, las restricciones
+    texts = [data.get("expression") or data.get("func") or data.get("function")]
+    for key in ("constraint", "constraints"):
+        value = data.get(key)
+        texts.extend(value if isinstance(value, list) else [value])
+    return [t for t in texts if isinstance(t, str)]
+
+
+def estimate_cost(endpoint, data):
+    """
+    Estimate the relative cost of a request before running it.
+
+    Returns (cost, kind) with kind "cheap" or "expensive". The cost grows with the operation
+    type, the size of the expression tree and, for solver/integration routes, the polynomial
+    degree (non-polynomial input counts as harder).
+    """
+    base = OPERATION_COST.get(endpoint)
+    if base is None:
+        return 0.0, "cheap"
+    data = data if isinstance(data, dict) else {}
+    variables = None if endpoint.endswith("_n") else ("x", "y")
+    nodes, shape = 0, 1.0
+    for text in _expressions(data):
+        try:
+            expr = parse_expression(text, variables=variables, allow_relations=True)
+        except ExpressionError:
+            continue
+        nodes += sum(1 for _ in sp.preorder_traversal(expr))
+        if endpoint in SOLVER_OPERATIONS:
+            if isinstance(expr, sp.Rel):
+                expr = expr.lhs - expr.rhs
+            # Grado leído del árbol: as_poly expandiría (x+y+1)**1000 antes de admitir la solicitud
+            degree = degree_bound(expr, expr.free_symbols) if expr.free_symbols else None
+            shape = max(shape, 1.0 + degree / 4.0 if degree is not None else 2.0)
+    cost = base * (1.0 + nodes / NODES_SCALE) * shape
+    if endpoint == "taylor":
+        # La torre de Taylor tiene (n+1)(n+2)/2 derivadas: el costo crece con el orden
+        try:
+            cost *= max(1.0, int(data.get("order", 2)) / 2.0)
+        except (TypeError, ValueError):
+            pass
+    return cost, ("expensive" if cost >= EXPENSIVE_COST else "cheap")
+
+
+class Overloaded(Exception):
+    """
+    Raised when a request cannot be admitted; retry_after is the suggested wait in seconds.
+    """
+
+    def __init__(self, kind, retry_after):
+        super().__init__(f"{kind} queue is full")
+        self.kind = kind
+        self.retry_after = retry_after
+
+
+class _Lane:
+    # Una clase de trabajo: ejecuciones simultáneas limitadas y cola de espera acotada
+    def __init__(self, slots, queue_size):
+        self.slots = max(1, slots)
+        self.queue_size = max(0, queue_size)
+        self.running = 0
+        self.waiting = 0
+        self.rejected = 0
+        self.admitted = 0
+        self.service_time = 0.5  # media móvil del tiempo de servicio (s)
+        self.cond = threading.Condition()
+
+    def acquire(self, kind, timeout):
+        with self.cond:
+            if self.running >= self.slots:
+                if self.waiting >= self.queue_size:
+                    self.rejected += 1
+                    raise Overloaded(kind, self.retry_after())
+                self.waiting += 1
+                try:
+                    deadline = time.monotonic() + timeout
+                    while self.running >= self.slots:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self.rejected += 1
+                            raise Overloaded(kind, self.retry_after())
+                        self.cond.wait(remaining)
+                finally:
+                    self.waiting -= 1
+            self.running += 1
+            self.admitted += 1
+
+    def release(self, elapsed):
+        with self.cond:
+            self.running -= 1
+            self.service_time = 0.8 * self.service_time + 0.2 * elapsed
+            self.cond.notify()
+
+    def retry_after(self):
+        # Tiempo estimado para vaciar la cola actual con los hilos de esta clase
+        return max(1, math.ceil(self.service_time * (self.waiting + self.running + 1) / self.slots))
+
+    def stats(self):
+        with self.cond:
+            return {
+                "slots": self.slots, "queue_size": self.queue_size, "running": self.running,
+                "waiting": self.waiting, "admitted": self.admitted, "rejected": self.rejected,
+                "service_time": round(self.service_time, 4),
+            }
+
+
+class AdmissionController:
+    """
+    Two bounded lanes (cheap and expensive) in front of the route handlers.
+
+    The expensive lane's slots plus queue must stay below the number of server threads so
+    cheap requests always find a free thread.
+    """
+
+    def __init__(self, cheap_slots=CHEAP_SLOTS, cheap_queue=CHEAP_QUEUE, expensive_slots=EXPENSIVE_SLOTS,
+                 expensive_queue=EXPENSIVE_QUEUE, queue_timeout=QUEUE_TIMEOUT, server_threads=SERVER_THREADS):
+        expensive_slots = max(1, min(expensive_slots, server_threads - 1))
+        expensive_queue = max(0, min(expensive_queue, server_threads - 1 - expensive_slots))
+        self.lanes = {
+            "cheap": _Lane(cheap_slots, cheap_queue),
+            "expensive": _Lane(expensive_slots, expensive_queue),
+        }
+        self.queue_timeout = queue_timeout
+
+    def acquire(self, kind):
+        """
+        Wait for a slot in the lane; raises Overloaded when the lane's queue is full.
+        Returns a ticket to pass to release().
+        """
+        self.lanes[kind].acquire(kind, self.queue_timeout)
+        return kind, time.perf_counter()
+
+    def release(self, ticket):
+        kind, started = ticket
+        self.lanes[kind].release(time.perf_counter() - started)
+
+    def stats(self):
+        return {kind: lane.stats() for kind, lane in self.lanes.items()}
@@ -0,0 +1,241 @@
+from functools import cached_property
+
+import sympy as sp
+
+from backend.autodiff import newton_critical_points
+from backend.evaluator import compile_kernel
+from backend.expression_parser import parse_expression
+from backend.incremental import memo_diff, memo_integrate, memo_latex
+from backend.integration_race import RACE_ENABLED, definite_iterated_integral, iterated_integral
+from backend.planner import planner
+from backend.polynomial import exact_or_float, solve_polynomial_system
+from backend.quadrature import gauss_legendre_2d
+from backend.simplification import canonical_form
+
+# Análisis perezoso de una expresión f(x,y) con alcance de solicitud.
+# Las operaciones matemáticas y la capa de presentación (LaTeX, pasos, explicaciones)
+# leen del mismo objeto, de modo que cada derivada, LaTeX o solución se calcula una sola vez.
+
+x, y = sp.symbols('x y')
+lam = sp.symbols('lambda')
+
+_TRIG_NAMES = ("sin", "cos", "tan", "cot", "csc", "sec")
+
+
+def _lagrange_seeds():
+    # Semillas de Newton en (x, y, λ): rejilla en el plano y tres valores de λ
+    grid = (-2.0, -1.0, 0.0, 1.0, 2.0)
+    return [(sx, sy, sl) for sx in grid for sy in grid for sl in (-1.0, 0.0, 1.0)]
+
+
+class ExpressionAnalysis:
+    """
+    Lazily computed derivative graph of one expression f(x, y).
+
+    Derivatives, the Hessian, LaTeX renderings, the expression class used by the
+    explanations and the results of the heavier operations are computed on first
+    access and reused for the rest of the request.
+    """
+
+    def __init__(self, expr):
+        self.f = expr if isinstance(expr, sp.Basic) else parse_expression(expr)
+        self._memo = {}
+
+    @classmethod
+    def of(cls, expression):
+        """
+        Return expression unchanged if it already is an analysis, otherwise wrap it.
+        """
+        return expression if isinstance(expression, cls) else cls(expression)
+
+    def _cached(self, key, compute):
+        # Memo genérico para resultados que dependen de argumentos (puntos, límites, restricciones)
+        if key not in self._memo:
+            self._memo[key] = compute()
+        return self._memo[key]
+
+    # Derivadas de primer y segundo orden
+    @cached_property
+    def fx(self):
+        return memo_diff(self.f, x)
+
+    @cached_property
+    def fy(self):
+        return memo_diff(self.f, y)
+
+    @cached_property
+    def fxx(self):
+        return memo_diff(self.fx, x)
+
+    @cached_property
+    def fyy(self):
+        return memo_diff(self.fy, y)
+
+    @cached_property
+    def fxy(self):
+        return memo_diff(self.fx, y)
+
+    @cached_property
+    def hessian(self):
+        return sp.Matrix([[self.fxx, self.fxy], [self.fxy, self.fyy]])
+
+    @cached_property
+    def kernel(self):
+        """
+        Fused NumPy kernel k(X, Y) -> (f, fx, fy, fxx, fyy, fxy) with shared subexpressions.
+        """
+        return compile_kernel((self.f, self.fx, self.fy, self.fxx, self.fyy, self.fxy))
+
+    def tex(self, value):
+        """
+        LaTeX of f, one of its derivatives or any derived SymPy object, computed once.
+        """
+        return self._cached(("tex", value), lambda: memo_latex(value) if isinstance(value, sp.Basic) else sp.latex(value))
+
+    @cached_property
+    def text(self):
+        return str(self.f)
+
+    # Clasificación del tipo de función usada por las explicaciones de la gráfica
+    @cached_property
+    def graph_kind(self):
+        text = self.text
+        if any(t in text for t in _TRIG_NAMES):
+            return "trig"
+        if "exp" in text or "e**" in text:
+            return "exp"
+        if "log" in text or "ln" in text:
+            return "log"
+        if "sqrt" in text:
+            return "sqrt"
+        if "^2" in text or "**2" in text:
+            return "quadratic"
+        return "general"
+
+    @cached_property
+    def detail_kind(self):
+        text = self.text
+        if "sin" in text or "cos" in text:
+            return "trig"
+        if "exp" in text:
+            return "exp"
+        if "sqrt" in text:
+            return "sqrt"
+        if "log" in text or "ln" in text:
+            return "log"
+        return "general"
+
+    def value_at(self, x0, y0):
+        """
+        Numeric value sp.N(f(x0, y0)) for SymPy numbers x0, y0.
+        """
+        return self._cached(("value", x0, y0), lambda: sp.N(self.f.subs({x: x0, y: y0})))
+
+    # Integrales iteradas: primero en y, luego en x
+    @cached_property
+    def integral_y(self):
+        return memo_integrate(self.f, y)
+
+    @cached_property
+    def integral_yx(self):
+        return memo_integrate(self.integral_y, x)
+
+    def definite_integral(self, ax, bx, ay, by):
+        """
+        Symbolic ∫∫ f over the rectangle [ax, bx] × [ay, by], or None if it timed out.
+
+        Non-polynomial integrands go through definite_iterated_integral (y first in-process,
+        both orders raced past a short budget); polynomial ones, immediate in either order,
+        are integrated in-process y first. The dict holds the order used ("dy dx" or "dx dy"),
+        the inner and outer integrals, the simplified value in canonical form, its
+        simplification tier (tiered_simplify) and the race summary (None without a race).
+        """
+        def compute():
+            if RACE_ENABLED and not self.f.is_polynomial(x, y):
+                return definite_iterated_integral(self.f, ax, bx, ay, by)
+            inner, outer, simplified, tier = iterated_integral(self.f, "dy dx", ax, bx, ay, by)
+            return {"order": "dy dx", "inner": inner, "outer": outer, "value": canonical_form(simplified),
+                    "simplification": tier, "race": None}
+        return self._cached(("definite", ax, bx, ay, by), compute)
+
+    def double_integral(self, ax, bx, ay, by):
+        """
+        Planned ∫_ax^bx ∫_ay^by f: symbolic (definite_integral) or Gauss-Legendre.
+
+        Returns a dict with the value, the integration order and the inner/outer integrals
+        (None on the numeric path), the error estimate of the numeric rule, the
+        simplification tier (None on the numeric path), the race summary of the symbolic
+        attempt and the plan that was executed.
+        """
+        attempt = {}
+
+        def symbolic():
+            attempt["symbolic"] = result = self.definite_integral(ax, bx, ay, by)
+            if result is None or result["value"].has(sp.Integral):
+                return None
+            return {**result, "error": None}
+
+        def numeric():
+            out = gauss_legendre_2d(self.f, ax, bx, ay, by)
+            if out is None:
+                return None
+            value, error, _ = out
+            return {"order": None, "inner": None, "outer": None, "value": sp.Float(value), "error": error,
+                    "simplification": None}
+
+        def compute():
+            plan = planner.plan("definite_integral", [self.f], (x, y), integrand=self.f)
+            result, _ = planner.run(plan, {"symbolic": symbolic, "numeric": numeric})
+            if result is None:
+                # Ninguna ruta dio un valor cerrado: se devuelve la integral simbólica tal cual
+                result = self.definite_integral(ax, bx, ay, by)
+                if result is None:
+                    inner = sp.Integral(self.f, (y, ay, by))
+                    result = {"order": "dy dx", "inner": inner, "outer": sp.Integral(inner, (x, ax, bx)),
+                              "value": sp.Integral(inner, (x, ax, bx)), "simplification": "none", "race": None}
+                result = {**result, "error": None}
+                plan["strategy"] = "symbolic"
+            symbolic_attempt = attempt.get("symbolic")
+            race = symbolic_attempt["race"] if symbolic_attempt else result.get("race")
+            return {**result, "race": race, "plan": plan}
+        return self._cached(("double", ax, bx, ay, by), compute)
+
+    def lagrange(self, g):
+        """
+        Lagrange system for the constraint g(x, y) = 0.
+
+        Returns a dict with the Lagrangian L = f + λg, its partial derivatives, the
+        solutions of ∇L = 0 as a list of dicts keyed by x, y and lambda, the solver used
+        ("polynomial" for the Gröbner fast path, "symbolic" for sp.solve, "numeric" for
+        Newton on L) and the plan chosen by the planner.
+        """
+        def compute():
+            L = self.f + lam * g
+            Lx = memo_diff(L, x)
+            Ly = memo_diff(L, y)
+            Llam = memo_diff(L, lam)
+            equations = [Lx, Ly, g]
+            unknowns = (x, y, lam)
+
+            # Vía rápida: si f y g son polinomios se resuelve con Gröbner y raíces reales aisladas
+            def polynomial():
+                points = solve_polynomial_system(equations, unknowns)
+                if points is None:
+                    return None
+                return [dict(zip(unknowns, exact_or_float(equations, unknowns, p))) for p in points]
+
+            def symbolic():
+                return sp.solve((sp.Eq(Lx, 0), sp.Eq(Ly, 0), sp.Eq(g, 0)), unknowns, dict=True) or None
+
+            def numeric():
+                # Los puntos de Lagrange son puntos críticos de L en (x, y, λ)
+                points = newton_critical_points(L, unknowns, _lagrange_seeds())
+                return [dict(zip(unknowns, p)) for p in points] or None
+
+            plan = planner.plan("lagrange", equations, unknowns)
+            solutions, solver = planner.run(plan, {"polynomial": polynomial, "symbolic": symbolic, "numeric": numeric})
+            solutions = solutions or []
+            solver = solver or plan["order"][-1]
+            return {"L": L, "Lx": Lx, "Ly": Ly, "Llam": Llam, "solutions": solutions, "solver": solver,
+                    "plan": plan}
+        return self._cached(("lagrange", g), compute)
@@ -0,0 +1,155 @@
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+
+from backend.caching import ENGINE_VERSION, canonical_query
+
+# Paquete de respuestas precalculadas para los ejercicios más frecuentes. Se genera fuera de
+# línea (python backend/build_answer_pack.py) pasando un corpus por las rutas reales, y el
+# servidor lo abre con mmap al arrancar: un acierto devuelve los bytes guardados sin ningún
+# cálculo con SymPy y sin calentamiento; los procesos trabajadores comparten las páginas.
+#
+# Formato (little-endian):
+#   MAGIC | u32 versión del formato | u32 largo del encabezado | encabezado JSON
+#   | u32 N | N entradas (clave 16 bytes, u64 desplazamiento, u32 largo) ordenadas por clave
+#   | cuerpos JSON concatenados
+# El encabezado lleva ENGINE_VERSION y la huella del código del backend: si no coinciden con
+# los del proceso, el paquete está desactualizado y se ignora.
+
+MAGIC = b"CALCPACK"
+FORMAT_VERSION = 1
+ENTRY = struct.Struct("<16sQI")
+U32 = struct.Struct("<I")
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ANSWER_PACK_PATH = os.environ.get("ANSWER_PACK", os.path.join(BASE_DIR, "answer_pack.bin"))
+
+# Rutas cuyas respuestas se guardan en el paquete (nombre del endpoint de Flask -> ruta)
+PACK_ENDPOINTS = {
+    "partials": "/partials",
+    "gradient": "/gradient",
+    "double_integral": "/double-integral",
+    "lagrange": "/lagrange",
+    "optimize": "/optimize",
+}
+
+logger = logging.getLogger(__name__)
+
+
+def source_fingerprint():
+    """
+    SHA-256 of every backend module: any code change makes previously built packs stale.
+    """
+    digest = hashlib.sha256()
+    for name in sorted(os.listdir(BASE_DIR)):
+        if name.endswith(".py"):
+            digest.update(name.encode("utf-8"))
+            with open(os.path.join(BASE_DIR, name), "rb") as fh:
+                digest.update(fh.read())
+    return digest.hexdigest()
+
+
+def version_stamp():
+    return {"format": FORMAT_VERSION, "engine": ENGINE_VERSION, "source": source_fingerprint()}
+
+
+def pack_key(path, data):
+    """
+    16-byte key of a request (same canonical form as the result ETag), or None if unparsable.
+    """
+    canon = canonical_query(path, data) if isinstance(data, dict) else None
+    if canon is None:
+        return None
+    payload = json.dumps(canon, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).digest()[:16]
+
+
+def write_pack(path, answers, stamp=None, meta=None):
+    """
+    Write answers ({key: body bytes}) to path atomically.
+    """
+    header = dict(stamp or version_stamp(), **(meta or {}))
+    header_bytes = json.dumps(header, sort_keys=True).encode("utf-8")
+    keys = sorted(answers)
+    data_start = len(MAGIC) + 2 * U32.size + len(header_bytes) + U32.size + ENTRY.size * len(keys)
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as fh:
+        fh.write(MAGIC + U32.pack(FORMAT_VERSION) + U32.pack(len(header_bytes)) + header_bytes)
+        fh.write(U32.pack(len(keys)))
+        offset = data_start
+        for key in keys:
+            fh.write(ENTRY.pack(key, offset, len(answers[key])))
+            offset += len(answers[key])
+        for key in keys:
+            fh.write(answers[key])
+    os.replace(tmp, path)
+
+
+class AnswerPack:
+    """
+    Read-only, memory-mapped answer pack with binary search over the sorted key index.
+    """
+
+    def __init__(self, path, mapped, header, count, index_start):
+        self.path = path
+        self.header = header
+        self.count = count
+        self.hits = 0
+        self.misses = 0
+        self._map = mapped
+        self._index_start = index_start
+
+    @classmethod
+    def open(cls, path=ANSWER_PACK_PATH, stamp=None):
+        """
+        Map the pack at path; returns None when it is missing, malformed or stale.
+        """
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            with open(path, "rb") as fh:
+                mapped = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+            if mapped[:len(MAGIC)] != MAGIC:
+                raise ValueError("bad magic")
+            pos = len(MAGIC)
+            version, = U32.unpack_from(mapped, pos)
+            header_len, = U32.unpack_from(mapped, pos + U32.size)
+            pos += 2 * U32.size
+            header = json.loads(mapped[pos:pos + header_len])
+            pos += header_len
+            count, = U32.unpack_from(mapped, pos)
+        except (OSError, ValueError, struct.error) as exc:
+            logger.warning(f"answer pack {path} ignored: {exc}")
+            return None
+        expected = stamp or version_stamp()
+        if version != FORMAT_VERSION or any(header.get(k) != v for k, v in expected.items()):
+            logger.warning(f"answer pack {path} ignored: built for engine {header.get('engine')}, "
+                           f"source {str(header.get('source'))[:12]}; rebuild it")
+            mapped.close()
+            return None
+        return cls(path, mapped, header, count, pos + U32.size)
+
+    def get(self, key):
+        """
+        Stored response body for key, or None.
+        """
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            entry_key, offset, length = ENTRY.unpack_from(self._map, self._index_start + mid * ENTRY.size)
+            if entry_key == key:
+                self.hits += 1
+                return self._map[offset:offset + length]
+            if entry_key < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        self.misses += 1
+        return None
+
+    def stats(self):
+        return {"path": self.path, "entries": self.count, "bytes": len(self._map), "hits": self.hits,
+                "misses": self.misses, "engine": self.header.get("engine"), "built": self.header.get("built")}
@@ -1,10 +1,19 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, g as flask_g, jsonify, request, stream_with_context
+import json
 import logging
-import re
+import multiprocessing as mp
+import time
 from flask_cors import CORS
+try:
+    # WebSocket opcional para las sesiones interactivas; sin flask-sock se usa HTTP
+    from flask_sock import Sock
+except ImportError:  # pragma: no cover - depende del entorno
+    Sock = None
+import os, sys
+# La caché global de SymPy (una LRU por función) se acota antes de importar sympy
+os.environ.setdefault("SYMPY_CACHE_SIZE", "500")
 import sympy as sp
 import numpy as np
-import os, sys
 # Asegurar que el directorio raíz del proyecto esté en sys.path para importar 'backend'
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 if BASE_DIR not in sys.path:
@@ -16,146 +25,155 @@ from backend.math_operations import (
     calculate_double_integral,
     lagrange_method,
     calculate_unconstrained_optimization,
+    calculate_gradient_n,
+    calculate_optimization_n,
+    lagrange_method_n,
+)
+from backend.admission import OPERATION_COST, SERVER_THREADS, AdmissionController, Overloaded, estimate_cost
+from backend.analysis import ExpressionAnalysis, lam
+from backend.answer_pack import PACK_ENDPOINTS, AnswerPack, pack_key
+from backend.assets import DIST_DIR, load_manifest, serve_asset
+from backend.caching import (
+    CACHE_CONTROL,
+    ENGINE_VERSION,
+    is_load_dependent,
+    query_payload,
+    reset_load_dependent,
+    result_etag,
+)
+from backend.autodiff import evaluate_jets
+from backend.bounded_optimization import absolute_extrema, parse_region
+from backend.evaluator import compile_expression
+from backend.gradient_field import MAX_GRID_SIZE, MAX_SEEDS, MAX_STEPS, gradient_grid, gradient_paths, seed_grid
+from backend.expression_parser import (
+    ExpressionError, MAX_VARIABLES, RESERVED_NAMES, VARIABLE_NAME_RE, order_variables, parse_expression, parse_number,
+)
+from backend.multivariable import MultiAnalysis
+from backend.memory import MemoryGovernor
+from backend.logging_setup import REQUEST_ID_HEADER, configure_logging, dropped_records, payload_excerpt, request_id, should_log
+from backend.planner import planner
+from backend.session import SessionNotFound, sessions
+from backend.simplification import tiered_simplify
+from backend.incremental import memo_latex
+from backend.taylor import DEFAULT_ERROR_GRID, DEFAULT_ORDER, MAX_ERROR_GRID, MAX_ORDER, error_grid, taylor_polynomial
+from backend.presentation import (
+    COMPRESS_MIN_SIZE, COMPRESSIBLE_TYPES, DETAIL_EXPLANATIONS, FALLBACK_DETAIL_EXPLANATION,
+    FALLBACK_GRAPH_EXPLANATION, GRAPH_EXPLANATIONS, FieldSelection, compress_body,
+)
+from backend.region_integral import (
+    DEFAULT_TIME_BUDGET, DEFAULT_TOL, horizontal_region, inequality_region, integrate_region, vertical_region,
 )
+from backend.limits import estimate_limit, limit_value_text
 
 # Aplicación Flask principal para el backend del proyecto de cálculo multivariable.
 # Los comentarios están en español para explicar cada parte del código.
 
+# Máximo de puntos por solicitud en /point-gradient
+MAX_GRADIENT_POINTS = 10000
+# Rutas deterministas con variante GET cacheable (ETag + Cache-Control)
+CACHEABLE_ENDPOINTS = ("partials", "gradient", "evaluate", "double_integral", "optimize")
+# Presupuesto máximo de tiempo (s) para /region-integral
+MAX_REGION_TIME_BUDGET = 10.0
+# flask-sock necesita un servidor que entregue la conexión cruda (servidor de desarrollo de
+# Werkzeug, gunicorn con hilos); waitress no hace el upgrade. El despliegue que sí lo permite
+# lo declara con WEBSOCKET_SERVER=1 y solo entonces /session anuncia la variante WebSocket.
+WEBSOCKET_SERVER = os.environ.get("WEBSOCKET_SERVER", "0") == "1"
+
 def create_app():
-    app = Flask(__name__, static_folder="../frontend", static_url_path="/")
+    # Si existe la build de frontend/dist (python backend/build_assets.py) se sirven los archivos
+    # minificados y precomprimidos con caché inmutable; si no, la carpeta frontend tal cual.
+    asset_index = load_manifest(DIST_DIR)
+    app = Flask(__name__, static_folder=None if asset_index else "../frontend", static_url_path="/")
 
     @app.route("/")
     def serve_index():
+        if asset_index:
+            return serve_asset(DIST_DIR, asset_index, "index.html", request.headers.get("Accept-Encoding"))
         return app.send_static_file("index.html")
+
+    if asset_index:
+        @app.route("/<path:filename>")
+        def serve_built_asset(filename):
+            return serve_asset(DIST_DIR, asset_index, filename, request.headers.get("Accept-Encoding"))
     # Crea y configura la aplicación Flask
     # Habilita CORS para permitir solicitudes del frontend (todos los orígenes por defecto)
     CORS(app)
 
-    # Configura logging básico para registrar solicitudes y errores
-    # Los logs ayudan a depurar y monitorear el uso del API
-    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    # Registro estructurado (JSON) en un hilo de fondo: la solicitud solo encola el registro
+    configure_logging()
     logger = logging.getLogger(__name__)
+    # La carrera de integración y la confirmación de límites arrancan sus procesos desde el mismo
+    # forkserver: ambos módulos se precargan una sola vez, antes de que el servidor arranque
+    if "forkserver" in mp.get_all_start_methods():
+        mp.set_forkserver_preload(["backend.integration_race", "backend.limits"])
     # Variables simbólicas para construir LaTeX
     x, y = sp.symbols('x y')
 
-    # Validador de expresiones: solo permite tokens de funciones conocidas y variables x, y
-    # Previene que el usuario envíe código malicioso o nombres peligrosos
-    allowed_tokens = {
-        'x', 'y',
-        # Trigonométricas básicas e inversas
-        'sin', 'cos', 'tan', 'asin', 'acos', 'atan',
-        'csc', 'sec', 'cot', 'acsc', 'asec', 'acot',
-        # Hiperbólicas e inversas
-        'sinh', 'cosh', 'tanh', 'asinh', 'acosh', 'atanh',
-        'csch', 'sech', 'coth',
-        # Otras funciones
-        'exp', 'log', 'sqrt', 'abs',
-        # Constantes
-        'pi', 'E'
-    }
-
-    def validate_expression(expr: str):
-        # Verifica que la entrada sea cadena y no contenga patrones peligrosos
-        if not isinstance(expr, str):
-            return False, 'Expression must be a string'
-        lowered = expr.lower()
-        forbidden_substrings = ['__', 'import', 'eval', 'exec', 'lambda', 'open', 'subprocess', 'os.', 'sys.']
-        if any(fs in lowered for fs in forbidden_substrings):
-            return False, 'Expression contains forbidden tokens'
-
-        # Extrae palabras (tokens alfabéticos) y valida contra lista permitida
-        tokens = re.findall(r'[A-Za-z_]+', expr)
-        for t in tokens:
-            if t not in allowed_tokens:
-                return False, f'Unknown token: {t}'
-        return True, ''
+    # Analiza y valida la expresión en una sola pasada con el parser propio (sin sympify/eval).
+    # Solo se aceptan números, x, y, pi, E, funciones conocidas y operadores aritméticos;
+    # el mensaje de error incluye la posición del token inválido.
+    def parse_input(expr, allow_relations=False):
+        try:
+            return parse_expression(expr, allow_relations=allow_relations), ''
+        except ExpressionError as exc:
+            return None, str(exc)
 
     def validate_numeric(value, name: str):
         # Valida que un valor sea numérico o una expresión sencilla (pi, E, + - * /, paréntesis)
-        if isinstance(value, (int, float)):
+        try:
+            parse_number(value)
             return True, ''
-        if isinstance(value, str):
-            v = value.strip()
-            try:
-                expr = sp.sympify(v)
-                _ = float(sp.N(expr))
-                return True, ''
-            except Exception:
-                pass
-        return False, f'{name} must be numeric (supports pi, E and basic operations)'
+        except ExpressionError:
+            return False, f'{name} must be numeric (supports pi, E and basic operations)'
 
-    # Construye LaTeX y explicaciones dinámicas por tipo de función
-    def build_graph_explanations(expr_txt: str):
+    def parse_input_n(data, with_constraints=False):
+        # Modo de n variables: la lista "variables" es opcional; si falta se detectan las variables
+        # libres de f y de las restricciones. Devuelve (f, restricciones, variables, mensaje de error).
+        names = data.get("variables")
+        if names is not None:
+            if (not isinstance(names, list) or not names or len(names) > MAX_VARIABLES
+                    or len(set(names)) != len(names)
+                    or not all(isinstance(n, str) and VARIABLE_NAME_RE.fullmatch(n) and n not in RESERVED_NAMES for n in names)):
+                return None, None, None, f"variables must be a list of up to {MAX_VARIABLES} distinct names like x, z, x1"
         try:
-            expr_sp = sp.sympify(expr_txt)
-            func_latex = sp.latex(expr_sp)
-            func_text = str(expr_sp)
-            # Explicación breve por tipo
-            if any(t in func_text for t in ["sin", "cos", "tan", "cot", "csc", "sec"]):
-                graph_expl = (
-                    "La gráfica representa una superficie ondulada típica de funciones trigonométricas. "
-                    "Se observan zonas de crestas y valles periódicos en el plano, donde los valores oscilan entre positivos y negativos."
-                )
-            elif "exp" in func_text or "e**" in func_text:
-                graph_expl = (
-                    "La superficie crece de forma exponencial a medida que aumentan x y y. "
-                    "Los valores más altos se concentran en la región positiva del plano."
-                )
-            elif "log" in func_text or "ln" in func_text:
-                graph_expl = (
-                    "La superficie tiene un crecimiento logarítmico. "
-                    "Cerca del origen, los valores son más bajos y se incrementan lentamente conforme x e y aumentan."
-                )
-            elif "sqrt" in func_text:
-                graph_expl = (
-                    "La gráfica muestra una superficie tipo cono o cuenco. "
-                    "La raíz cuadrada suaviza los cambios y produce una forma radial simétrica alrededor del origen."
-                )
-            elif "^2" in func_text or "**2" in func_text:
-                graph_expl = (
-                    "La función cuadrática genera una superficie parabólica. "
-                    "Los valores aumentan rápidamente con x e y, creando un cuenco simétrico centrado en el origen."
-                )
-            else:
-                graph_expl = (
-                    "La superficie muestra el comportamiento general de la función en el plano xy. "
-                    "Los valores más altos se observan donde x e y son mayores."
-                )
-
-            # Explicación detallada por tipo
-            if "sin" in func_text or "cos" in func_text:
-                detailed = (
-                    "Las funciones trigonométricas como seno y coseno modelan oscilaciones. "
-                    "En el espacio tridimensional, estas generan superficies onduladas. "
-                    "Cada cresta y valle representa los puntos donde la función alcanza sus valores máximos y mínimos. "
-                    "Estas funciones son fundamentales para describir fenómenos periódicos como ondas o vibraciones."
-                )
-            elif "exp" in func_text:
-                detailed = (
-                    "Las funciones exponenciales presentan un crecimiento acelerado. "
-                    "En el plano xy, los valores aumentan rápidamente cuando x e y son positivos. "
-                    "Estas superficies suelen aparecer en modelos de crecimiento y decaimiento en física y biología."
-                )
-            elif "sqrt" in func_text:
-                detailed = (
-                    "La raíz cuadrada produce una superficie suave que crece de forma radial. "
-                    "El valor aumenta conforme nos alejamos del origen, pero con pendiente decreciente. "
-                    "Este tipo de función se asocia a distancias o magnitudes con simetría circular."
-                )
-            elif "log" in func_text or "ln" in func_text:
-                detailed = (
-                    "Las funciones logarítmicas aumentan lentamente y nunca alcanzan valores negativos para entradas positivas. "
-                    "Su gráfica muestra un ascenso gradual, común en escalas perceptuales y fenómenos de saturación."
-                )
-            else:
-                detailed = (
-                    "La función ingresada genera una superficie general en el espacio tridimensional. "
-                    "Su forma depende de las potencias y combinaciones de x e y. "
-                    "El estudio de estas superficies permite analizar pendientes, máximos y mínimos locales."
-                )
-            return func_latex, graph_expl, detailed
+            f = parse_expression(data["expression"], variables=names)
+            constraints = []
+            if with_constraints:
+                raw = data.get("constraints")
+                if isinstance(raw, str):
+                    raw = [raw]
+                if not isinstance(raw, list) or not raw:
+                    return None, None, None, "constraints must be a non-empty list of equations"
+                for c in raw:
+                    g = parse_expression(c, variables=names, allow_relations=True)
+                    if isinstance(g, sp.Rel):
+                        if not isinstance(g, sp.Equality):
+                            return None, None, None, "Constraints must be expressions g = 0 or equations"
+                        g = g.lhs - g.rhs
+                    constraints.append(g)
+        except ExpressionError as exc:
+            return None, None, None, str(exc)
+        if names is None:
+            symbols = f.free_symbols.union(*(g.free_symbols for g in constraints))
+            variables = order_variables(symbols)
+            if len(variables) > MAX_VARIABLES:
+                return None, None, None, f"Too many variables (max {MAX_VARIABLES})"
+        else:
+            variables = tuple(sp.Symbol(n) for n in names)
+        if not variables:
+            return None, None, None, "The expression has no variables"
+        if with_constraints and len(constraints) >= len(variables):
+            return None, None, None, "There must be fewer constraints than variables"
+        return f, constraints, variables, ''
+
+    # Construye LaTeX y explicaciones por tipo de función
+    # (el tipo de función y el LaTeX de f se leen del análisis compartido de la solicitud)
+    def build_graph_explanations(a):
+        # Los textos son fijos por tipo de función (presentation.py): solo se calcula el LaTeX de f
+        try:
+            return a.tex(a.f), GRAPH_EXPLANATIONS[a.graph_kind], DETAIL_EXPLANATIONS[a.detail_kind]
         except Exception:
-            return None, "La superficie se grafica para z=f(x,y).", "Explora la gráfica: rota y acerca para analizar pendientes y variaciones locales."
+            return None, FALLBACK_GRAPH_EXPLANATION, FALLBACK_DETAIL_EXPLANATION
 
     # Helper: envolver LaTeX en modo display para el frontend
     def block_tex(tex: str):
@@ -187,6 +205,176 @@ def create_app():
 
 
 
+    # Lee los datos de la solicitud: cuerpo JSON en POST, parámetros de la URL en GET
+    def request_payload():
+        if request.method == "GET":
+            return query_payload(request.args)
+        return request.get_json()
+
+    # Gobierno de memoria: cuenta solicitudes, limpia cachés y pide reciclar el proceso si hace falta.
+    # backend/supervisor.py reemplaza on_recycle para arrancar un proceso nuevo sin cortar solicitudes.
+    governor = MemoryGovernor()
+    governor.on_recycle = lambda reason: logger.warning(f"memory governor: recycle suggested ({reason}), no supervisor")
+    app.extensions["memory_governor"] = governor
+
+    @app.teardown_request
+    def count_request(exc):
+        governor.request_done()
+
+    # Id de la solicitud (o el que envía el cliente/proxy) e instante de inicio para el registro de acceso
+    @app.before_request
+    def start_request_log():
+        flask_g.request_id = request_id(request.headers.get(REQUEST_ID_HEADER))
+        flask_g.request_start = time.perf_counter()
+        planner.start_request()
+        reset_load_dependent()
+
+    # Registro de acceso: se ejecuta al final (Flask aplica los after_request en orden inverso).
+    # Errores y solicitudes lentas se registran siempre y con el cuerpo; el resto se muestrea.
+    @app.after_request
+    def log_request(response):
+        rid = flask_g.get("request_id")
+        if rid is None:
+            return response
+        response.headers[REQUEST_ID_HEADER] = rid
+        duration_ms = (time.perf_counter() - flask_g.request_start) * 1e3
+        log, full = should_log(response.status_code, duration_ms)
+        if not log:
+            return response
+        fields = {
+            "request_id": rid, "method": request.method, "path": request.path,
+            "operation": request.endpoint, "status": response.status_code,
+            "duration_ms": round(duration_ms, 2), "sampled": not full,
+        }
+        if "cost" in flask_g:
+            fields["cost"], fields["cost_class"] = round(flask_g.cost[0], 2), flask_g.cost[1]
+        if full:
+            data = query_payload(request.args) if request.method == "GET" else request.get_json(silent=True)
+            if data:
+                fields["payload"] = payload_excerpt(data)
+        dropped = dropped_records()
+        if dropped:
+            fields["dropped_logs"] = dropped
+        level = logging.ERROR if response.status_code >= 500 else logging.WARNING if full else logging.INFO
+        logger.log(level, "request", extra=fields)
+        return response
+
+    # Variantes GET: el ETag se calcula con la consulta canónica antes de ejecutar la ruta;
+    # si coincide con If-None-Match se responde 304 sin calcular nada.
+    @app.before_request
+    def check_result_etag():
+        if request.method != "GET" or request.endpoint not in CACHEABLE_ENDPOINTS:
+            return None
+        etag = result_etag(request.path, query_payload(request.args))
+        flask_g.result_etag = etag
+        if etag is None:
+            return None
+        for tag in (etag, f"{etag}-gzip", f"{etag}-br"):
+            if request.if_none_match.contains(tag):
+                response = app.response_class(status=304)
+                response.set_etag(tag)
+                response.headers["Cache-Control"] = CACHE_CONTROL
+                response.vary.add("Accept-Encoding")
+                return response
+        return None
+
+    # Paquete de respuestas precalculadas (python backend/build_answer_pack.py), mapeado en memoria.
+    # Se consulta después del ETag y antes de la admisión: un acierto no ocupa turno ni usa SymPy.
+    app.extensions["answer_pack"] = AnswerPack.open()
+    if app.extensions["answer_pack"] is not None:
+        logger.info(f"answer pack loaded: {app.extensions['answer_pack'].count} answers")
+
+    @app.before_request
+    def serve_from_pack():
+        pack = app.extensions.get("answer_pack")
+        if pack is None or request.endpoint not in PACK_ENDPOINTS:
+            return None
+        data = query_payload(request.args) if request.method == "GET" else request.get_json(silent=True)
+        key = pack_key(request.path, data)
+        body = pack.get(key) if key is not None else None
+        if body is None:
+            return None
+        response = app.response_class(body, mimetype="application/json")
+        response.headers["X-Answer-Pack"] = "hit"
+        return response
+
+    # Control de admisión: se registra después de check_result_etag para que las respuestas 304
+    # no ocupen turno. Las rutas caras (solve/integrate) tienen pocos turnos y una cola acotada;
+    # si está llena se responde 503 con Retry-After y las rutas baratas siguen atendiéndose.
+    admission = AdmissionController()
+
+    @app.before_request
+    def admit_request():
+        if request.endpoint not in OPERATION_COST:
+            return None
+        if request.method == "GET":
+            data = query_payload(request.args)
+        else:
+            data = request.get_json(silent=True)
+        cost, kind = estimate_cost(request.endpoint, data)
+        flask_g.cost = (cost, kind)
+        try:
+            flask_g.admission_ticket = admission.acquire(kind)
+        except Overloaded as exc:
+            logger.warning(f"{request.path} rejected: {kind} queue full (cost {cost:.1f})")
+            response = jsonify({"error": "Servidor ocupado, intenta de nuevo más tarde", "retry_after": exc.retry_after})
+            response.status_code = 503
+            response.headers["Retry-After"] = str(exc.retry_after)
+            return response
+        return None
+
+    # Libera el turno al terminar la solicitud (en streaming, al cerrar el generador)
+    @app.teardown_request
+    def release_admission(exc):
+        ticket = flask_g.pop("admission_ticket", None)
+        if ticket is not None:
+            admission.release(ticket)
+
+    # Se ejecuta después de la compresión (Flask aplica los after_request en orden inverso):
+    # cada codificación recibe su propio ETag fuerte
+    @app.after_request
+    def add_result_etag(response):
+        etag = getattr(flask_g, "result_etag", None)
+        if etag is None or response.status_code != 200:
+            return response
+        encoding = response.headers.get("Content-Encoding")
+        response.set_etag(f"{etag}-{encoding}" if encoding else etag)
+        response.headers["Cache-Control"] = CACHE_CONTROL
+        response.headers["X-Engine-Version"] = ENGINE_VERSION
+        return response
+
+    # Comprime las respuestas JSON/texto con brotli (si está instalado) o gzip según Accept-Encoding.
+    # Las respuestas en streaming (NDJSON) y los archivos estáticos se envían sin modificar.
+    @app.after_request
+    def compress_response(response):
+        if (response.direct_passthrough or response.is_streamed or response.status_code < 200
+                or response.status_code >= 300 or "Content-Encoding" in response.headers
+                or not (response.mimetype or "").startswith(COMPRESSIBLE_TYPES)):
+            return response
+        body = response.get_data()
+        response.vary.add("Accept-Encoding")
+        if len(body) < COMPRESS_MIN_SIZE:
+            return response
+        encoding, compressed = compress_body(body, request.headers.get("Accept-Encoding"))
+        if encoding is not None:
+            response.set_data(compressed)
+            response.headers["Content-Encoding"] = encoding
+        return response
+
+    # Se ejecuta antes del ETag: los tiempos del planificador van en Server-Timing y no en el
+    # cuerpo. Una respuesta cuyo orden de estrategias salió del historial aprendido (otro
+    # servidor podría responder con otro algoritmo) o que dependió de un plazo de reloj o de
+    # una carrera entre procesos (mark_load_dependent) no se marca como cacheable
+    @app.after_request
+    def report_plan(response):
+        timings, reordered = planner.finish_request()
+        if timings:
+            response.headers["Server-Timing"] = ", ".join(f"{name};dur={ms:.2f}" for name, ms in timings)
+        if reordered or is_load_dependent():
+            flask_g.result_etag = None
+            response.headers["Cache-Control"] = "no-store"
+        return response
+
     # Ruta principal de bienvenida
     @app.route("/", methods=["GET"])
     def home():
@@ -204,6 +392,27 @@ def create_app():
         # Devuelve un estado "ok" en formato JSON
         return jsonify({"status": "ok"})
 
+    # Estado de las colas de admisión (turnos ocupados, en espera, rechazos)
+    @app.route("/metrics/admission", methods=["GET"])
+    def admission_metrics():
+        return jsonify(admission.stats())
+
+    # Memoria del proceso: RSS, tamaño de las cachés y límites de reciclaje
+    @app.route("/metrics/memory", methods=["GET"])
+    def memory_metrics():
+        return jsonify(governor.report())
+
+    # Paquete de respuestas precalculadas: entradas, aciertos y sello de versión
+    @app.route("/metrics/answer-pack", methods=["GET"])
+    def answer_pack_metrics():
+        pack = app.extensions.get("answer_pack")
+        return jsonify(pack.stats() if pack is not None else {"loaded": False})
+
+    # Historial del planificador: tiempo medio y tasa de éxito por tipo de expresión y estrategia
+    @app.route("/metrics/planner", methods=["GET"])
+    def planner_metrics():
+        return jsonify(planner.snapshot())
+
     # Ruta para informar operaciones disponibles y sus descripciones
     @app.route("/info", methods=["GET"])
     def info():
@@ -211,33 +420,64 @@ def create_app():
         return jsonify({
             "operations": [
                 {"path": "/partials", "method": "POST", "description": "Compute partial derivatives df/dx and df/dy", "body": {"expression": "string"}},
+                {"path": "/partials, /gradient, /evaluate, /double-integral, /optimize", "method": "GET", "description": "Cacheable variants: same fields as query parameters (lists comma-separated); strong ETag and 304 on If-None-Match", "query": {"expression": "string", "x0": "number", "y0": "number", "x_limits": "a,b", "y_limits": "c,d"}},
                 {"path": "/gradient", "method": "POST", "description": "Compute gradient (fx, fy)", "body": {"expression": "string"}},
                 {"path": "/evaluate", "method": "POST", "description": "Evaluate function at (x0, y0)", "body": {"expression": "string", "x0": "number", "y0": "number"}},
                 {"path": "/double-integral", "method": "POST", "description": "Compute definite double integral over rectangular limits", "body": {"expression": "string", "x_limits": "[a,b]", "y_limits": "[c,d]"}},
                 {"path": "/lagrange", "method": "POST", "description": "Apply Lagrange multipliers with constraint g(x,y)=0", "body": {"expression": "string", "constraint": "string"}},
-                {"path": "/optimize", "method": "POST", "description": "Unconstrained optimization for f(x,y)", "body": {"expression": "string"}}
+                {"path": "/optimize", "method": "POST", "description": "Unconstrained optimization for f(x,y); with a region, also the absolute max/min on it (interior points, boundary edges solved as a batch of 1-D problems, corners) certified by dense sampling", "body": {"expression": "string", "region": "{type: rectangle, x_limits, y_limits} | {type: disk, center, radius} | {type: triangle, vertices} (optional)"}},
+                {"path": "/analyze_domain", "method": "POST", "description": "Domain conditions, estimated range and multi-path numeric limit at (x0, y0)", "body": {"expression": "string", "x0": "number (optional)", "y0": "number (optional)", "confirm_limit": "bool (optional)", "limit_time_budget": "seconds (optional)"}},
+                {"path": "/point-gradient", "method": "POST", "description": "Numeric value, gradient and Hessian at one or many points (automatic differentiation)", "body": {"expression": "string", "points": "[[x, y], ...] (or x0, y0)"}},
+                {"path": "/gradient-field", "method": "POST", "description": "Gradient field on a grid as float32 (base64 or JSON lists) and vectorized RK4 steepest ascent/descent paths ending at the critical points /optimize reports", "body": {"expression": "string", "x_limits": "[a,b]", "y_limits": "[c,d]", "n": "grid size (optional)", "stride": "downsampling (optional)", "format": "binary|json (optional)", "seeds": "[[x, y], ...] (optional)", "seed_grid": "k for k×k seeds (optional)", "direction": "ascent|descent|both (optional)", "step": "number (optional)", "max_steps": "integer (optional)"}},
+                {"path": "/taylor", "method": "POST", "description": "Taylor polynomial of order n around (x0, y0) from truncated Taylor-mode propagation at the point (no symbolic derivative tower), plus the error |f - P| on a grid", "body": {"expression": "string", "x0": "number", "y0": "number", "order": "integer (optional)", "radius": "half-width of the error grid (optional)", "n": "error grid size (optional)", "error_grid": "bool (optional)"}},
+                {"path": "/gradient-n", "method": "POST", "description": "Gradient and distinct Hessian entries of f(x, y, z, ...)", "body": {"expression": "string", "variables": "list of names (optional)"}},
+                {"path": "/optimize-n", "method": "POST", "description": "Unconstrained optimization in n variables (Hessian eigenvalue test)", "body": {"expression": "string", "variables": "list of names (optional)"}},
+                {"path": "/lagrange-n", "method": "POST", "description": "Lagrange multipliers in n variables with several constraints", "body": {"expression": "string", "constraints": "list of strings", "variables": "list of names (optional)"}},
+                {"path": "/region-integral", "method": "POST", "description": "Quasi-Monte Carlo double integral over a non-rectangular region, streamed as NDJSON", "body": {"expression": "string", "region": "{type: vertical|horizontal|inequality, ...}", "tol": "number (optional)", "time_budget": "seconds (optional)", "stream": "bool (optional)"}},
+                {"path": "/session", "method": "POST", "description": "Open an exploration session: f, its gradient and the tangent plane are compiled once", "body": {"expression": "string"}},
+                {"path": "/session/<id>/point", "method": "POST", "description": "Value, gradient and tangent plane at a point of an open session; updates older than the last answered seq are dropped", "body": {"seq": "integer", "x0": "number", "y0": "number"}},
+                {"path": "/session/ws", "method": "WebSocket", "description": "Same session over one connection (needs flask-sock and a WebSocket-capable server, WEBSOCKET_SERVER=1): first message {expression}, then {seq, x0, y0}"},
+                {"path": "/metrics/admission", "method": "GET", "description": "Admission control: running, waiting and rejected requests per cost class (overloaded expensive requests get 503 + Retry-After)"},
+                {"path": "/metrics/planner", "method": "GET", "description": "Strategy planner history: mean time and success rate per expression class and strategy (each response carries its plan; attempt times are in its Server-Timing header)"},
+                {"path": "/metrics/answer-pack", "method": "GET", "description": "Precomputed answer pack (python backend/build_answer_pack.py): entries, hits and version stamp"},
+                {"path": "/metrics/memory", "method": "GET", "description": "Worker memory: RSS, peak RSS, cache sizes, request count and recycling limits"}
             ]
         })
 
     # Ruta POST para optimización sin restricciones
-    @app.route("/optimize", methods=["POST"])
+    @app.route("/optimize", methods=["GET", "POST"])
     def optimize():
         # Comentario: Recibe f(x,y), calcula ∇f=0, Hessiano y clasifica los puntos
         try:
-            data = request.get_json()
+            data = request_payload()
             if not data or "expression" not in data:
                 return jsonify({"error": "Missing field: expression"}), 400
-            ok, msg = validate_expression(data["expression"])
-            if not ok:
+            expr_sp, msg = parse_input(data["expression"])
+            if expr_sp is None:
                 return jsonify({"error": msg}), 400
 
-            result = calculate_unconstrained_optimization(data["expression"])
+            # Región cerrada y acotada opcional: extremos absolutos además de los puntos críticos
+            region = None
+            if data.get("region") is not None:
+                try:
+                    region = parse_region(data["region"])
+                except (TypeError, ValueError) as exc:
+                    return jsonify({"error": f"Invalid region: {exc}"}), 400
+
+            # Análisis compartido: derivadas y LaTeX se calculan una sola vez por solicitud
+            a = ExpressionAnalysis(expr_sp)
+            # Modo compacto: no se construyen pasos, LaTeX ni explicaciones
+            sel = FieldSelection.from_request(data, request.args)
+            result = calculate_unconstrained_optimization(a, presentation=sel.presentation)
             if isinstance(result, dict) and "error" in result:
                 return jsonify(result), 400
+            if region is not None:
+                result = {**result, **absolute_extrema(a, region, result)}
+            if not sel.presentation:
+                return jsonify(sel.apply(result))
 
             # Explicación didáctica y LaTeX
-            expr_txt = data["expression"]
-            func_latex, graph_expl, graph_expl_detailed = build_graph_explanations(expr_txt)
+            func_latex, graph_expl, graph_expl_detailed = build_graph_explanations(a)
             # Pasos estructurados
             edu_steps = [
                 {
@@ -257,35 +497,62 @@ def create_app():
                     "latex": None
                 }
             ]
-            return jsonify({
+            title = "Optimización sin restricciones"
+            summary = "Se encuentran puntos críticos con ∇f=0 y se clasifica cada punto mediante la Hessiana."
+            if region is not None:
+                edu_steps = [edu_steps[0]] + [
+                    {
+                        "description": "Parametrizar cada borde de la región y resolver g'(t) = 0 para f restringida al borde.",
+                        "latex": block_tex("g(t) = f(x(t), y(t)),\\quad g'(t) = f_x\\,x'(t) + f_y\\,y'(t) = 0")
+                    },
+                    {
+                        "description": "Evaluar f en los puntos críticos interiores, en los del borde y en las esquinas; el mayor valor es el máximo absoluto y el menor, el mínimo absoluto.",
+                        "latex": None
+                    },
+                    {
+                        "description": (
+                            "Comprobar con un muestreo denso de la región: "
+                            + ("ningún punto supera los extremos encontrados." if result["certificate"]["certified"]
+                               else "el muestreo no confirma el resultado analítico (revise el dominio de f).")
+                        ),
+                        "latex": None
+                    },
+                ]
+                title = "Extremos absolutos en una región cerrada"
+                summary = "Se comparan los puntos críticos interiores, los puntos críticos de cada borde y las esquinas de la región."
+            return jsonify(sel.apply({
                 **result,
                 "steps": edu_steps,
-                "title": "Optimización sin restricciones",
-                "summary": "Se encuentran puntos críticos con ∇f=0 y se clasifica cada punto mediante la Hessiana.",
+                "title": title,
+                "summary": summary,
                 "func_latex": block_tex(func_latex) if func_latex else None,
                 "graph_explanation": graph_expl,
                 "graph_explanation_detailed": graph_expl_detailed,
-            })
+            }))
         except Exception as exc:
             return jsonify({"error": f"Unexpected error: {exc}"}), 500
 
     # Ruta POST para calcular derivadas parciales df/dx y df/dy
-    @app.route("/partials", methods=["POST"])
+    @app.route("/partials", methods=["GET", "POST"])
     def partials():
         # Lee JSON de la solicitud y valida campos, luego calcula derivadas parciales
         try:
-            data = request.get_json()
+            data = request_payload()
             if not data or "expression" not in data:
                 return jsonify({"error": "Missing field: expression"}), 400
-            ok, msg = validate_expression(data["expression"])
-            if not ok:
+            expr_sp, msg = parse_input(data["expression"])
+            if expr_sp is None:
                 logger.warning(f"/partials invalid expression: {msg}")
                 return jsonify({"error": msg}), 400
-            logger.info(f"/partials payload: {data}")
+            logger.debug("/partials payload: %s", data)
 
-            result = calculate_partials(data["expression"])
+            a = ExpressionAnalysis(expr_sp)
+            result = calculate_partials(a)
             if str(result).lower().startswith("error"):
                 return jsonify({"error": result}), 400
+            sel = FieldSelection.from_request(data, request.args)
+            if not sel.presentation:
+                return jsonify(sel.apply({"result": result}))
             # Pasos y explicación didáctica
             expr_txt = data["expression"]
             try:
@@ -294,22 +561,20 @@ def create_app():
             except Exception:
                 part_x, part_y = "df/dx calculado", "df/dy calculado"
             try:
-                expr_sp = sp.sympify(expr_txt)
-                fx = sp.diff(expr_sp, x)
-                fy = sp.diff(expr_sp, y)
-                resultado_latex = rf"\frac{{\partial f}}{{\partial x}} = {sp.latex(fx)}, \; \frac{{\partial f}}{{\partial y}} = {sp.latex(fy)}"
+                fx_tex, fy_tex = a.tex(a.fx), a.tex(a.fy)
+                resultado_latex = rf"\frac{{\partial f}}{{\partial x}} = {fx_tex}, \; \frac{{\partial f}}{{\partial y}} = {fy_tex}"
                 edu_steps = [
                     {
                         "description": "Identificar la función f(x,y).",
-                        "latex": block_tex(rf"f(x,y) = {sp.latex(expr_sp)}")
+                        "latex": block_tex(rf"f(x,y) = {a.tex(a.f)}")
                     },
                     {
                         "description": "Derivar respecto a x.",
-                        "latex": block_tex(rf"\frac{{\partial f}}{{\partial x}} = {sp.latex(fx)}")
+                        "latex": block_tex(rf"\frac{{\partial f}}{{\partial x}} = {fx_tex}")
                     },
                     {
                         "description": "Derivar respecto a y.",
-                        "latex": block_tex(rf"\frac{{\partial f}}{{\partial y}} = {sp.latex(fy)}")
+                        "latex": block_tex(rf"\frac{{\partial f}}{{\partial y}} = {fy_tex}")
                     },
                     {
                         "description": "Cada derivada parcial mide la tasa de cambio en una sola variable.",
@@ -345,8 +610,8 @@ def create_app():
                 "Geométricamente, representan la pendiente al moverse en dirección de los ejes y son ortogonales a las curvas de nivel correspondientes. "
                 "A partir de ellas se construye el gradiente y el plano tangente, y se analizan direcciones de máximo crecimiento."
             )
-            func_latex, graph_expl, graph_expl_detailed = build_graph_explanations(expr_txt)
-            return jsonify({
+            func_latex, graph_expl, graph_expl_detailed = build_graph_explanations(a)
+            return jsonify(sel.apply({
                 "result": result,
                 "resultado_latex": block_tex(resultado_latex) if resultado_latex else None,
                 "steps": edu_steps,
@@ -357,46 +622,48 @@ def create_app():
                 "func_latex": block_tex(func_latex) if func_latex else None,
                 "graph_explanation": graph_expl,
                 "graph_explanation_detailed": graph_expl_detailed,
-            })
+            }))
         except Exception as exc:
             logger.exception("/partials unexpected error")
             return jsonify({"error": f"Unexpected error: {exc}"}), 500
 
     # Ruta POST para calcular el gradiente (fx, fy)
-    @app.route("/gradient", methods=["POST"])
+    @app.route("/gradient", methods=["GET", "POST"])
     def gradient():
         # Lee JSON de la solicitud y valida campos, luego calcula el gradiente
         try:
-            data = request.get_json()
+            data = request_payload()
             if not data or "expression" not in data:
                 return jsonify({"error": "Missing field: expression"}), 400
-            ok, msg = validate_expression(data["expression"])
-            if not ok:
+            expr_sp, msg = parse_input(data["expression"])
+            if expr_sp is None:
                 logger.warning(f"/gradient invalid expression: {msg}")
                 return jsonify({"error": msg}), 400
-            logger.info(f"/gradient payload: {data}")
+            logger.debug("/gradient payload: %s", data)
 
-            result = calculate_gradient(data["expression"])
+            a = ExpressionAnalysis(expr_sp)
+            result = calculate_gradient(a)
             if str(result).lower().startswith("error"):
                 return jsonify({"error": result}), 400
+            sel = FieldSelection.from_request(data, request.args)
+            if not sel.presentation:
+                return jsonify(sel.apply({"result": result}))
             expr_txt = data["expression"]
             try:
-                expr_sp = sp.sympify(expr_txt)
-                fx = sp.diff(expr_sp, x)
-                fy = sp.diff(expr_sp, y)
-                resultado_latex = rf"\nabla f = \left( {sp.latex(fx)}, {sp.latex(fy)} \right)"
+                fx_tex, fy_tex = a.tex(a.fx), a.tex(a.fy)
+                resultado_latex = rf"\nabla f = \left( {fx_tex}, {fy_tex} \right)"
                 edu_steps = [
                     {
                         "description": "Identificar la función f(x,y).",
-                        "latex": block_tex(rf"f(x,y) = {sp.latex(expr_sp)}")
+                        "latex": block_tex(rf"f(x,y) = {a.tex(a.f)}")
                     },
                     {
                         "description": "Calcular derivadas parciales df/dx y df/dy.",
-                        "latex": block_tex(rf"\frac{{\partial f}}{{\partial x}} = {sp.latex(fx)},\; \frac{{\partial f}}{{\partial y}} = {sp.latex(fy)}")
+                        "latex": block_tex(rf"\frac{{\partial f}}{{\partial x}} = {fx_tex},\; \frac{{\partial f}}{{\partial y}} = {fy_tex}")
                     },
                     {
                         "description": "Formar el vector gradiente.",
-                        "latex": block_tex(rf"\nabla f = \left( {sp.latex(fx)}, {sp.latex(fy)} \right)")
+                        "latex": block_tex(resultado_latex)
                     },
                     {
                         "description": "El gradiente indica la dirección de mayor crecimiento de la función.",
@@ -432,8 +699,8 @@ def create_app():
                 "Es perpendicular a las curvas de nivel de f. En optimización, guía métodos de descenso y ascenso; "
                 "en física, describe campos como el de temperatura o potencial."
             )
-            func_latex, graph_expl, graph_expl_detailed = build_graph_explanations(expr_txt)
-            return jsonify({
+            func_latex, graph_expl, graph_expl_detailed = build_graph_explanations(a)
+            return jsonify(sel.apply({
                 "result": result,
                 "resultado_latex": block_tex(resultado_latex) if resultado_latex else None,
                 "steps": edu_steps,
@@ -444,17 +711,17 @@ def create_app():
                 "func_latex": block_tex(func_latex) if func_latex else None,
                 "graph_explanation": graph_expl,
                 "graph_explanation_detailed": graph_expl_detailed,
-            })
+            }))
         except Exception as exc:
             logger.exception("/gradient unexpected error")
             return jsonify({"error": f"Unexpected error: {exc}"}), 500
 
     # Ruta POST para evaluar la función en un punto (x0, y0)
-    @app.route("/evaluate", methods=["POST"])
+    @app.route("/evaluate", methods=["GET", "POST"])
     def evaluate():
         # Lee JSON de la solicitud y valida campos, luego evalúa la función en el punto dado
         try:
-            data = request.get_json()
+            data = request_payload()
             if not data:
                 return jsonify({"error": "Missing JSON body"}), 400
             expr_txt = data.get("expression") or data.get("func")
@@ -462,8 +729,8 @@ def create_app():
             y0 = data.get("y0")
             if expr_txt is None or x0 is None or y0 is None:
                 return jsonify({"error": "Missing fields: func/expression, x0, y0"}), 400
-            ok, msg = validate_expression(expr_txt)
-            if not ok:
+            expr_sp, msg = parse_input(expr_txt)
+            if expr_sp is None:
                 logger.warning(f"/evaluate invalid expression: {msg}")
                 return jsonify({"error": msg}), 400
             okx, msgx = validate_numeric(x0, 'x0')
@@ -471,28 +738,36 @@ def create_app():
             if not okx or not oky:
                 logger.warning(f"/evaluate invalid numeric: {msgx or msgy}")
                 return jsonify({"error": msgx or msgy}), 400
-            logger.info(f"/evaluate payload: {data}")
+            logger.debug("/evaluate payload: %s", data)
 
-            result = evaluate_function(expr_txt, x0, y0)
+            x0_sp, y0_sp = parse_number(x0), parse_number(y0)
+            a = ExpressionAnalysis(expr_sp)
+            result = evaluate_function(a, x0_sp, y0_sp)
             if str(result).lower().startswith("error"):
                 return jsonify({"error": result}), 400
-            # expr_txt, x0, y0 ya definidos arriba
+            sel = FieldSelection.from_request(data, request.args)
+            if not sel.presentation:
+                try:
+                    value_num = float(a.value_at(x0_sp, y0_sp))
+                except Exception:
+                    value_num = None
+                return jsonify(sel.apply({"result": result, "value": value_num, "result_numeric": value_num}))
+            # a, x0_sp, y0_sp ya definidos arriba; el valor se reutiliza del análisis
             try:
-                expr_sp = sp.sympify(expr_txt)
-                val = sp.N(sp.sympify(expr_sp.subs({x: sp.sympify(x0), y: sp.sympify(y0)})))
-                resultado_latex = f"f({sp.latex(sp.sympify(x0))}, {sp.latex(sp.sympify(y0))}) = {sp.latex(val)}"
+                val = a.value_at(x0_sp, y0_sp)
+                resultado_latex = f"f({a.tex(x0_sp)}, {a.tex(y0_sp)}) = {a.tex(val)}"
                 edu_steps = [
                     {
                         "description": "Se identifica la función f(x,y).",
-                        "latex": block_tex(rf"f(x,y) = {sp.latex(expr_sp)}")
+                        "latex": block_tex(rf"f(x,y) = {a.tex(a.f)}")
                     },
                     {
                         "description": "Se sustituyen los valores del punto.",
-                        "latex": block_tex(rf"x = {sp.latex(sp.sympify(x0))},\; y = {sp.latex(sp.sympify(y0))}")
+                        "latex": block_tex(rf"x = {a.tex(x0_sp)},\; y = {a.tex(y0_sp)}")
                     },
                     {
                         "description": "Se evalúa la expresión para obtener el valor.",
-                        "latex": block_tex(sp.latex(val))
+                        "latex": block_tex(a.tex(val))
                     },
                     {
                         "description": "Este valor corresponde a la altura de la superficie z = f(x,y) en el punto (x0, y0).",
@@ -522,9 +797,9 @@ def create_app():
                     }
                 ]
             # Explicaciones dinámicas basadas en el punto y el valor
-            x0_ltx = sp.latex(sp.sympify(x0))
-            y0_ltx = sp.latex(sp.sympify(y0))
-            expr_ltx = sp.latex(expr_sp) if 'expr_sp' in locals() else expr_txt
+            x0_ltx = a.tex(x0_sp)
+            y0_ltx = a.tex(y0_sp)
+            expr_ltx = a.tex(a.f)
             val_num = value_num if value_num is not None else result
             explanation = (
                 f"El valor de la función f(x,y) = {expr_ltx} "
@@ -533,11 +808,11 @@ def create_app():
             )
             explanation_detailed = (
                 f"Al sustituir x = {x0_ltx} e y = {y0_ltx} en f(x,y) = {expr_ltx} y evaluar, "
-                f"se obtiene f({x0_ltx}, {y0_ltx}) = {sp.latex(sp.sympify(val)) if 'val' in locals() else result}. "
+                f"se obtiene f({x0_ltx}, {y0_ltx}) = {a.tex(val) if 'val' in locals() else result}. "
                 "Este valor describe la altura (z) de la superficie en esas coordenadas del plano."
             )
-            func_latex, graph_expl, graph_expl_detailed = build_graph_explanations(expr_txt)
-            return jsonify({
+            func_latex, graph_expl, graph_expl_detailed = build_graph_explanations(a)
+            return jsonify(sel.apply({
                 "result": result,
                 "value": value_num,
                 "resultado_latex": block_tex(resultado_latex) if resultado_latex else None,
@@ -551,17 +826,17 @@ def create_app():
                 "func_latex": block_tex(func_latex) if func_latex else None,
                 "graph_explanation": graph_expl,
                 "graph_explanation_detailed": graph_expl_detailed,
-            })
+            }))
         except Exception as exc:
             logger.exception("/evaluate unexpected error")
             return jsonify({"error": f"Unexpected error: {exc}"}), 500
 
     # Ruta POST para calcular una integral doble (definida o indefinida)
-    @app.route("/double-integral", methods=["POST"])
+    @app.route("/double-integral", methods=["GET", "POST"])
     def double_integral():
         # Lee JSON de la solicitud y valida campos, luego calcula integral definida o indefinida
         try:
-            data = request.get_json() or {}
+            data = request_payload() or {}
             # Comentario: Se aceptan claves antiguas (expression, x_limits/y_limits) y nuevas (function, xlim/ylim)
             func = data.get("function") or data.get("expression")
             xlim = data.get("xlim") or data.get("x_limits")
@@ -569,8 +844,8 @@ def create_app():
 
             if not func:
                 return jsonify({"error": "Missing field: function/expression"}), 400
-            ok, msg = validate_expression(func)
-            if not ok:
+            expr_sp, msg = parse_input(func)
+            if expr_sp is None:
                 logger.warning(f"/double-integral invalid expression: {msg}")
                 return jsonify({"error": msg}), 400
 
@@ -587,26 +862,45 @@ def create_app():
                     msg = msg_ax or msg_bx or msg_ay or msg_by
                     logger.warning(f"/double-integral invalid limits: {msg}")
                     return jsonify({"error": msg}), 400
-                logger.info(f"/double-integral definite payload: {data}")
-                result = calculate_double_integral(func, xlim, ylim)
+                logger.debug("/double-integral definite payload: %s", data)
+                xlim = [parse_number(v) for v in xlim]
+                ylim = [parse_number(v) for v in ylim]
+                a = ExpressionAnalysis(expr_sp)
+                result = calculate_double_integral(a, xlim, ylim)
             else:
                 # Comentario: Modo indefinido si los límites no están completos
-                logger.info(f"/double-integral indefinite payload: {data}")
-                result = calculate_double_integral(func, None, None)
+                logger.debug("/double-integral indefinite payload: %s", data)
+                a = ExpressionAnalysis(expr_sp)
+                result = calculate_double_integral(a, None, None)
 
             # Manejo de errores provenientes de math_operations
             if isinstance(result, dict) and result.get("error"):
                 return jsonify({"error": result["error"]}), 400
+            sel = FieldSelection.from_request(data, request.args)
+            if not sel.presentation:
+                return jsonify(sel.apply(result))
             try:
                 if result.get("type") == "definite":
-                    integral_tex = sp.latex(sp.sympify(result.get("integral")))
-                    expr_tex = sp.latex(sp.sympify(func))
                     ax, bx = xlim
                     ay, by = ylim
-                    limits_tex = f"\\int_{sp.latex(sp.sympify(ax))}^{sp.latex(sp.sympify(bx))} \\int_{sp.latex(sp.sympify(ay))}^{sp.latex(sp.sympify(by))} {expr_tex} \\, dy \\, dx"
+                    # Reutiliza la integral ya calculada por el análisis (sin volver a parsear el texto)
+                    integral_tex = a.tex(a.double_integral(ax, bx, ay, by)["value"])
+                    expr_tex = a.tex(a.f)
+                    ax_tex, bx_tex, ay_tex, by_tex = a.tex(ax), a.tex(bx), a.tex(ay), a.tex(by)
+                    # Orden de integración usado (dy dx salvo que la carrera la ganara dx dy)
+                    if result.get("integration_order") == "dx dy":
+                        v1, lo1, hi1, v2, lo2, hi2 = "x", ax_tex, bx_tex, "y", ay_tex, by_tex
+                    else:
+                        v1, lo1, hi1, v2, lo2, hi2 = "y", ay_tex, by_tex, "x", ax_tex, bx_tex
+                    limits_tex = f"\\int_{lo2}^{hi2} \\int_{lo1}^{hi1} {expr_tex} \\, d{v1} \\, d{v2}"
                     result["integral_latex"] = block_tex(integral_tex)
                     result["definite_symbolic_latex"] = block_tex(limits_tex)
                     result["expression_latex"] = block_tex(expr_tex)
+                    race = result.get("race") or {}
+                    race_note = ""
+                    if race.get("source"):
+                        race_note = (" La integral tardaba, así que se calcularon ambos órdenes en paralelo"
+                                     f" y se usa el primero que dio una forma cerrada ({race['order']}).")
                     # Pasos y explicación en LaTeX para modo definido (estructurados)
                     edu_steps = [
                         {
@@ -614,23 +908,24 @@ def create_app():
                             "latex": block_tex(rf"f(x,y) = {expr_tex}")
                         },
                         {
-                            "description": "Integrar respecto a y en el intervalo indicado.",
-                            "latex": block_tex(rf"\\int_{{{sp.latex(sp.sympify(ay))}}}^{{{sp.latex(sp.sympify(by))}}} {expr_tex} \\, dy")
+                            "description": f"Integrar respecto a {v1} en el intervalo indicado.{race_note}",
+                            "latex": block_tex(rf"\\int_{{{lo1}}}^{{{hi1}}} {expr_tex} \\, d{v1}")
                         },
                         {
-                            "description": "Integrar el resultado respecto a x en el intervalo indicado.",
-                            "latex": block_tex(rf"\\int_{{{sp.latex(sp.sympify(ax))}}}^{{{sp.latex(sp.sympify(bx))}}} \\left( \\int_{{{sp.latex(sp.sympify(ay))}}}^{{{sp.latex(sp.sympify(by))}}} {expr_tex} \\, dy \\right) \\, dx")
+                            "description": f"Integrar el resultado respecto a {v2} en el intervalo indicado.",
+                            "latex": block_tex(rf"\\int_{{{lo2}}}^{{{hi2}}} \\left( \\int_{{{lo1}}}^{{{hi1}}} {expr_tex} \\, d{v1} \\right) \\, d{v2}")
                         },
                         {
-                            "description": "Simplificar y, si aplica, evaluar numéricamente.",
+                            "description": "Simplificar y, si aplica, evaluar numéricamente."
+                            + (f" Simplificación aplicada: {result['simplification']}." if result.get("simplification") else ""),
                             "latex": block_tex(integral_tex)
                         }
                     ]
                     result["steps"] = edu_steps
                     result["title"] = "Integral doble definida"
-                    result["summary"] = "La integral doble definida calcula el volumen bajo z = f(x,y) sobre la región dada, integrando primero en y y luego en x."
+                    result["summary"] = f"La integral doble definida calcula el volumen bajo z = f(x,y) sobre la región dada, integrando primero en {v1} y luego en {v2}."
                     result["explanation"] = (
-                        "La integral doble definida calcula el volumen bajo z = f(x,y) sobre el rectángulo dado; primero en y y luego en x."
+                        f"La integral doble definida calcula el volumen bajo z = f(x,y) sobre el rectángulo dado; primero en {v1} y luego en {v2}."
                     )
                     result["explanation_detailed"] = (
                         "En una integral doble definida, se evalúa la integral interna (por ejemplo, respecto a y), obteniendo una función de x. "
@@ -638,9 +933,9 @@ def create_app():
                     )
                 elif result.get("type") == "indefinite":
                     # Construir LaTeX mostrando explícitamente el símbolo de integral y la igualdad
-                    expr_tex = sp.latex(sp.sympify(func))
-                    inner_tex = sp.latex(sp.sympify(result.get("inner_integral")))
-                    outer_tex = sp.latex(sp.sympify(result.get("double_integral")))
+                    expr_tex = a.tex(a.f)
+                    inner_tex = a.tex(a.integral_y)
+                    outer_tex = a.tex(a.integral_yx)
 
                     inner_with_symbol = rf"\\int {expr_tex} \, dy = {inner_tex}"
                     outer_with_symbol = rf"\\int \\left({inner_tex}\\right) \, dx = {outer_tex}"
@@ -683,11 +978,11 @@ def create_app():
             except Exception:
                 pass
             # Añadir LaTeX y explicaciones de la función base para apoyar el frontend
-            func_latex, graph_expl, graph_expl_detailed = build_graph_explanations(func)
+            func_latex, graph_expl, graph_expl_detailed = build_graph_explanations(a)
             result["func_latex"] = block_tex(func_latex) if func_latex else None
             result["graph_explanation"] = graph_expl
             result["graph_explanation_detailed"] = graph_expl_detailed
-            return jsonify(result)
+            return jsonify(sel.apply(result))
         except Exception as exc:
             logger.exception("/double-integral unexpected error")
             return jsonify({"error": f"Unexpected error: {exc}"}), 500
@@ -698,10 +993,11 @@ def create_app():
         try:
             data = request.get_json() or {}
             expr_txt = data.get("expression", "")
-            ok, msg = validate_expression(expr_txt)
-            if not ok:
+            f, msg = parse_input(expr_txt)
+            if f is None:
                 logger.warning(f"/analyze_domain invalid expression: {msg}")
                 return jsonify({"error": msg}), 400
+            a = ExpressionAnalysis(f)
 
             # Opcional: punto para límite
             x0 = data.get("x0", None)
@@ -715,8 +1011,6 @@ def create_app():
                 if not oky:
                     return jsonify({"error": msgy}), 400
 
-            f = sp.sympify(expr_txt)
-
             # Detectar condiciones del dominio simbólico de forma básica
             conditions = []
             try:
@@ -739,11 +1033,9 @@ def create_app():
             # Estimar rango con cuadrícula numérica sobre [-10, 10]
             minv, maxv = None, None
             try:
-                fx = sp.lambdify((x, y), f, modules=["numpy"])
                 grid = np.linspace(-10, 10, 60)
                 X, Y = np.meshgrid(grid, grid)
-                Z = fx(X, Y)
-                Z = np.array(Z, dtype=float)
+                Z = compile_expression(f)(X, Y)
                 Z[~np.isfinite(Z)] = np.nan
                 if np.isfinite(Z).any():
                     minv = float(np.nanmin(Z))
@@ -751,51 +1043,37 @@ def create_app():
             except Exception:
                 pass
 
-            # Calcular límite (iterado) si se proporciona punto
+            # Calcular límite si se proporciona punto: estimación numérica por múltiples trayectorias
+            # (rayos, parábolas, cúbicas, cuárticas y pasos geométricos); la confirmación simbólica es opcional
             limit_value = None
-            try:
-                if x0 is not None and y0 is not None:
-                    x0s = float(sp.N(sp.sympify(x0)))
-                    y0s = float(sp.N(sp.sympify(y0)))
-                    Lxy = sp.limit(sp.limit(f, x, x0s), y, y0s)
-                    Lyx = sp.limit(sp.limit(f, y, y0s), x, x0s)
-                    if Lxy == sp.oo or Lyx == sp.oo:
-                        limit_value = "infinity"
-                    elif Lxy == -sp.oo or Lyx == -sp.oo:
-                        limit_value = "-infinity"
-                    elif (Lxy is sp.NaN) or (Lyx is sp.NaN):
-                        limit_value = "undefined"
-                    elif sp.simplify(Lxy - Lyx) == 0:
-                        try:
-                            limit_value = str(float(sp.N(Lxy)))
-                        except Exception:
-                            limit_value = sp.latex(Lxy)
-                    else:
-                        limit_value = "undefined"
-            except Exception:
-                # Fallback: evaluar cerca del punto si es posible
+            limit_analysis = None
+            if x0 is not None and y0 is not None:
                 try:
-                    if x0 is not None and y0 is not None:
-                        x0s = float(sp.N(sp.sympify(x0)))
-                        y0s = float(sp.N(sp.sympify(y0)))
-                        fx = sp.lambdify((x, y), f, modules=["numpy"])
-                        eps = 1e-3
-                        val = fx(x0s + eps, y0s + eps)
-                        if np.isfinite(val):
-                            limit_value = str(float(val))
-                        else:
-                            limit_value = "undefined"
+                    confirm = bool(data.get("confirm_limit", False))
+                    budget = min(float(data.get("limit_time_budget", 1.0)), 5.0)
+                    limit_analysis = estimate_limit(f, parse_number(x0), parse_number(y0), confirm=confirm, time_budget=budget)
+                    limit_value = limit_value_text(limit_analysis)
                 except Exception:
                     limit_value = "undefined"
 
+            core = {
+                "domain_conditions": domain_conditions,
+                "range_estimated": [minv, maxv] if (minv is not None and maxv is not None) else None,
+                "limit_value": limit_value,
+                "limit_analysis": limit_analysis,
+            }
+            sel = FieldSelection.from_request(data, request.args)
+            if not sel.presentation:
+                return jsonify(sel.apply(core))
+
             # Explicaciones para frontend
-            func_latex, graph_expl, graph_expl_detailed = build_graph_explanations(expr_txt)
+            func_latex, graph_expl, graph_expl_detailed = build_graph_explanations(a)
             explanation = "Se analizan condiciones de existencia (dominio), se estima el rango y se evalúa el límite si se indica un punto."
             # Pasos estructurados con LaTeX
-            func_tex = sp.latex(f)
+            func_tex = func_latex
             limit_latex = None
             if (x0 is not None) and (y0 is not None):
-                limit_latex = block_tex(rf"\lim_{{(x,y)\to ({sp.latex(sp.sympify(x0))}, {sp.latex(sp.sympify(y0))})}} f(x,y)")
+                limit_latex = block_tex(rf"\lim_{{(x,y)\to ({sp.latex(parse_number(x0))}, {sp.latex(parse_number(y0))})}} f(x,y)")
             edu_steps = [
                 {
                     "description": "Se identifica la función f(x,y).",
@@ -815,10 +1093,8 @@ def create_app():
                 },
             ]
 
-            return jsonify({
-                "domain_conditions": domain_conditions,
-                "range_estimated": [minv, maxv] if (minv is not None and maxv is not None) else None,
-                "limit_value": limit_value,
+            return jsonify(sel.apply({
+                **core,
                 "func_latex": block_tex(func_latex) if func_latex else None,
                 "graph_explanation": graph_expl,
                 "graph_explanation_detailed": graph_expl_detailed,
@@ -826,7 +1102,7 @@ def create_app():
                 "title": "Análisis de dominio y límite",
                 "summary": explanation,
                 "explanation": explanation,
-            })
+            }))
         except Exception as exc:
             logger.exception("/analyze_domain unexpected error")
             return jsonify({"error": f"Unexpected error: {exc}"}), 500
@@ -840,42 +1116,39 @@ def create_app():
             required = ("expression", "constraint")
             if not data or any(k not in data for k in required):
                 return jsonify({"error": "Missing fields: expression, constraint"}), 400
-            ok, msg = validate_expression(data["expression"])
-            if not ok:
+            f, msg = parse_input(data["expression"])
+            if f is None:
                 logger.warning(f"/lagrange invalid expression: {msg}")
                 return jsonify({"error": msg}), 400
-            okc, msgc = validate_expression(data["constraint"])
-            if not okc:
+            g, msgc = parse_input(data["constraint"], allow_relations=True)
+            if g is None or (isinstance(g, sp.Rel) and not isinstance(g, sp.Equality)):
+                msgc = msgc or "Constraint must be an expression g(x,y) or an equation"
                 logger.warning(f"/lagrange invalid constraint: {msgc}")
                 return jsonify({"error": msgc}), 400
-            logger.info(f"/lagrange payload: {data}")
+            logger.debug("/lagrange payload: %s", data)
 
             # Normaliza la restricción: permite formato "x+y=1" convirtiéndolo a g(x,y)=0
-            g_txt_in = data["constraint"]
             try:
-                if "=" in g_txt_in:
-                    rel = sp.sympify(g_txt_in)
-                    # Si es una igualdad, convertir lhs - rhs
-                    if isinstance(rel, sp.Equality):
-                        g_txt_in = str(sp.simplify(rel.lhs - rel.rhs))
+                # Si es una igualdad, convertir lhs - rhs (simplificación por niveles con presupuesto)
+                if isinstance(g, sp.Equality):
+                    g, tier = tiered_simplify(g.lhs - g.rhs)
+                    logger.debug(f"/lagrange constraint simplified by {tier}")
             except Exception:
-                # Si falla la normalización, usar la cadena original
-                g_txt_in = data["constraint"]
+                # Si falla la normalización, usar la diferencia sin simplificar
+                g = g.lhs - g.rhs
 
-            result = lagrange_method(data["expression"], g_txt_in)
+            a = ExpressionAnalysis(f)
+            result = lagrange_method(a, g)
             if str(result).lower().startswith("error"):
                 return jsonify({"error": result}), 400
             expr_txt = data["expression"]
-            g_txt = g_txt_in
+            g_txt = str(g)
+            sel = FieldSelection.from_request(data, request.args)
             try:
-                f = sp.sympify(expr_txt)
-                g = sp.sympify(g_txt)
-                lam = sp.symbols('lambda')
-                L = f + lam * g
-                eq1 = sp.Eq(sp.diff(L, x), 0)
-                eq2 = sp.Eq(sp.diff(L, y), 0)
-                eq3 = sp.Eq(g, 0)
-                sols = sp.solve((eq1, eq2, eq3), (x, y, lam), dict=True)
+                # El sistema de Lagrange ya fue resuelto por lagrange_method: se reutiliza
+                system = a.lagrange(g)
+                L = system["L"]
+                sols = system["solutions"]
                 # Comentario: Lista estructurada de puntos críticos con valor de f(x,y)
                 points = []
                 if sols:
@@ -905,22 +1178,26 @@ def create_app():
                         except Exception:
                             f_num = None
                         points.append({"x": x_num, "y": y_num, "lambda": l_num, "f": f_num})
-                        tex_points.append(f"\\left(x={sp.latex(xv)},\\; y={sp.latex(yv)},\\; \\lambda={sp.latex(lv)}\\right)")
+                        if sel.presentation:
+                            tex_points.append(f"\\left(x={a.tex(xv)},\\; y={a.tex(yv)},\\; \\lambda={a.tex(lv)}\\right)")
                     resultado_latex = "[" + ", ".join(tex_points) + "]"
                 else:
                     resultado_latex = None
                     points = []
+                if not sel.presentation:
+                    return jsonify(sel.apply({"result": result, "critical_points": points, "solver": system["solver"],
+                                              "plan": system["plan"]}))
                 edu_steps = [
                     {
                         "description": "Se forma la función de Lagrange:",
-                        "latex": block_tex(f"L(x,y,\\lambda)={sp.latex(L)}")
+                        "latex": block_tex(f"L(x,y,\\lambda)={a.tex(L)}")
                     },
                     {
                         "description": "Se calculan las derivadas parciales e igualan a cero:",
                         "latex": block_tex(
-                            f"\\frac{{\\partial L}}{{\\partial x}}={sp.latex(sp.diff(L, x))}=0, \\quad "
-                            f"\\frac{{\\partial L}}{{\\partial y}}={sp.latex(sp.diff(L, y))}=0, \\quad "
-                            f"\\frac{{\\partial L}}{{\\partial \\lambda}}={sp.latex(sp.diff(L, lam))}=0"
+                            f"\\frac{{\\partial L}}{{\\partial x}}={a.tex(system['Lx'])}=0, \\quad "
+                            f"\\frac{{\\partial L}}{{\\partial y}}={a.tex(system['Ly'])}=0, \\quad "
+                            f"\\frac{{\\partial L}}{{\\partial \\lambda}}={a.tex(system['Llam'])}=0"
                         )
                     },
                     {
@@ -953,12 +1230,14 @@ def create_app():
                 "El método introduce una variable λ para imponer la restricción g(x,y)=0. Se construye L=f+λg y se resuelven ∂L/∂x=0, ∂L/∂y=0 junto con g=0. "
                 "Los puntos obtenidos son candidatos a extremos condicionados; para clasificarlos se evalúa f y se analizan condiciones adicionales según el problema."
             )
-            func_latex, graph_expl, graph_expl_detailed = build_graph_explanations(expr_txt)
-            summary_tex = f"$$f(x,y)={sp.latex(sp.sympify(expr_txt))}$$ sujeto a $$g(x,y)={sp.latex(sp.sympify(g_txt))}=0$$"
-            return jsonify({
+            func_latex, graph_expl, graph_expl_detailed = build_graph_explanations(a)
+            summary_tex = f"$$f(x,y)={a.tex(a.f)}$$ sujeto a $$g(x,y)={a.tex(g)}=0$$"
+            return jsonify(sel.apply({
                 "result": result,
                 "resultado_latex": block_tex(resultado_latex) if resultado_latex else None,
                 "critical_points": points,
+                "solver": a.lagrange(g)["solver"],
+                "plan": a.lagrange(g)["plan"],
                 "steps": edu_steps,
                 "explanation": explanation,
                 "explanation_detailed": explanation_detailed,
@@ -967,10 +1246,451 @@ def create_app():
                 "graph_explanation_detailed": graph_expl_detailed,
                 "title": "Optimización con Restricción (Método de Lagrange)",
                 "summary": summary_tex
-            })
+            }))
         except Exception as exc:
             logger.exception("/lagrange unexpected error")
             return jsonify({"error": f"Unexpected error: {exc}"}), 500
+
+    # Ruta POST para gradiente y Hessiana numéricos en uno o varios puntos (diferenciación automática)
+    @app.route("/point-gradient", methods=["POST"])
+    def point_gradient():
+        # Comentario: Se evalúan f, ∇f y la Hessiana en todos los puntos con una sola pasada del árbol
+        try:
+            data = request.get_json()
+            if not data:
+                return jsonify({"error": "Missing JSON body"}), 400
+            expr_txt = data.get("expression") or data.get("func")
+            if expr_txt is None:
+                return jsonify({"error": "Missing field: expression"}), 400
+            expr_sp, msg = parse_input(expr_txt)
+            if expr_sp is None:
+                return jsonify({"error": msg}), 400
+
+            raw_points = data.get("points")
+            if raw_points is None:
+                if data.get("x0") is None or data.get("y0") is None:
+                    return jsonify({"error": "Missing fields: points or x0, y0"}), 400
+                raw_points = [[data["x0"], data["y0"]]]
+            if not isinstance(raw_points, list) or not raw_points or len(raw_points) > MAX_GRADIENT_POINTS:
+                return jsonify({"error": f"points must be a non-empty list of at most {MAX_GRADIENT_POINTS} [x, y] pairs"}), 400
+            points = []
+            for p in raw_points:
+                if not isinstance(p, (list, tuple)) or len(p) != 2:
+                    return jsonify({"error": "Each point must be a pair [x, y]"}), 400
+                for name, v in zip(("x", "y"), p):
+                    ok, msgv = validate_numeric(v, name)
+                    if not ok:
+                        return jsonify({"error": msgv}), 400
+                points.append([float(sp.N(parse_number(v))) for v in p])
+
+            values, gradients, hessians = evaluate_jets(expr_sp, (x, y), points)
+
+            # Los valores fuera del dominio (NaN/inf) se devuelven como null en JSON
+            def clean(values):
+                return [clean(v) if isinstance(v, list) else (v if np.isfinite(v) else None) for v in values]
+
+            return jsonify({
+                "points": points,
+                "values": clean(values.tolist()),
+                "gradients": clean(gradients.tolist()),
+                "hessians": clean(hessians.tolist()),
+                "method": "forward-mode automatic differentiation",
+            })
+        except ValueError as exc:
+            return jsonify({"error": str(exc)}), 400
+        except Exception as exc:
+            logger.exception("/point-gradient unexpected error")
+            return jsonify({"error": f"Unexpected error: {exc}"}), 500
+
+    # Ruta POST para el campo de gradiente en una rejilla (float32) y trayectorias de ascenso/descenso
+    @app.route("/gradient-field", methods=["POST"])
+    def gradient_field():
+        try:
+            data = request.get_json()
+            if not data or "expression" not in data:
+                return jsonify({"error": "Missing field: expression"}), 400
+            expr_sp, msg = parse_input(data["expression"])
+            if expr_sp is None:
+                return jsonify({"error": msg}), 400
+            limits = []
+            for key in ("x_limits", "y_limits"):
+                lim = data.get(key, [-3, 3])
+                if not isinstance(lim, (list, tuple)) or len(lim) != 2:
+                    return jsonify({"error": f"{key} must be a pair [a, b]"}), 400
+                for v in lim:
+                    ok, msgv = validate_numeric(v, key)
+                    if not ok:
+                        return jsonify({"error": msgv}), 400
+                lo, hi = (float(sp.N(parse_number(v))) for v in lim)
+                if not (np.isfinite(lo) and np.isfinite(hi) and lo < hi):
+                    return jsonify({"error": f"{key} must satisfy a < b"}), 400
+                limits.append((lo, hi))
+            x_lim, y_lim = limits
+            try:
+                n = int(data.get("n", 41))
+                stride = int(data.get("stride", 1))
+                max_steps = int(data.get("max_steps", 500))
+                step = float(data["step"]) if data.get("step") is not None else None
+            except (TypeError, ValueError):
+                return jsonify({"error": "n, stride, max_steps and step must be numbers"}), 400
+            if not 2 <= n <= MAX_GRID_SIZE or stride < 1 or not 1 <= max_steps <= MAX_STEPS or (step is not None and not step > 0):
+                return jsonify({"error": f"n must be in [2, {MAX_GRID_SIZE}], stride >= 1, max_steps in [1, {MAX_STEPS}], step > 0"}), 400
+
+            # Semillas explícitas o una rejilla k×k de semillas
+            seeds = data.get("seeds")
+            if seeds is None and data.get("seed_grid"):
+                try:
+                    k = int(data["seed_grid"])
+                except (TypeError, ValueError):
+                    return jsonify({"error": "seed_grid must be an integer"}), 400
+                if not 1 <= k * k <= MAX_SEEDS:
+                    return jsonify({"error": f"seed_grid must give at most {MAX_SEEDS} seeds"}), 400
+                seeds = seed_grid(x_lim, y_lim, k)
+            elif seeds is not None:
+                if not isinstance(seeds, list) or not seeds or len(seeds) > MAX_SEEDS:
+                    return jsonify({"error": f"seeds must be a non-empty list of at most {MAX_SEEDS} [x, y] pairs"}), 400
+                parsed = []
+                for p in seeds:
+                    if not isinstance(p, (list, tuple)) or len(p) != 2:
+                        return jsonify({"error": "Each seed must be a pair [x, y]"}), 400
+                    for name, v in zip(("x", "y"), p):
+                        ok, msgv = validate_numeric(v, name)
+                        if not ok:
+                            return jsonify({"error": msgv}), 400
+                    parsed.append([float(sp.N(parse_number(v))) for v in p])
+                seeds = parsed
+            direction = data.get("direction", "ascent")
+            if direction not in ("ascent", "descent", "both"):
+                return jsonify({"error": "direction must be ascent, descent or both"}), 400
+
+            a = ExpressionAnalysis(expr_sp)
+            result = {"grid": gradient_grid(a, x_lim, y_lim, n=n, stride=stride, binary=data.get("format", "binary") != "json")}
+            if seeds:
+                # Las trayectorias terminan en los mismos puntos críticos que reporta /optimize
+                optimization = calculate_unconstrained_optimization(a, presentation=False)
+                critical = optimization.get("critical_points", [])
+                result["critical_points"] = critical
+                result["plan"] = optimization.get("plan")
+                pairs = [(c["x"], c["y"]) for c in critical]
+                signs = {"ascent": (1,), "descent": (-1,), "both": (1, -1)}[direction]
+                result["paths"] = {}
+                for sign in signs:
+                    name = "ascent" if sign > 0 else "descent"
+                    result["paths"][name] = gradient_paths(
+                        a, seeds, x_lim, y_lim, direction=sign, step=step, max_steps=max_steps, critical_points=pairs,
+                    )
+            return jsonify(result)
+        except Exception as exc:
+            logger.exception("/gradient-field unexpected error")
+            return jsonify({"error": f"Unexpected error: {exc}"}), 500
+
+    # Sesiones de exploración: la expresión se analiza y compila una vez (f, ∇f, plano tangente)
+    # y luego cada movimiento del punto solo evalúa el kernel compilado
+    @app.route("/session", methods=["POST"])
+    def session_open():
+        data = request.get_json(silent=True)
+        if not data:
+            return jsonify({"error": "Missing JSON body"}), 400
+        expr_txt = data.get("expression") or data.get("func")
+        if expr_txt is None:
+            return jsonify({"error": "Missing field: expression"}), 400
+        expr_sp, msg = parse_input(expr_txt)
+        if expr_sp is None:
+            return jsonify({"error": msg}), 400
+        try:
+            session = sessions.open(expr_sp)
+        except Exception as exc:
+            logger.exception("/session unexpected error")
+            return jsonify({"error": f"Unexpected error: {exc}"}), 500
+        return jsonify({**session.describe(), "websocket": Sock is not None and WEBSOCKET_SERVER})
+
+    # Actualización del punto: {"seq", "x0", "y0"} numéricos; las actualizaciones viejas se descartan
+    @app.route("/session/<session_id>/point", methods=["POST"])
+    def session_point(session_id):
+        data = request.get_json(silent=True)
+        if not data:
+            return jsonify({"error": "Missing JSON body"}), 400
+        try:
+            result = sessions.get(session_id).update(data.get("seq"), data.get("x0"), data.get("y0"))
+        except SessionNotFound:
+            return jsonify({"error": "Unknown or expired session"}), 404
+        except ValueError as exc:
+            return jsonify({"error": str(exc)}), 400
+        return jsonify(result if result is not None else {"seq": data.get("seq"), "stale": True})
+
+    @app.route("/session/<session_id>", methods=["DELETE"])
+    def session_close(session_id):
+        return jsonify({"closed": sessions.close(session_id)})
+
+    # Variante WebSocket (con flask-sock y WEBSOCKET_SERVER=1): el primer mensaje
+    # abre la sesión con {"expression"}; los siguientes son puntos. Si llegaron varios puntos
+    # mientras se calculaba el anterior, solo se responde el más reciente.
+    if Sock is not None and WEBSOCKET_SERVER:
+        sock = Sock(app)
+
+        @sock.route("/session/ws")
+        def session_ws(ws):
+            session = None
+            while True:
+                message = ws.receive()
+                while True:
+                    newer = ws.receive(timeout=0)
+                    if newer is None:
+                        break
+                    message = newer
+                try:
+                    data = json.loads(message)
+                except (TypeError, ValueError):
+                    ws.send(json.dumps({"error": "Invalid JSON message"}))
+                    continue
+                if not isinstance(data, dict):
+                    ws.send(json.dumps({"error": "Invalid JSON message"}))
+                    continue
+                if "expression" in data:
+                    expr_sp, msg = parse_input(data["expression"])
+                    if expr_sp is None:
+                        ws.send(json.dumps({"error": msg}))
+                        continue
+                    if session is not None:
+                        sessions.close(session.id)
+                    session = sessions.open(expr_sp)
+                    ws.send(json.dumps(session.describe()))
+                    continue
+                if session is None:
+                    ws.send(json.dumps({"error": "Send the expression first"}))
+                    continue
+                try:
+                    result = session.update(data.get("seq"), data.get("x0"), data.get("y0"))
+                except ValueError as exc:
+                    ws.send(json.dumps({"error": str(exc), "seq": data.get("seq")}))
+                    continue
+                if result is not None:
+                    ws.send(json.dumps(result))
+
+    # Ruta POST para integrales dobles sobre regiones no rectangulares (cuasi-Monte Carlo progresivo)
+    @app.route("/region-integral", methods=["POST"])
+    def region_integral():
+        # Comentario: Límites que dependen de la variable exterior o región dada por desigualdades.
+        # Con stream=true (por defecto) se envía una línea JSON (NDJSON) por cada estimación mejorada.
+        try:
+            data = request.get_json()
+            if not data or "expression" not in data or not isinstance(data.get("region"), dict):
+                return jsonify({"error": "Missing fields: expression, region"}), 400
+            f, msg = parse_input(data["expression"])
+            if f is None:
+                return jsonify({"error": msg}), 400
+            region = data["region"]
+            kind = region.get("type")
+            try:
+                if kind == "vertical":
+                    a, b = (parse_number(v) for v in region["x_limits"])
+                    lower = parse_expression(str(region["y_lower"]), variables=("x",))
+                    upper = parse_expression(str(region["y_upper"]), variables=("x",))
+                    sampler = vertical_region(f, a, b, lower, upper)
+                elif kind == "horizontal":
+                    c, d = (parse_number(v) for v in region["y_limits"])
+                    lower = parse_expression(str(region["x_lower"]), variables=("y",))
+                    upper = parse_expression(str(region["x_upper"]), variables=("y",))
+                    sampler = horizontal_region(f, c, d, lower, upper)
+                elif kind == "inequality":
+                    x_lim = [parse_number(v) for v in region["x_limits"]]
+                    y_lim = [parse_number(v) for v in region["y_limits"]]
+                    raw = region["conditions"]
+                    conditions = [parse_expression(c, allow_relations=True) for c in ([raw] if isinstance(raw, str) else raw)]
+                    if len(x_lim) != 2 or len(y_lim) != 2 or not conditions:
+                        return jsonify({"error": "Inequality regions need x_limits, y_limits and conditions"}), 400
+                    if not all(isinstance(c, sp.Rel) and not isinstance(c, (sp.Equality, sp.Unequality)) for c in conditions):
+                        return jsonify({"error": "Conditions must be inequalities like x^2 + y^2 <= 1"}), 400
+                    sampler = inequality_region(f, x_lim, y_lim, conditions)
+                else:
+                    return jsonify({"error": "region.type must be vertical, horizontal or inequality"}), 400
+            except (KeyError, TypeError, ValueError) as exc:
+                return jsonify({"error": f"Invalid region: {exc}"}), 400
+
+            try:
+                tol = float(data.get("tol", DEFAULT_TOL))
+                budget = min(float(data.get("time_budget", DEFAULT_TIME_BUDGET)), MAX_REGION_TIME_BUDGET)
+            except (TypeError, ValueError):
+                return jsonify({"error": "tol and time_budget must be numbers"}), 400
+            if not tol > 0 or not budget > 0:
+                return jsonify({"error": "tol and time_budget must be positive"}), 400
+
+            progress = integrate_region(sampler, tol=tol, time_budget=budget)
+            if data.get("stream", True):
+                lines = (json.dumps(p) + "\n" for p in progress)
+                return Response(stream_with_context(lines), mimetype="application/x-ndjson")
+            for last in progress:
+                pass
+            return jsonify(last)
+        except Exception as exc:
+            logger.exception("/region-integral unexpected error")
+            return jsonify({"error": f"Unexpected error: {exc}"}), 500
+
+    @app.route("/taylor", methods=["POST"])
+    def taylor():
+        # Comentario: Derivadas hasta el orden pedido en el punto (modo de Taylor), polinomio y rejilla de error
+        try:
+            data = request.get_json()
+            if not data or "expression" not in data:
+                return jsonify({"error": "Missing field: expression"}), 400
+            expr_sp, msg = parse_input(data["expression"])
+            if expr_sp is None:
+                return jsonify({"error": msg}), 400
+            for key in ("x0", "y0", "radius"):
+                if data.get(key) is not None:
+                    ok, msgv = validate_numeric(data[key], key)
+                    if not ok:
+                        return jsonify({"error": msgv}), 400
+            x0_sp = parse_number(data.get("x0", 0))
+            y0_sp = parse_number(data.get("y0", 0))
+            try:
+                order = int(data.get("order", DEFAULT_ORDER))
+                n = int(data.get("n", DEFAULT_ERROR_GRID))
+                radius = float(sp.N(parse_number(data.get("radius", 1))))
+            except (TypeError, ValueError):
+                return jsonify({"error": "order and n must be integers"}), 400
+            if not 0 <= order <= MAX_ORDER or not 2 <= n <= MAX_ERROR_GRID or not radius > 0:
+                return jsonify({"error": f"order must be in [0, {MAX_ORDER}], n in [2, {MAX_ERROR_GRID}] and radius > 0"}), 400
+            if not (x0_sp.is_real and y0_sp.is_real):
+                return jsonify({"error": "x0 and y0 must be real numbers"}), 400
+
+            try:
+                polynomial, terms = taylor_polynomial(expr_sp, x0_sp, y0_sp, order)
+            except ValueError as exc:
+                return jsonify({"error": str(exc)}), 400
+            result = {"order": order, "x0": str(x0_sp), "y0": str(y0_sp), "polynomial": str(polynomial), "terms": terms}
+            if data.get("error_grid", True):
+                result["error_grid"] = error_grid(expr_sp, terms, x0_sp, y0_sp, radius=radius, n=n)
+            sel = FieldSelection.from_request(data, request.args)
+            if not sel.presentation:
+                return jsonify(sel.apply(result))
+
+            point_tex = rf"({sp.latex(x0_sp)}, {sp.latex(y0_sp)})"
+            poly_tex = memo_latex(polynomial)
+            edu_steps = [
+                {
+                    "description": f"Se necesitan las derivadas parciales hasta el orden {order} en el punto.",
+                    "latex": block_tex(r"\frac{\partial^{k} f}{\partial x^{k-j}\,\partial y^{j}},\quad 0 \le j \le k \le " + str(order))
+                },
+                {
+                    "description": f"Se obtienen numéricamente en ({x0_sp}, {y0_sp}) propagando el desarrollo de Taylor de cada subexpresión de f, sin derivar f simbólicamente.",
+                    "latex": None
+                },
+                {
+                    "description": "Cada término lleva el coeficiente derivada / (a! b!).",
+                    "latex": block_tex(rf"P_{{{order}}}(x,y) = \sum_{{a+b \le {order}}} \frac{{f_{{x^a y^b}}{point_tex}}}{{a!\,b!}}\,(x-{sp.latex(x0_sp)})^a (y-{sp.latex(y0_sp)})^b")
+                },
+                {
+                    "description": "Polinomio de Taylor resultante.",
+                    "latex": block_tex(rf"P_{{{order}}}(x,y) = {poly_tex}")
+                },
+            ]
+            if "error_grid" in result and result["error_grid"]["max_error"] is not None:
+                edu_steps.append({
+                    "description": f"Error máximo |f - P| en el cuadrado de semilado {radius:g} alrededor del punto: {result['error_grid']['max_error']:.3e}.",
+                    "latex": None
+                })
+            return jsonify(sel.apply({
+                **result,
+                "polynomial_latex": block_tex(poly_tex),
+                "steps": edu_steps,
+                "title": f"Polinomio de Taylor de orden {order}",
+                "summary": "Se construye la torre de derivadas parciales y se evalúa en el punto para formar el polinomio de Taylor.",
+            }))
+        except Exception as exc:
+            logger.exception("/taylor unexpected error")
+            return jsonify({"error": f"Unexpected error: {exc}"}), 500
+
+    # Rutas del modo de n variables: f(x, y, z, w, ...) con variables detectadas o indicadas
+    @app.route("/gradient-n", methods=["POST"])
+    def gradient_n():
+        # Comentario: Gradiente y entradas distintas de la Hessiana para n variables
+        try:
+            data = request.get_json()
+            if not data or "expression" not in data:
+                return jsonify({"error": "Missing field: expression"}), 400
+            f, _, variables, msg = parse_input_n(data)
+            if f is None:
+                return jsonify({"error": msg}), 400
+            m = MultiAnalysis(f, variables)
+            result = calculate_gradient_n(m)
+            if "error" in result:
+                return jsonify(result), 400
+            sel = FieldSelection.from_request(data, request.args)
+            if not sel.presentation:
+                return jsonify(sel.apply(result))
+            grad_tex = ",\\; ".join(m.tex(g) for g in m.gradient)
+            return jsonify(sel.apply({
+                **result,
+                "resultado_latex": block_tex(rf"\nabla f = \left( {grad_tex} \right)"),
+                "hessian_latex": block_tex(rf"H = {m.tex(m.hessian)}"),
+                "func_latex": block_tex(rf"f({', '.join(m.tex(v) for v in m.variables)}) = {m.tex(m.f)}"),
+                "title": "Gradiente (n variables)",
+                "summary": "Se derivan las n componentes del gradiente y solo las n(n+1)/2 entradas distintas de la Hessiana.",
+            }))
+        except Exception as exc:
+            logger.exception("/gradient-n unexpected error")
+            return jsonify({"error": f"Unexpected error: {exc}"}), 500
+
+    @app.route("/optimize-n", methods=["POST"])
+    def optimize_n():
+        # Comentario: Puntos críticos de f en n variables clasificados por valores propios de la Hessiana
+        try:
+            data = request.get_json()
+            if not data or "expression" not in data:
+                return jsonify({"error": "Missing field: expression"}), 400
+            f, _, variables, msg = parse_input_n(data)
+            if f is None:
+                return jsonify({"error": msg}), 400
+            m = MultiAnalysis(f, variables)
+            result = calculate_optimization_n(m)
+            if "error" in result:
+                return jsonify(result), 400
+            sel = FieldSelection.from_request(data, request.args)
+            if not sel.presentation:
+                return jsonify(sel.apply(result))
+            return jsonify(sel.apply({
+                **result,
+                "func_latex": block_tex(rf"f({', '.join(m.tex(v) for v in m.variables)}) = {m.tex(m.f)}"),
+                "title": "Optimización sin restricciones (n variables)",
+                "summary": "Se resuelve ∇f = 0 y cada punto se clasifica con los valores propios de la Hessiana.",
+                "explanation": (
+                    "Si todos los valores propios de la Hessiana son positivos hay un mínimo local; si todos son negativos, "
+                    "un máximo local; si hay de ambos signos es un punto de silla y si alguno es cero la prueba es inconclusa."
+                ),
+            }))
+        except Exception as exc:
+            logger.exception("/optimize-n unexpected error")
+            return jsonify({"error": f"Unexpected error: {exc}"}), 500
+
+    @app.route("/lagrange-n", methods=["POST"])
+    def lagrange_n():
+        # Comentario: Multiplicadores de Lagrange con varias restricciones g_k = 0
+        try:
+            data = request.get_json()
+            if not data or "expression" not in data or "constraints" not in data:
+                return jsonify({"error": "Missing fields: expression, constraints"}), 400
+            f, constraints, variables, msg = parse_input_n(data, with_constraints=True)
+            if f is None:
+                return jsonify({"error": msg}), 400
+            m = MultiAnalysis(f, variables)
+            result = lagrange_method_n(m, constraints)
+            if "error" in result:
+                return jsonify(result), 400
+            sel = FieldSelection.from_request(data, request.args)
+            if not sel.presentation:
+                return jsonify(sel.apply(result))
+            system = m.lagrange(tuple(constraints))
+            return jsonify(sel.apply({
+                **result,
+                "lagrangian_latex": block_tex(rf"L = {m.tex(system['L'])}"),
+                "func_latex": block_tex(rf"f({', '.join(m.tex(v) for v in m.variables)}) = {m.tex(m.f)}"),
+                "title": "Optimización con restricciones (n variables)",
+                "summary": "Se forma L = f + Σ λ_k g_k y se resuelve ∇L = 0 junto con las restricciones.",
+            }))
+        except Exception as exc:
+            logger.exception("/lagrange-n unexpected error")
+            return jsonify({"error": f"Unexpected error: {exc}"}), 500
     
     return app
 
@@ -981,5 +1701,6 @@ if __name__ == "__main__":
 
     app = create_app()  #  aquí se crea la instancia Flask
     port = int(os.environ.get("PORT", 5000))
-    serve(app, host="0.0.0.0", port=port)  # waitress para Render
+    # Los turnos de admisión caros se dimensionan con este mismo número de hilos
+    serve(app, host="0.0.0.0", port=port, threads=SERVER_THREADS)  # waitress para Render
 
@@ -0,0 +1,63 @@
+import json
+import mimetypes
+import os
+
+from flask import abort, send_file
+
+# Servidor de los archivos estáticos construidos por backend/build_assets.py.
+# Los archivos ya vienen minificados y comprimidos: por solicitud solo se elige la variante
+# según Accept-Encoding y se añaden cabeceras de caché (sin compresión en el servidor).
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DIST_DIR = os.path.join(BASE_DIR, "frontend", "dist")
+MANIFEST_NAME = "manifest.json"
+
+# Los archivos con hash en el nombre nunca cambian; las páginas HTML se revalidan siempre
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+PAGE_CACHE = "no-cache"
+
+# Orden de preferencia de las variantes precomprimidas
+_ENCODING_SUFFIX = (("br", ".br"), ("gzip", ".gz"))
+
+
+def load_manifest(dist_dir=DIST_DIR):
+    """
+    Read the build manifest and index it by served file name, or return None if there is no build.
+    """
+    try:
+        with open(os.path.join(dist_dir, MANIFEST_NAME), encoding="utf-8") as fh:
+            manifest = json.load(fh)
+    except (OSError, ValueError):
+        return None
+    # Se indexa por el nombre servido (con hash) y también por el nombre original
+    index = {}
+    for name, entry in manifest.get("files", {}).items():
+        index[entry["path"]] = entry
+        index.setdefault(name, entry)
+    return index
+
+
+def serve_asset(dist_dir, index, filename, accept_encoding):
+    """
+    Send a built asset, choosing the best precompressed variant the client accepts.
+    """
+    entry = index.get(filename)
+    if entry is None:
+        abort(404)
+    path = os.path.join(dist_dir, entry["path"])
+    accepted = {part.split(";")[0].strip().lower() for part in (accept_encoding or "").split(",")}
+    encoding = None
+    for enc, suffix in _ENCODING_SUFFIX:
+        if enc in accepted and enc in entry.get("encodings", ()):
+            path, encoding = path + suffix, enc
+            break
+
+    mimetype = mimetypes.guess_type(entry["path"])[0] or "application/octet-stream"
+    response = send_file(path, mimetype=mimetype, conditional=True, etag=True, max_age=None)
+    if encoding is not None:
+        response.headers["Content-Encoding"] = encoding
+    response.vary.add("Accept-Encoding")
+    # Si se pidió por el nombre original se sirve igual, pero sin caché inmutable
+    immutable = entry["immutable"] and filename == entry["path"]
+    response.headers["Cache-Control"] = IMMUTABLE_CACHE if immutable else PAGE_CACHE
+    return response
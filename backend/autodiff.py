@@ -0,0 +1,376 @@
+import threading
+
+import numpy as np
+import sympy as sp
+
+# Diferenciación automática en modo directo (números hiper-duales de segundo orden).
+# Se recorre una sola vez el árbol de SymPy producido por el parser y, para todos los puntos
+# a la vez, se propagan el valor, el gradiente y la Hessiana de cada subexpresión.
+# No se construyen derivadas simbólicas de la expresión completa.
+
+
+class Jet:
+    """
+    Second-order jet of a subexpression evaluated at P points.
+
+    val has shape (P,), grad (n, P) and hess (n, n, P), where n is the number of variables.
+    """
+
+    __slots__ = ("val", "grad", "hess")
+
+    def __init__(self, val, grad, hess):
+        self.val = val
+        self.grad = grad
+        self.hess = hess
+
+
+# Derivadas de funciones de una variable: (g, g', g'') compiladas una vez por tipo de función
+_unary_cache = {}
+_unary_lock = threading.Lock()
+_t = sp.Dummy('t', real=True)
+
+
+def _unary_rules(func):
+    with _unary_lock:
+        rules = _unary_cache.get(func)
+    if rules is None:
+        g = func(_t)
+        g1 = sp.diff(g, _t)
+        # La segunda derivada de abs(t) es 0 salvo en t = 0 (delta de Dirac): se toma 0
+        g2 = sp.diff(g1, _t).replace(sp.DiracDelta, lambda *args: sp.S.Zero)
+        rules = tuple(sp.lambdify(_t, e, modules=["numpy"]) for e in (g, g1, g2))
+        with _unary_lock:
+            _unary_cache[func] = rules
+    return rules
+
+
+def _as_array(value, n_points):
+    return np.broadcast_to(np.asarray(value, dtype=float), (n_points,))
+
+
+def _constant(value, n_vars, n_points, order):
+    val = np.full(n_points, float(value))
+    grad = np.zeros((n_vars, n_points))
+    hess = np.zeros((n_vars, n_vars, n_points)) if order >= 2 else None
+    return Jet(val, grad, hess)
+
+
+def _chain(u, g, g1, g2, order):
+    # Regla de la cadena de segundo orden: H = g'(u) Hu + g''(u) ∇u ∇uᵀ
+    n_points = u.val.shape[0]
+    d1 = _as_array(g1(u.val), n_points)
+    val = _as_array(g(u.val), n_points)
+    grad = d1 * u.grad
+    hess = None
+    if order >= 2:
+        d2 = _as_array(g2(u.val), n_points)
+        hess = d1 * u.hess + d2 * np.einsum('ip,jp->ijp', u.grad, u.grad)
+    return Jet(val, grad, hess)
+
+
+def _add(a, b, order):
+    return Jet(a.val + b.val, a.grad + b.grad, a.hess + b.hess if order >= 2 else None)
+
+
+def _mul(a, b, order):
+    # Regla del producto: H = a Hb + b Ha + ∇a ∇bᵀ + ∇b ∇aᵀ
+    grad = a.val * b.grad + b.val * a.grad
+    hess = None
+    if order >= 2:
+        cross = np.einsum('ip,jp->ijp', a.grad, b.grad)
+        hess = a.val * b.hess + b.val * a.hess + cross + cross.transpose(1, 0, 2)
+    return Jet(a.val * b.val, grad, hess)
+
+
+def _power(u, p, order):
+    # Potencia constante u**p con derivadas p u^(p-1) y p (p-1) u^(p-2)
+    if p == int(p):
+        p = int(p)
+    return _chain(
+        u,
+        lambda v: np.power(v, p),
+        lambda v: p * np.power(v, p - 1),
+        lambda v: p * (p - 1) * np.power(v, p - 2) if p not in (0, 1) else np.zeros_like(v),
+        order,
+    )
+
+
+def _evaluate(node, env, memo, n_vars, n_points, order):
+    cached = memo.get(node)
+    if cached is not None:
+        return cached
+
+    if node in env:
+        jet = env[node]
+    elif node.is_Number or node.is_NumberSymbol:
+        jet = _constant(float(node), n_vars, n_points, order)
+    elif node.is_Add:
+        terms = [_evaluate(arg, env, memo, n_vars, n_points, order) for arg in node.args]
+        jet = terms[0]
+        for term in terms[1:]:
+            jet = _add(jet, term, order)
+    elif node.is_Mul:
+        factors = [_evaluate(arg, env, memo, n_vars, n_points, order) for arg in node.args]
+        jet = factors[0]
+        for factor in factors[1:]:
+            jet = _mul(jet, factor, order)
+    elif node.is_Pow:
+        base, exponent = node.args
+        if exponent.is_Number:
+            jet = _power(_evaluate(base, env, memo, n_vars, n_points, order), float(exponent), order)
+        else:
+            # Exponente variable: u**v = exp(v log u)
+            jet = _evaluate(sp.exp(exponent * sp.log(base), evaluate=False), env, memo, n_vars, n_points, order)
+    elif isinstance(node, sp.Function) and len(node.args) == 1:
+        u = _evaluate(node.args[0], env, memo, n_vars, n_points, order)
+        g, g1, g2 = _unary_rules(node.func)
+        jet = _chain(u, g, g1, g2, order)
+    else:
+        raise ValueError(f"Unsupported node for automatic differentiation: {node.func.__name__}")
+
+    memo[node] = jet
+    return jet
+
+
+def evaluate_jets(expr, variables, points, order=2):
+    """
+    Evaluate f, ∇f and (for order=2) the Hessian of a SymPy expression at many points.
+
+    points has shape (P, n) for the n variables. Returns (values, gradients, hessians)
+    with shapes (P,), (P, n) and (P, n, n); hessians is None when order=1. Points outside
+    the domain produce NaN/inf entries instead of raising.
+    """
+    variables = tuple(variables)
+    pts = np.atleast_2d(np.asarray(points, dtype=float))
+    n_points, n_vars = pts.shape
+    if n_vars != len(variables):
+        raise ValueError(f"Expected points with {len(variables)} coordinates")
+
+    env = {}
+    for i, v in enumerate(variables):
+        grad = np.zeros((n_vars, n_points))
+        grad[i] = 1.0
+        hess = np.zeros((n_vars, n_vars, n_points)) if order >= 2 else None
+        env[v] = Jet(pts[:, i].copy(), grad, hess)
+
+    with np.errstate(all="ignore"):
+        jet = _evaluate(expr, env, {}, n_vars, n_points, order)
+
+    values = np.array(jet.val, dtype=float)
+    gradients = np.array(np.moveaxis(jet.grad, -1, 0))
+    hessians = np.array(np.moveaxis(jet.hess, -1, 0)) if order >= 2 else None
+    # Fuera del dominio (p. ej. log de un negativo) las derivadas tampoco tienen sentido
+    outside = ~np.isfinite(values)
+    gradients[outside] = np.nan
+    if hessians is not None:
+        hessians[outside] = np.nan
+    return values, gradients, hessians
+
+
+def newton_critical_points(expr, variables, seeds, iterations=50, tol=1e-10, max_distance=10.0):
+    """
+    Solve ∇f = 0 with Newton's method from every seed at once, using AD gradients and Hessians.
+
+    Iterates that wander farther than max_distance from their seed are dropped.
+    Returns the distinct converged points as a list of tuples.
+    """
+    seeds = np.atleast_2d(np.asarray(seeds, dtype=float))
+    pts = seeds.copy()
+    active = np.ones(len(pts), dtype=bool)
+    converged = np.zeros(len(pts), dtype=bool)
+    for _ in range(iterations):
+        if not active.any():
+            break
+        _, grads, hess = evaluate_jets(expr, variables, pts[active])
+        idx = np.flatnonzero(active)
+        for k, i in enumerate(idx):
+            g, H = grads[k], hess[k]
+            if not (np.isfinite(g).all() and np.isfinite(H).all()):
+                active[i] = False
+                continue
+            if np.abs(g).max() <= tol:
+                converged[i] = True
+                active[i] = False
+                continue
+            try:
+                step = np.linalg.solve(H, g)
+            except np.linalg.LinAlgError:
+                active[i] = False
+                continue
+            pts[i] -= step
+            if np.abs(pts[i] - seeds[i]).max() > max_distance:
+                active[i] = False
+                continue
+            if np.abs(step).max() <= tol * (1.0 + np.abs(pts[i]).max()):
+                converged[i] = True
+                active[i] = False
+
+    # Se confirma que el gradiente realmente se anula en los puntos convergidos
+    candidates = pts[converged]
+    if len(candidates):
+        _, grads, _ = evaluate_jets(expr, variables, candidates, order=1)
+        ok = np.isfinite(grads).all(axis=1) & (np.abs(grads).max(axis=1) <= 1e-8)
+        candidates = candidates[ok]
+
+    found = []
+    for p in candidates:
+        if np.isfinite(p).all() and all(np.abs(p - q).max() > 1e-6 for q in found):
+            found.append(p)
+    return [tuple(float(v) for v in p) for p in sorted(found, key=tuple)]
+
+
+# Modo de Taylor truncado: el mismo recorrido del árbol, pero cada subexpresión lleva los
+# coeficientes de su desarrollo de Taylor en (x - x0, y - y0) hasta el orden n, en un solo
+# punto. Sumas y productos operan sobre los coeficientes; una función de una variable g(u) se
+# compone con la serie de u usando g, g', ..., g^(n) en u(x0, y0). El costo crece con el
+# tamaño de la expresión y con n, no con el de las derivadas simbólicas (que a orden 10
+# pueden tener millones de nodos).
+
+# Derivadas sucesivas de cada función de una variable, compiladas bajo demanda
+_series_cache = {}
+# Cocientes que se propagan como tales: las derivadas décimas de sec o sech tardan segundos
+# en construirse y las de sin, cos, sinh y cosh son inmediatas
+_QUOTIENTS = {
+    sp.tan: (sp.sin, sp.cos), sp.cot: (sp.cos, sp.sin),
+    sp.sec: (None, sp.cos), sp.csc: (None, sp.sin),
+    sp.tanh: (sp.sinh, sp.cosh), sp.coth: (sp.cosh, sp.sinh),
+    sp.sech: (None, sp.cosh), sp.csch: (None, sp.sinh),
+}
+
+
+def _real(value):
+    # Fuera del dominio real lambdify puede devolver un complejo: se trata como indefinido
+    value = complex(value)
+    return value.real if value.imag == 0 else np.nan
+
+
+def _unary_derivatives(func, order):
+    with _unary_lock:
+        rules = _series_cache.get(func)
+    if rules is None or len(rules) <= order:
+        exprs = [func(_t)]
+        for _ in range(order):
+            # Como en _unary_rules, las deltas de Dirac de abs(t) se toman como 0
+            exprs.append(sp.diff(exprs[-1], _t).replace(sp.DiracDelta, lambda *args: sp.S.Zero))
+        rules = [sp.lambdify(_t, e, modules=["numpy"]) for e in exprs]
+        with _unary_lock:
+            _series_cache[func] = rules
+    return rules
+
+
+def _series_mul(a, b, order):
+    # Producto truncado: convolución de los coeficientes con a + b <= order
+    out = np.zeros_like(a)
+    for i in range(order + 1):
+        for j in range(order + 1 - i):
+            if a[i, j] != 0:
+                out[i:, j:] += a[i, j] * b[:order + 1 - i, :order + 1 - j]
+    return out * _series_mask(order)
+
+
+def _series_mask(order):
+    idx = np.arange(order + 1)
+    return (idx[:, None] + idx[None, :] <= order).astype(float)
+
+
+def _series_compose(u, derivatives, order):
+    # g(u0 + h) = Σ g^(k)(u0) h^k / k!, con h la parte de u sin término constante
+    u0 = u[0, 0]
+    out = np.zeros_like(u)
+    out[0, 0] = _real(derivatives[0](u0))
+    h = u.copy()
+    h[0, 0] = 0.0
+    if not h.any():
+        return out
+    power, factorial = h, 1.0
+    for k in range(1, order + 1):
+        factorial *= k
+        # Solo donde h^k tiene término: una derivada infinita (sqrt en 0) no debe contaminar
+        # los órdenes bajos con inf·0
+        out += np.where(power != 0, _real(derivatives[k](u0)) / factorial * power, 0.0)
+        if k < order:
+            power = _series_mul(power, h, order)
+    return out
+
+
+def _series_power(u, p, order):
+    if p == int(p) and p >= 0:
+        # Potencia entera no negativa: productos, exacta también donde u0 = 0
+        p = int(p)
+        out = np.zeros_like(u)
+        out[0, 0] = 1.0
+        base = u
+        while p:
+            if p & 1:
+                out = _series_mul(out, base, order)
+            p >>= 1
+            if p:
+                base = _series_mul(base, base, order)
+        return out
+    # (u0 + h)^p: la k-ésima derivada es p (p-1) ... (p-k+1) u0^(p-k)
+    u0 = u[0, 0]
+    derivatives = []
+    for k in range(order + 1):
+        falling = float(np.prod([p - i for i in range(k)])) if k else 1.0
+        derivatives.append(lambda v, c=falling, e=p - k: c * np.power(v, e) if c != 0 else 0.0)
+    return _series_compose(u, derivatives, order)
+
+
+def _series_evaluate(node, env, memo, order):
+    cached = memo.get(node)
+    if cached is not None:
+        return cached
+
+    if node in env:
+        series = env[node]
+    elif node.is_Number or node.is_NumberSymbol:
+        series = np.zeros((order + 1, order + 1))
+        series[0, 0] = float(node)
+    elif node.is_Add:
+        series = sum(_series_evaluate(arg, env, memo, order) for arg in node.args)
+    elif node.is_Mul:
+        factors = [_series_evaluate(arg, env, memo, order) for arg in node.args]
+        series = factors[0]
+        for factor in factors[1:]:
+            series = _series_mul(series, factor, order)
+    elif node.is_Pow:
+        base, exponent = node.args
+        if exponent.is_Number:
+            series = _series_power(_series_evaluate(base, env, memo, order), float(exponent), order)
+        else:
+            # Exponente variable: u**v = exp(v log u)
+            series = _series_evaluate(sp.exp(exponent * sp.log(base), evaluate=False), env, memo, order)
+    elif node.func in _QUOTIENTS:
+        numerator, denominator = _QUOTIENTS[node.func]
+        arg = node.args[0]
+        series = _series_power(_series_evaluate(denominator(arg), env, memo, order), -1.0, order)
+        if numerator is not None:
+            series = _series_mul(_series_evaluate(numerator(arg), env, memo, order), series, order)
+    elif isinstance(node, sp.Function) and len(node.args) == 1:
+        u = _series_evaluate(node.args[0], env, memo, order)
+        series = _series_compose(u, _unary_derivatives(node.func, order), order)
+    else:
+        raise ValueError(f"Unsupported node for automatic differentiation: {node.func.__name__}")
+
+    memo[node] = series
+    return series
+
+
+def taylor_coefficients(expr, variables, point, order):
+    """
+    Taylor coefficients of a two-variable SymPy expression around point, up to total order.
+
+    Returns an (order+1, order+1) array c where c[a, b] = ∂^(a+b) f / ∂x^a ∂y^b / (a! b!)
+    at point, for the variables (x, y) given, and 0 for a + b > order. Entries are NaN or
+    inf where a derivative is not defined at the point.
+    """
+    vx, vy = variables
+    env = {}
+    for v, value, (i, j) in ((vx, point[0], (1, 0)), (vy, point[1], (0, 1))):
+        series = np.zeros((order + 1, order + 1))
+        series[0, 0] = float(value)
+        if order >= 1:
+            series[i, j] = 1.0
+        env[v] = series
+    with np.errstate(all="ignore"):
+        return _series_evaluate(expr, env, {}, order)
@@ -0,0 +1,321 @@
+import math
+
+import numpy as np
+import sympy as sp
+
+from backend.autodiff import newton_critical_points
+from backend.evaluator import compile_expression, compile_kernel, x, y
+from backend.expression_parser import parse_number
+
+# Extremos absolutos de f(x,y) en una región cerrada y acotada (rectángulo, disco o triángulo).
+# Candidatos: puntos críticos interiores, puntos críticos de f restringida a cada borde y las
+# esquinas. Cada borde se parametriza como (X(t), Y(t)) y g'(t) = fx·X' + fy·Y' se evalúa en
+# todos los bordes a la vez; los cambios de signo se refinan con bisección vectorizada (un lote
+# de problemas 1-D). Un muestreo denso de la región certifica que ningún punto supera la respuesta.
+
+REGION_TYPES = ("rectangle", "disk", "triangle")
+# Muestras por borde para localizar los cambios de signo de g'(t)
+EDGE_SAMPLES = 2049
+BISECTION_STEPS = 60
+# Lado de la rejilla del certificado (sobre el rectángulo que contiene la región)
+CERTIFICATE_GRID = 201
+# Puntos a menos de esta distancia (fracción de la diagonal) se consideran el mismo candidato
+DEDUP_FRACTION = 1e-7
+
+
+def _number(value, name):
+    v = float(sp.N(parse_number(value)))
+    if not math.isfinite(v):
+        raise ValueError(f"{name} must be finite")
+    return v
+
+
+def _pair(value, name):
+    if not isinstance(value, (list, tuple)) or len(value) != 2:
+        raise ValueError(f"{name} must be a pair")
+    return tuple(_number(v, name) for v in value)
+
+
+class Region:
+    """
+    Closed bounded region: bounding box, corners, boundary parametrization and membership test.
+
+    The boundary is a list of segments (P0, P1) for t in [0, 1], or one circle (center,
+    radius) for t in [0, 2π].
+    """
+
+    def __init__(self, kind, spec, corners=(), segments=(), circle=None):
+        self.kind = kind
+        self.spec = spec
+        self.corners = list(corners)
+        self.segments = list(segments)
+        self.circle = circle
+        if circle is not None:
+            (h, k), r = circle
+            self.bbox = ((h - r, h + r), (k - r, k + r))
+        else:
+            xs = [p[0] for p in self.corners]
+            ys = [p[1] for p in self.corners]
+            self.bbox = ((min(xs), max(xs)), (min(ys), max(ys)))
+
+    @property
+    def diagonal(self):
+        (ax, bx), (ay, by) = self.bbox
+        return math.hypot(bx - ax, by - ay)
+
+    def contains(self, X, Y, tol=0.0):
+        """
+        Vectorized membership test (boundary included, widened by tol).
+        """
+        X, Y = np.asarray(X, dtype=float), np.asarray(Y, dtype=float)
+        if self.circle is not None:
+            (h, k), r = self.circle
+            return (X - h) ** 2 + (Y - k) ** 2 <= (r + tol) ** 2
+        if self.kind == "rectangle":
+            (ax, bx), (ay, by) = self.bbox
+            return (X >= ax - tol) & (X <= bx + tol) & (Y >= ay - tol) & (Y <= by + tol)
+        # Triángulo: el punto queda del mismo lado de las tres aristas (vértices en sentido antihorario)
+        inside = np.ones(np.broadcast(X, Y).shape, dtype=bool)
+        for (x0, y0), (x1, y1) in self.segments:
+            length = math.hypot(x1 - x0, y1 - y0)
+            inside &= ((x1 - x0) * (Y - y0) - (y1 - y0) * (X - x0)) / length >= -tol
+        return inside
+
+    def boundary(self, edges, t):
+        """
+        Boundary points and tangents (X, Y, dX, dY) at parameters t of the given edges.
+
+        edges and t are broadcast against each other, e.g. edges (E, 1) with t (E, K).
+        """
+        t = np.asarray(t, dtype=float)
+        if self.circle is not None:
+            (h, k), r = self.circle
+            return h + r * np.cos(t), k + r * np.sin(t), -r * np.sin(t), r * np.cos(t)
+        starts = np.array([s[0] for s in self.segments])[edges]
+        directions = np.array([(s[1][0] - s[0][0], s[1][1] - s[0][1]) for s in self.segments])[edges]
+        zero = np.zeros_like(t)
+        return (starts[..., 0] + t * directions[..., 0], starts[..., 1] + t * directions[..., 1],
+                directions[..., 0] + zero, directions[..., 1] + zero)
+
+    def samples(self, k=EDGE_SAMPLES):
+        """
+        Edge indices (E, 1) and a uniform parameter grid (E, k) covering the whole boundary.
+        """
+        edges = np.arange(self.edge_count)[:, None]
+        return edges, np.broadcast_to(np.linspace(0.0, self.t_max, k), (self.edge_count, k))
+
+    @property
+    def t_max(self):
+        return 2.0 * math.pi if self.circle is not None else 1.0
+
+    @property
+    def edge_count(self):
+        return 1 if self.circle is not None else len(self.segments)
+
+
+def parse_region(spec):
+    """
+    Build a Region from a request dict; raises ValueError for invalid input.
+
+    {"type": "rectangle", "x_limits": [a, b], "y_limits": [c, d]}
+    {"type": "disk", "center": [h, k], "radius": r}
+    {"type": "triangle", "vertices": [[x1, y1], [x2, y2], [x3, y3]]}
+    """
+    if not isinstance(spec, dict):
+        raise ValueError("region must be an object")
+    kind = spec.get("type")
+    if kind == "rectangle":
+        ax, bx = _pair(spec.get("x_limits"), "x_limits")
+        ay, by = _pair(spec.get("y_limits"), "y_limits")
+        if not (ax < bx and ay < by):
+            raise ValueError("rectangle limits must satisfy a < b and c < d")
+        corners = [(ax, ay), (bx, ay), (bx, by), (ax, by)]
+        segments = list(zip(corners, corners[1:] + corners[:1]))
+        return Region(kind, {"type": kind, "x_limits": [ax, bx], "y_limits": [ay, by]}, corners, segments)
+    if kind == "disk":
+        h, k = _pair(spec.get("center", [0, 0]), "center")
+        r = _number(spec.get("radius"), "radius")
+        if not r > 0:
+            raise ValueError("radius must be positive")
+        return Region(kind, {"type": kind, "center": [h, k], "radius": r}, circle=((h, k), r))
+    if kind == "triangle":
+        vertices = spec.get("vertices")
+        if not isinstance(vertices, (list, tuple)) or len(vertices) != 3:
+            raise ValueError("vertices must be three [x, y] pairs")
+        corners = [_pair(v, "vertices") for v in vertices]
+        (x1, y1), (x2, y2), (x3, y3) = corners
+        area2 = (x2 - x1) * (y3 - y1) - (x3 - x1) * (y2 - y1)
+        if abs(area2) <= 1e-12:
+            raise ValueError("triangle vertices must not be collinear")
+        if area2 < 0:
+            # Orden antihorario para la prueba de pertenencia
+            corners = [corners[0], corners[2], corners[1]]
+        segments = list(zip(corners, corners[1:] + corners[:1]))
+        return Region(kind, {"type": kind, "vertices": [list(c) for c in corners]}, corners, segments)
+    raise ValueError(f"region.type must be one of {', '.join(REGION_TYPES)}")
+
+
+def _edge_critical_points(a, region):
+    """
+    Parameters where f restricted to each boundary edge has g'(t) = 0, solved for all edges at once.
+
+    Returns a list of (edge index, t).
+    """
+    try:
+        grad = compile_kernel((a.fx, a.fy))
+    except Exception:
+        # ∇f sin forma imprimible para NumPy (p. ej. |x|): diferencias centrales de g sobre el borde
+        grad = None
+        F = compile_expression(a.f)
+        h = 1e-6 * region.t_max
+
+    def derivative(edges, t):
+        # g'(t) = fx·X'(t) + fy·Y'(t) para pares (borde, t) arbitrarios
+        if grad is None:
+            X1, Y1, _, _ = region.boundary(edges, t + h)
+            X0, Y0, _, _ = region.boundary(edges, t - h)
+            return (F(X1, Y1) - F(X0, Y0)) / (2 * h)
+        X, Y, dX, dY = region.boundary(edges, t)
+        fx, fy = grad(X, Y)
+        return fx * dX + fy * dY
+
+    # Muestreo de g'(t) en todos los bordes a la vez: arreglos (E, K)
+    edges, T = region.samples()
+    with np.errstate(all="ignore"):
+        G = derivative(edges, T) * np.ones(T.shape)
+    # En un borde donde f es constante (g' ≡ 0) no se buscan raíces: basta un punto del borde
+    # (t = 0), que en un círculo no coincide con ninguna esquina
+    constant = (G == 0.0).all(axis=1)
+    G[constant] = np.nan
+
+    roots = [(int(e), 0.0) for e in np.nonzero(constant)[0]]
+    roots.extend((int(e), float(T[e, k])) for e, k in zip(*np.nonzero(G == 0.0)))
+    # Cambios de signo estrictos: un lote de intervalos [lo, hi] refinados a la vez por bisección
+    rows, ks = np.nonzero(G[:, :-1] * G[:, 1:] < 0)
+    if len(rows):
+        lo, hi = T[rows, ks].copy(), T[rows, ks + 1].copy()
+        g_lo = G[rows, ks]
+        with np.errstate(all="ignore"):
+            for _ in range(BISECTION_STEPS):
+                mid = 0.5 * (lo + hi)
+                g_mid = derivative(rows, mid) * np.ones(mid.shape)
+                left = np.sign(g_mid) == np.sign(g_lo)
+                lo = np.where(left, mid, lo)
+                g_lo = np.where(left, g_mid, g_lo)
+                hi = np.where(left, hi, mid)
+        roots.extend((int(e), float(t)) for e, t in zip(rows, 0.5 * (lo + hi)))
+    return roots
+
+
+def _interior_points(a, region, optimization):
+    # Puntos críticos de /optimize dentro de la región; con el método numérico se añaden
+    # semillas de Newton repartidas en la región (las de /optimize cubren solo [-2, 2]²)
+    points = [(c["x"], c["y"]) for c in optimization.get("critical_points", [])]
+    if optimization.get("solver") == "numeric":
+        (ax, bx), (ay, by) = region.bbox
+        gx, gy = np.meshgrid(np.linspace(ax, bx, 7), np.linspace(ay, by, 7))
+        inside = region.contains(gx, gy)
+        seeds = np.column_stack([gx[inside], gy[inside]])
+        if len(seeds):
+            points.extend(newton_critical_points(a.f, (x, y), seeds, max_distance=region.diagonal))
+    # Solo puntos estrictamente interiores: los del borde los encuentra el análisis de bordes
+    return [p for p in points if region.contains(p[0], p[1], tol=-1e-9 * max(1.0, region.diagonal))]
+
+
+def _certificate(F, region, best_max, best_min):
+    """
+    Dense vectorized sampling of f over the region and its boundary.
+
+    Certified when no sample exceeds the maximum or falls below the minimum found analytically
+    (up to a relative tolerance). Also returns the extreme samples so the caller can fall back.
+    """
+    (ax, bx), (ay, by) = region.bbox
+    gx, gy = np.meshgrid(np.linspace(ax, bx, CERTIFICATE_GRID), np.linspace(ay, by, CERTIFICATE_GRID))
+    inside = region.contains(gx, gy)
+    bX, bY, _, _ = region.boundary(*region.samples())
+    X = np.concatenate([gx[inside], bX.ravel()])
+    Y = np.concatenate([gy[inside], bY.ravel()])
+    with np.errstate(all="ignore"):
+        values = np.asarray(F(X, Y), dtype=float) * np.ones_like(X)
+    finite = np.isfinite(values)
+    result = {"samples": int(len(X)), "undefined_samples": int((~finite).sum())}
+    if not finite.any():
+        return {**result, "certified": False}, None, None
+    X, Y, values = X[finite], Y[finite], values[finite]
+    i_max, i_min = int(np.argmax(values)), int(np.argmin(values))
+    sample_max = (float(X[i_max]), float(Y[i_max]), float(values[i_max]))
+    sample_min = (float(X[i_min]), float(Y[i_min]), float(values[i_min]))
+    tol = 1e-9 * max(1.0, abs(sample_max[2]), abs(sample_min[2]))
+    certified = (
+        best_max is not None and best_min is not None and result["undefined_samples"] == 0
+        and sample_max[2] <= best_max + tol and sample_min[2] >= best_min - tol
+    )
+    result.update({
+        "sampled_max": sample_max[2],
+        "sampled_min": sample_min[2],
+        "tolerance": tol,
+        "certified": bool(certified),
+    })
+    return result, sample_max, sample_min
+
+
+def absolute_extrema(a, region, optimization):
+    """
+    Absolute maximum and minimum of f over a closed bounded Region.
+
+    a is the request's ExpressionAnalysis and optimization the result of
+    calculate_unconstrained_optimization(a) (its critical points are the interior candidates).
+    Every candidate is reported with its source (interior, edge or corner); the dense-sampling
+    certificate says whether the analytic answer was confirmed. If sampling finds a better
+    point (for example where f is not differentiable) that point is reported instead, with
+    source "sampling" and certified false.
+    """
+    F = compile_expression(a.f)
+    # Las esquinas van primero para que un punto crítico de borde en una esquina se informe como esquina
+    points = [(cx, cy, "corner", None) for cx, cy in region.corners]
+    if not region.corners:
+        # Un círculo no tiene esquinas: un punto del borde asegura al menos un candidato en él
+        X, Y, _, _ = region.boundary(0, 0.0)
+        points.append((float(X), float(Y), "edge", 0))
+    points.extend((px, py, "interior", None) for px, py in _interior_points(a, region, optimization))
+    for edge, t in _edge_critical_points(a, region):
+        X, Y, _, _ = region.boundary(edge, t)
+        points.append((float(X), float(Y), "edge", edge))
+
+    # Evaluación de todos los candidatos de una vez; se descartan duplicados y puntos indefinidos
+    candidates = []
+    if points:
+        with np.errstate(all="ignore"):
+            values = np.asarray(F(np.array([p[0] for p in points]), np.array([p[1] for p in points])), dtype=float)
+        values = values * np.ones(len(points))
+        radius = DEDUP_FRACTION * max(1.0, region.diagonal)
+        for (px, py, source, edge), fv in zip(points, values):
+            if not math.isfinite(fv):
+                continue
+            if any(math.hypot(px - c["x"], py - c["y"]) <= radius for c in candidates):
+                continue
+            # Ruido de redondeo de la parametrización (p. ej. cos(π/2) ≈ 6e-17) se lleva a 0
+            px, py = (0.0 if abs(v) <= radius else v for v in (px, py))
+            candidate = {"x": px, "y": py, "f": float(fv), "source": source}
+            if edge is not None:
+                candidate["edge"] = edge
+            candidates.append(candidate)
+
+    best_max = max(candidates, key=lambda c: c["f"]) if candidates else None
+    best_min = min(candidates, key=lambda c: c["f"]) if candidates else None
+    certificate, sample_max, sample_min = _certificate(
+        F, region, best_max["f"] if best_max else None, best_min["f"] if best_min else None,
+    )
+    # Si el muestreo supera a los candidatos analíticos, se informa el punto muestreado
+    if sample_max is not None and (best_max is None or sample_max[2] > best_max["f"] + certificate["tolerance"]):
+        best_max = {"x": sample_max[0], "y": sample_max[1], "f": sample_max[2], "source": "sampling"}
+    if sample_min is not None and (best_min is None or sample_min[2] < best_min["f"] - certificate["tolerance"]):
+        best_min = {"x": sample_min[0], "y": sample_min[1], "f": sample_min[2], "source": "sampling"}
+
+    return {
+        "region": region.spec,
+        "absolute_max": best_max,
+        "absolute_min": best_min,
+        "candidates": candidates,
+        "certificate": certificate,
+    }
@@ -0,0 +1,106 @@
+"""
+Build the precomputed answer pack for the common-exercise corpus.
+
+Usage:
+    python backend/build_answer_pack.py [--corpus backend/exercises.jsonl] [--out backend/answer_pack.bin]
+
+Each corpus line is a JSON object. Lines with "path" and "body" (the format of
+benchmarks/corpus/traffic.jsonl) are sent as they are; lines with only request fields
+({"expression", "constraint", "x_limits", "y_limits"}) are sent to every packed route that
+accepts them (/lagrange needs a constraint, /double-integral both limits). Requests run
+through the real app with Flask's test client, so the stored bytes are exactly what the
+route returns, with the planner's default strategy order (no learned timings); only
+cacheable 200 responses are kept. The pack carries a version stamp (engine version and
+backend source fingerprint) and the server ignores it after any code change until it is
+rebuilt.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from backend.answer_pack import ANSWER_PACK_PATH, PACK_ENDPOINTS, pack_key, version_stamp, write_pack  # noqa: E402
+
+DEFAULT_CORPUS = os.path.join(BASE_DIR, "backend", "exercises.jsonl")
+
+
+def expand(entry):
+    """
+    Requests (path, body) for one corpus line.
+    """
+    if "path" in entry:
+        return [(entry["path"], entry.get("body") or {})]
+    body = {k: v for k, v in entry.items() if k != "weight"}
+    if "expression" not in body:
+        return []
+    requests = []
+    for path in PACK_ENDPOINTS.values():
+        if path == "/lagrange":
+            if "constraint" in body:
+                requests.append((path, body))
+            continue
+        plain = {k: v for k, v in body.items() if k != "constraint"}
+        if path == "/double-integral":
+            # Solo integrales definidas: la antiderivada doble de cualquier f puede no terminar
+            if "x_limits" not in plain or "y_limits" not in plain:
+                continue
+        else:
+            plain = {k: v for k, v in plain.items() if k not in ("x_limits", "y_limits")}
+        requests.append((path, plain))
+    return requests
+
+
+def build(corpus, out):
+    from backend.app import create_app
+    from backend.planner import planner
+
+    app = create_app()
+    # Se calcula todo de verdad: sin el paquete anterior y sin registro de acceso
+    app.extensions["answer_pack"] = None
+    logging.getLogger().setLevel(logging.ERROR)
+    client = app.test_client()
+    endpoints = set(PACK_ENDPOINTS.values())
+
+    answers, failed = {}, 0
+    started = time.perf_counter()
+    with open(corpus, encoding="utf-8") as fh:
+        entries = [json.loads(line) for line in fh if line.strip()]
+    for entry in entries:
+        for path, body in expand(entry):
+            if path not in endpoints:
+                continue
+            key = pack_key(path, body)
+            if key is None or key in answers:
+                continue
+            # Cada respuesta se calcula con el orden por defecto del planificador, sin historial
+            planner.stats.clear()
+            response = client.post(path, json=body)
+            if response.status_code == 200 and "no-store" not in response.headers.get("Cache-Control", ""):
+                answers[key] = response.get_data()
+            else:
+                failed += 1
+                reason = f"HTTP {response.status_code}" if response.status_code != 200 else "not cacheable"
+                print(f"skip {path} {json.dumps(body)}: {reason}")
+    meta = {"built": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()), "corpus": os.path.basename(corpus)}
+    write_pack(out, answers, version_stamp(), meta)
+    size = os.path.getsize(out)
+    print(f"{len(answers)} answers ({failed} skipped) -> {out} ({size / 1024:.1f} KiB) "
+          f"in {time.perf_counter() - started:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS)
+    parser.add_argument("--out", default=ANSWER_PACK_PATH)
+    args = parser.parse_args()
+    build(args.corpus, args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+"""
+Build the static frontend into frontend/dist: minified, content-hashed and precompressed.
+
+Usage:
+    python backend/build_assets.py [--src frontend] [--out frontend/dist]
+
+CSS and JavaScript are minified and renamed to name.<hash>.ext; the HTML pages keep
+their names and their references are rewritten to the hashed files, as are the quoted
+asset names inside scripts (new Worker("grid-worker.js"), importScripts(...)). Every output gets a
+.gz sibling (and .br when the optional brotli package is installed). manifest.json maps
+each original name to its built file and the encodings available, and is read by
+backend/assets.py to serve the files without any per-request work.
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depende del entorno
+    brotli = None
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_SRC = os.path.join(BASE_DIR, "frontend")
+DEFAULT_OUT = os.path.join(DEFAULT_SRC, "dist")
+
+MANIFEST_NAME = "manifest.json"
+HASHED_EXTENSIONS = (".css", ".js")
+PAGE_EXTENSIONS = (".html",)
+HASH_LENGTH = 10
+
+# Palabras clave tras las cuales "/" inicia una expresión regular y no una división
+_REGEX_KEYWORDS = {"return", "typeof", "case", "do", "else", "in", "of", "void", "yield", "await", "delete", "new", "throw"}
+_REGEX_PRECEDERS = set("(,=:[!&|?{};+-*%<>~^")
+_IDENT_RE = re.compile(r"[A-Za-z_$][\w$]*")
+_CSS_STRING_RE = re.compile(r"""("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')""")
+
+
+def minify_css(text):
+    """
+    Remove comments and redundant whitespace from a stylesheet.
+    """
+    text = re.sub(r"/\*.*?\*/", "", text, flags=re.S)
+    # Las cadenas entre comillas (url(...), content: "...") se conservan tal cual
+    parts = _CSS_STRING_RE.split(text)
+    for k in range(0, len(parts), 2):
+        chunk = re.sub(r"\s+", " ", parts[k])
+        chunk = re.sub(r"\s*([{};,])\s*", r"\1", chunk)
+        parts[k] = chunk.replace(";}", "}")
+    return "".join(parts).strip()
+
+
+def minify_js(text):
+    """
+    Conservative JavaScript minifier.
+
+    Comments, indentation, trailing spaces and blank lines are removed while strings,
+    template literals (including nested ${...}) and regular expressions are copied
+    verbatim. Line breaks are kept so automatic semicolon insertion is unaffected.
+    """
+    out = []
+    i, n = 0, len(text)
+    # Cada marco corresponde a un ${...} abierto dentro de una plantilla: profundidad de llaves
+    templates = []
+    last = ""        # último carácter significativo emitido fuera de cadenas
+    last_word = ""   # última palabra emitida (para detectar "return /re/")
+
+    def copy_template(i):
+        # Copia el contenido de una plantilla hasta el cierre "`" o hasta un "${"
+        while i < n:
+            c = text[i]
+            if c == "\\":
+                out.append(text[i:i + 2])
+                i += 2
+            elif c == "`":
+                out.append(c)
+                return i + 1, False
+            elif c == "$" and text.startswith("${", i):
+                out.append("${")
+                templates.append(0)
+                return i + 2, True
+            else:
+                out.append(c)
+                i += 1
+        return i, False
+
+    def emit_space():
+        if out and out[-1] not in (" ", "\n"):
+            out.append(" ")
+
+    while i < n:
+        c = text[i]
+        if c in "\"'":
+            j = i + 1
+            while j < n and text[j] != c:
+                j += 2 if text[j] == "\\" else 1
+            out.append(text[i:j + 1])
+            i = j + 1
+            last, last_word = c, ""
+        elif c == "`":
+            out.append(c)
+            i, _ = copy_template(i + 1)
+            last, last_word = "`", ""
+        elif c == "/" and text.startswith("//", i):
+            while i < n and text[i] != "\n":
+                i += 1
+        elif c == "/" and text.startswith("/*", i):
+            end = text.find("*/", i + 2)
+            i = n if end < 0 else end + 2
+            emit_space()
+        elif c == "/" and (last in _REGEX_PRECEDERS or last == "" or last_word in _REGEX_KEYWORDS):
+            # Literal de expresión regular: se copia hasta la "/" final (fuera de clases [...])
+            j, in_class = i + 1, False
+            while j < n and text[j] != "\n":
+                if text[j] == "\\":
+                    j += 2
+                    continue
+                if text[j] == "[":
+                    in_class = True
+                elif text[j] == "]":
+                    in_class = False
+                elif text[j] == "/" and not in_class:
+                    break
+                j += 1
+            j += 1
+            while j < n and (text[j].isalnum() or text[j] == "_"):
+                j += 1
+            out.append(text[i:j])
+            i = j
+            last, last_word = "/", ""
+        elif c == "\n":
+            while out and out[-1] == " ":
+                out.pop()
+            if out and out[-1] != "\n":
+                out.append("\n")
+            i += 1
+        elif c in " \t\r":
+            if out and out[-1] != "\n":
+                emit_space()
+            i += 1
+        elif templates and c == "}" and templates[-1] == 0:
+            # Cierre de ${...}: se vuelve al texto de la plantilla
+            templates.pop()
+            out.append(c)
+            i, _ = copy_template(i + 1)
+            last, last_word = "`", ""
+        else:
+            if templates:
+                if c == "{":
+                    templates[-1] += 1
+                elif c == "}":
+                    templates[-1] -= 1
+            m = _IDENT_RE.match(text, i)
+            if m:
+                out.append(m.group())
+                last, last_word = m.group()[-1], m.group()
+                i = m.end()
+            else:
+                out.append(c)
+                last, last_word = c, ""
+                i += 1
+
+    while out and out[-1] in (" ", "\n"):
+        out.pop()
+    return "".join(out) + "\n"
+
+
+def _content_hash(data):
+    return hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+
+
+def _write_variants(path, data):
+    """
+    Write data plus its precompressed siblings and return the encodings produced.
+    """
+    with open(path, "wb") as fh:
+        fh.write(data)
+    encodings = []
+    with open(path + ".gz", "wb") as fh:
+        fh.write(gzip.compress(data, compresslevel=9, mtime=0))
+    encodings.append("gzip")
+    if brotli is not None:
+        with open(path + ".br", "wb") as fh:
+            fh.write(brotli.compress(data, quality=11))
+        encodings.append("br")
+    return encodings
+
+
+def _quoted_names_re(names):
+    # "nombre.js" o 'nombre.js' como literal completo dentro de un script
+    return re.compile(r"""(["'])(%s)\1""" % "|".join(re.escape(n) for n in sorted(names, key=len, reverse=True)))
+
+
+def _build_order(sources):
+    """
+    Order the scripts so every file comes after the assets it names in a quoted literal.
+
+    A script's hash must cover the hashed names it points to (grid-pool.js names
+    grid-worker.js, which names grid-compiler.js), so those are built first. Raises
+    ValueError on a cycle.
+    """
+    pending = dict(sources)
+    order = []
+    while pending:
+        names_re = _quoted_names_re(pending)
+        ready = sorted(name for name, text in pending.items()
+                       if not name.endswith(".js") or not {m.group(2) for m in names_re.finditer(text)} - {name})
+        if not ready:
+            raise ValueError(f"circular references between assets: {', '.join(sorted(pending))}")
+        for name in ready:
+            order.append(name)
+            del pending[name]
+    return order
+
+
+def build(src=DEFAULT_SRC, out=DEFAULT_OUT):
+    """
+    Build every asset in src into out and return the manifest dict.
+    """
+    if os.path.isdir(out):
+        shutil.rmtree(out)
+    os.makedirs(out)
+
+    manifest = {"files": {}}
+    names = sorted(f for f in os.listdir(src) if os.path.isfile(os.path.join(src, f)))
+
+    # Primero CSS/JS (con hash), después las páginas HTML que los referencian
+    sources = {}
+    for name in names:
+        if os.path.splitext(name)[1] in HASHED_EXTENSIONS:
+            with open(os.path.join(src, name), encoding="utf-8") as fh:
+                sources[name] = fh.read()
+    for name in _build_order(sources):
+        root, ext = os.path.splitext(name)
+        text = sources[name]
+        if ext == ".js" and manifest["files"]:
+            # Nombres de otros recursos dentro del script (workers, importScripts) -> versión con hash
+            built_refs = {n: entry["path"] for n, entry in manifest["files"].items()}
+            text = _quoted_names_re(built_refs).sub(lambda m: m.group(1) + built_refs[m.group(2)] + m.group(1), text)
+        data = (minify_css(text) if ext == ".css" else minify_js(text)).encode("utf-8")
+        built = f"{root}.{_content_hash(data)}{ext}"
+        encodings = _write_variants(os.path.join(out, built), data)
+        manifest["files"][name] = {"path": built, "immutable": True, "encodings": encodings,
+                                   "size": len(data), "source_size": len(sources[name].encode("utf-8"))}
+
+    refs = {name: entry["path"] for name, entry in manifest["files"].items()}
+    ref_re = re.compile(r'((?:href|src)\s*=\s*")(%s)(")' % "|".join(re.escape(r) for r in refs)) if refs else None
+    for name in names:
+        if os.path.splitext(name)[1] not in PAGE_EXTENSIONS:
+            continue
+        with open(os.path.join(src, name), encoding="utf-8") as fh:
+            text = fh.read()
+        if ref_re is not None:
+            text = ref_re.sub(lambda m: m.group(1) + refs[m.group(2)] + m.group(3), text)
+        data = text.encode("utf-8")
+        encodings = _write_variants(os.path.join(out, name), data)
+        manifest["files"][name] = {"path": name, "immutable": False, "encodings": encodings,
+                                   "size": len(data), "source_size": len(data)}
+
+    manifest["version"] = _content_hash(json.dumps(manifest["files"], sort_keys=True).encode("utf-8"))
+    with open(os.path.join(out, MANIFEST_NAME), "w", encoding="utf-8") as fh:
+        json.dump(manifest, fh, indent=2, sort_keys=True)
+    return manifest
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--src", default=DEFAULT_SRC)
+    ap.add_argument("--out", default=DEFAULT_OUT)
+    args = ap.parse_args()
+    manifest = build(args.src, args.out)
+    for name, entry in sorted(manifest["files"].items()):
+        print(f"{name:20s} -> {entry['path']:28s} {entry['source_size']:8d} -> {entry['size']:8d} bytes  {'+'.join(entry['encodings'])}")
+
+
+if __name__ == "__main__":
+    main()
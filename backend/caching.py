@@ -0,0 +1,114 @@
+import hashlib
+import json
+import threading
+
+import sympy as sp
+
+from backend.expression_parser import ExpressionError, parse_expression, parse_number
+
+# Caché HTTP para resultados deterministas: la misma expresión siempre produce la misma
+# respuesta, así que las variantes GET llevan un ETag fuerte derivado de la forma canónica
+# de la consulta y de la versión del motor. Un cambio en el motor invalida todos los ETag.
+
+ENGINE_VERSION = f"2026.10-sympy{sp.__version__}"
+
+# Las respuestas solo cambian con ENGINE_VERSION, por eso se pueden cachear mucho tiempo
+CACHE_CONTROL = "public, max-age=86400"
+
+# Marca por hilo de la solicitud en curso: una parte del cálculo dependió de la carga (un
+# plazo de reloj que se agotó, la carrera entre procesos) y la respuesta no se cachea
+_load_dependent = threading.local()
+
+# Parámetros de lista que en la URL llegan separados por comas
+LIST_PARAMS = ("x_limits", "y_limits", "xlim", "ylim", "fields")
+
+# Campos que determinan la respuesta de cada ruta cacheable
+_NUMERIC_PARAMS = ("x0", "y0")
+_LIMIT_PARAMS = (("xlim", "x_limits"), ("ylim", "y_limits"))
+
+
+def query_payload(args):
+    """
+    Convert GET query arguments into the same dict shape as the JSON body of the POST form.
+    """
+    data = {}
+    for key in args:
+        value = args.get(key)
+        if key in LIST_PARAMS:
+            value = [v.strip() for v in value.split(",") if v.strip()]
+        data[key] = value
+    return data
+
+
+def _canonical_region(value):
+    # Región de /optimize: el tipo se conserva y los números (también en listas) pasan por srepr
+    if isinstance(value, dict):
+        return {str(k): v if k == "type" else _canonical_region(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonical_region(v) for v in value]
+    return sp.srepr(parse_number(value))
+
+
+def canonical_query(path, data):
+    """
+    Canonical, order-independent description of a request to a deterministic route.
+
+    The expression and every numeric argument are parsed and printed with sp.srepr, so
+    "x^2" and "x**2" (or "0.5" and "1/2" written the same way) map to the same key.
+    Returns None when the request cannot be parsed; the route then reports the error.
+    """
+    try:
+        expr = data.get("expression") or data.get("func") or data.get("function")
+        canon = {"path": path, "expression": sp.srepr(parse_expression(expr))}
+        for key in _NUMERIC_PARAMS:
+            if data.get(key) is not None:
+                canon[key] = sp.srepr(parse_number(data[key]))
+        constraint = data.get("constraint")
+        if constraint is not None:
+            canon["constraint"] = sp.srepr(parse_expression(constraint, allow_relations=True))
+        region = data.get("region")
+        if isinstance(region, dict):
+            canon["region"] = _canonical_region(region)
+        for new, old in _LIMIT_PARAMS:
+            limits = data.get(new) or data.get(old)
+            if isinstance(limits, (list, tuple)) and len(limits) == 2:
+                canon[old] = [sp.srepr(parse_number(v)) for v in limits]
+        fields = data.get("fields")
+        if isinstance(fields, (list, tuple)):
+            canon["fields"] = sorted(str(f) for f in fields)
+        compact = data.get("compact")
+        if compact is not None:
+            canon["compact"] = str(compact).lower() in ("1", "true", "yes")
+    except (ExpressionError, TypeError, ValueError):
+        return None
+    return canon
+
+
+def result_etag(path, data):
+    """
+    Strong ETag (without quotes) for a deterministic request, or None if it cannot be canonicalized.
+    """
+    canon = canonical_query(path, data)
+    if canon is None:
+        return None
+    payload = json.dumps([ENGINE_VERSION, canon], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+def reset_load_dependent():
+    """
+    Clear the load-dependence mark at the start of a request.
+    """
+    _load_dependent.flag = False
+
+
+def mark_load_dependent():
+    """
+    Record that the current request's result depends on timing (a wall-clock budget or
+    deadline cut the work short, or parallel workers raced); the response is sent no-store.
+    """
+    _load_dependent.flag = True
+
+
+def is_load_dependent():
+    return getattr(_load_dependent, "flag", False)
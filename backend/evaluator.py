@@ -0,0 +1,136 @@
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import sympy as sp
+
+from backend.memory import register_cache
+
+# Evaluador numérico compilado: convierte expresiones SymPy en funciones NumPy vectorizadas.
+# Se reutiliza entre solicitudes para evitar llamar a lambdify repetidamente.
+
+x, y = sp.symbols('x y')
+
+_CACHE_SIZE = 256
+# Presupuesto aproximado en bytes: cada función compilada guarda su código fuente, el objeto
+# de código y las constantes, que crecen con el tamaño del árbol de la expresión
+_CACHE_BYTES = int(os.environ.get("EVALUATOR_CACHE_BYTES", str(32 << 20)))
+_ENTRY_BYTES = 8192
+_NODE_BYTES = 600
+_cache = OrderedDict()
+_cache_bytes = 0
+_lock = threading.Lock()
+
+
+def _as_float(out, shape):
+    # Comentario: Los resultados complejos se convierten a NaN salvo que la parte imaginaria sea despreciable
+    out = np.asarray(out)
+    if np.iscomplexobj(out):
+        real = np.real(out).astype(float)
+        real[np.abs(np.imag(out)) > 1e-12 * (1.0 + np.abs(real))] = np.nan
+        out = real
+    else:
+        out = out.astype(float)
+    # Las expresiones constantes devuelven un escalar: se expande a la forma de la entrada
+    return np.broadcast_to(out, shape).copy() if out.shape != shape else out
+
+
+def _lambdify(expr, variables):
+    """
+    Build a vectorized NumPy function for expr that always returns a float array.
+    """
+    raw = sp.lambdify(variables, expr, modules=["numpy"])
+
+    def evaluate(*args):
+        # Comentario: Se ignoran advertencias de NumPy (log de negativos, división por cero);
+        # los valores inválidos se reportan como NaN/inf para que el llamador decida.
+        arrays = [np.asarray(a, dtype=float) for a in args]
+        shape = np.broadcast(*arrays).shape if arrays else ()
+        with np.errstate(all="ignore"):
+            out = raw(*arrays)
+        return _as_float(out, shape)
+
+    return evaluate
+
+
+def _lambdify_fused(exprs, variables):
+    """
+    Build one NumPy function returning every expression in exprs as a tuple of float arrays.
+
+    Common subexpressions shared by the whole set are extracted with sp.cse, so each one is
+    computed (and allocated) once per call.
+    """
+    raw = sp.lambdify(variables, list(exprs), modules=["numpy"], cse=True)
+
+    def evaluate(*args):
+        arrays = [np.asarray(a, dtype=float) for a in args]
+        shape = np.broadcast(*arrays).shape if arrays else ()
+        with np.errstate(all="ignore"):
+            outs = raw(*arrays)
+        return tuple(_as_float(out, shape) for out in outs)
+
+    return evaluate
+
+
+def _estimate_bytes(exprs):
+    nodes = sum(1 for e in exprs for _ in sp.preorder_traversal(e))
+    return _ENTRY_BYTES + _NODE_BYTES * nodes
+
+
+def _cached(key, build, exprs):
+    global _cache_bytes
+    with _lock:
+        entry = _cache.get(key)
+        if entry is not None:
+            _cache.move_to_end(key)
+            return entry[0]
+    fn = build()
+    size = _estimate_bytes(exprs)
+    with _lock:
+        previous = _cache.get(key)
+        _cache_bytes += size - (previous[1] if previous else 0)
+        _cache[key] = (fn, size)
+        # Se descartan las menos usadas hasta respetar el número de entradas y el presupuesto de bytes
+        while len(_cache) > 1 and (len(_cache) > _CACHE_SIZE or _cache_bytes > _CACHE_BYTES):
+            _, (_, dropped) = _cache.popitem(last=False)
+            _cache_bytes -= dropped
+    return fn
+
+
+def _cache_stats():
+    with _lock:
+        return {"entries": len(_cache), "bytes": _cache_bytes, "max_entries": _CACHE_SIZE, "max_bytes": _CACHE_BYTES}
+
+
+def _clear_cache():
+    global _cache_bytes
+    with _lock:
+        _cache.clear()
+        _cache_bytes = 0
+
+
+register_cache("evaluator", _cache_stats, _clear_cache)
+
+
+def compile_expression(expr, variables=(x, y)):
+    """
+    Return a cached vectorized evaluator f(*arrays) -> ndarray for a SymPy expression.
+
+    Invalid points (outside the domain, poles) evaluate to NaN or ±inf instead of raising.
+    """
+    variables = tuple(variables)
+    return _cached((expr, variables), lambda: _lambdify(expr, variables), (expr,))
+
+
+def compile_kernel(exprs, variables=(x, y)):
+    """
+    Return a cached fused evaluator k(*arrays) -> tuple of ndarrays for several expressions.
+
+    Intended for an expression together with its derivatives (f, fx, fy, fxx, fyy, fxy),
+    which share most of their subterms. The cache key is the expression tuple itself, so
+    structurally equal derivative sets reuse the same kernel across requests.
+    """
+    exprs = tuple(exprs)
+    variables = tuple(variables)
+    return _cached(("kernel", exprs, variables), lambda: _lambdify_fused(exprs, variables), exprs)
@@ -0,0 +1,299 @@
+import re
+
+import sympy as sp
+
+# Analizador léxico y sintáctico para las expresiones que envía el usuario.
+# Valida la gramática permitida y construye el árbol de SymPy en una sola pasada,
+# sin pasar por sympify/eval de Python.
+
+# Funciones permitidas y su constructor en SymPy
+FUNCTIONS = {
+    # Trigonométricas básicas e inversas
+    'sin': sp.sin, 'cos': sp.cos, 'tan': sp.tan,
+    'asin': sp.asin, 'acos': sp.acos, 'atan': sp.atan,
+    'csc': sp.csc, 'sec': sp.sec, 'cot': sp.cot,
+    'acsc': sp.acsc, 'asec': sp.asec, 'acot': sp.acot,
+    # Hiperbólicas e inversas
+    'sinh': sp.sinh, 'cosh': sp.cosh, 'tanh': sp.tanh,
+    'asinh': sp.asinh, 'acosh': sp.acosh, 'atanh': sp.atanh,
+    'csch': sp.csch, 'sech': sp.sech, 'coth': sp.coth,
+    # Otras funciones
+    'exp': sp.exp, 'log': sp.log, 'sqrt': sp.sqrt, 'abs': sp.Abs,
+}
+
+# Número de argumentos aceptados por función (log admite base opcional)
+ARITY = {name: (1, 1) for name in FUNCTIONS}
+ARITY['log'] = (1, 2)
+
+CONSTANTS = {'pi': sp.pi, 'E': sp.E}
+
+DEFAULT_VARIABLES = ('x', 'y')
+
+RELATIONS = {
+    '=': sp.Eq, '==': sp.Eq,
+    '<': sp.StrictLessThan, '<=': sp.LessThan,
+    '>': sp.StrictGreaterThan, '>=': sp.GreaterThan,
+}
+
+# Modo de n variables: nombres de una letra con subíndice opcional (x, z, w, x1, x_2)
+VARIABLE_NAME_RE = re.compile(r"[a-zA-Z](?:_?\d{1,2})?")
+RESERVED_NAMES = {'e', 'E', 'I'}
+MAX_VARIABLES = 10
+
+MAX_LENGTH = 2000
+# Anidamiento máximo: cada nivel cuesta varios marcos del parser y luego SymPy recorre el árbol
+# de forma recursiva, así que con 200 se llegaba antes al límite de recursión de Python
+MAX_DEPTH = 60
+MAX_INTEGER_EXPONENT = 1000
+# Tamaño máximo (bits) de una potencia racional exacta: 9^1000 ocupa unos 3200
+MAX_POWER_BITS = 20000
+
+_TOKEN_RE = re.compile(r"""
+    (?P<ws>\s+)
+  | (?P<number>(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)
+  | (?P<name>[A-Za-z_][A-Za-z_0-9]*)
+  | (?P<op>\*\*|<=|>=|==|[-+*/^(),=<>])
+""", re.VERBOSE)
+
+
+class ExpressionError(ValueError):
+    """
+    Raised when an expression does not belong to the accepted grammar.
+
+    The position attribute is the 0-based character offset of the offending token.
+    """
+
+    def __init__(self, message, position=None):
+        super().__init__(message if position is None else f"{message} (position {position})")
+        self.position = position
+
+
+def tokenize(text):
+    """
+    Split text into (kind, value, position) tuples; kind is 'number', 'name' or 'op'.
+    """
+    tokens = []
+    pos = 0
+    while pos < len(text):
+        m = _TOKEN_RE.match(text, pos)
+        if m is None:
+            raise ExpressionError(f"Unexpected character: {text[pos]!r}", pos)
+        kind = m.lastgroup
+        if kind != 'ws':
+            tokens.append((kind, m.group(), pos))
+        pos = m.end()
+    tokens.append(('end', '', len(text)))
+    return tokens
+
+
+class _Parser:
+    # Analizador descendente recursivo; cada método corresponde a una regla de la gramática:
+    #   relation := expr [REL expr]
+    #   expr     := term (('+' | '-') term)*
+    #   term     := unary (('*' | '/') unary)*
+    #   unary    := ('+' | '-') unary | power
+    #   power    := atom [('^' | '**') unary]
+    #   atom     := NUMBER | CONST | VAR | FUNC '(' args ')' | '(' expr ')'
+
+    def __init__(self, text, variables, allow_relations):
+        self.tokens = tokenize(text)
+        self.index = 0
+        self.depth = 0
+        # variables=None activa la detección automática de variables (modo de n variables)
+        self.detect = variables is None
+        self.variables = {} if variables is None else {name: sp.Symbol(name) for name in variables}
+        self.allow_relations = allow_relations
+
+    def peek(self):
+        return self.tokens[self.index]
+
+    def advance(self):
+        tok = self.tokens[self.index]
+        self.index += 1
+        return tok
+
+    def expect(self, value):
+        kind, val, pos = self.peek()
+        if val != value or kind != 'op':
+            found = 'end of expression' if kind == 'end' else repr(val)
+            raise ExpressionError(f"Expected {value!r} but found {found}", pos)
+        return self.advance()
+
+    def parse(self):
+        result = self.relation()
+        kind, val, pos = self.peek()
+        if kind != 'end':
+            if kind in ('number', 'name') or val == '(':
+                raise ExpressionError(f"Missing operator before {val!r}", pos)
+            raise ExpressionError(f"Unexpected token: {val!r}", pos)
+        return result
+
+    def relation(self):
+        lhs = self.expr()
+        kind, val, pos = self.peek()
+        if kind == 'op' and val in RELATIONS:
+            if not self.allow_relations:
+                raise ExpressionError(f"Relational operator {val!r} is not allowed here", pos)
+            self.advance()
+            rhs = self.expr()
+            return RELATIONS[val](lhs, rhs)
+        return lhs
+
+    def expr(self):
+        result = self.term()
+        while self.peek()[1] in ('+', '-') and self.peek()[0] == 'op':
+            op = self.advance()[1]
+            rhs = self.term()
+            result = sp.Add(result, rhs if op == '+' else -rhs)
+        return result
+
+    def term(self):
+        result = self.unary()
+        while self.peek()[1] in ('*', '/') and self.peek()[0] == 'op':
+            op = self.advance()[1]
+            rhs = self.unary()
+            result = sp.Mul(result, rhs if op == '*' else sp.Pow(rhs, -1))
+        return result
+
+    def unary(self):
+        kind, val, pos = self.peek()
+        if kind == 'op' and val in ('+', '-'):
+            self.advance()
+            self._enter(pos)
+            operand = self.unary()
+            self.depth -= 1
+            return -operand if val == '-' else operand
+        return self.power()
+
+    def power(self):
+        base = self.atom()
+        kind, val, pos = self.peek()
+        if kind == 'op' and val in ('^', '**'):
+            self.advance()
+            self._enter(pos)
+            exponent = self.unary()
+            self.depth -= 1
+            # Evita potencias enteras gigantes (p. ej. 9^9^9) que bloquearían el servidor
+            if base.is_Number and exponent.is_Integer and abs(int(exponent)) > MAX_INTEGER_EXPONENT:
+                raise ExpressionError("Exponent too large", pos)
+            # El exponente literal no basta: ((2^1000)^1000)^1000 tiene exponentes pequeños
+            # pero un resultado de mil millones de bits; se acota el tamaño antes de evaluarlo
+            if base.is_Rational and exponent.is_Integer:
+                bits = max(abs(base.p).bit_length(), base.q.bit_length()) * abs(int(exponent))
+                if bits > MAX_POWER_BITS:
+                    raise ExpressionError("Power result too large", pos)
+            return sp.Pow(base, exponent)
+        return base
+
+    def atom(self):
+        kind, val, pos = self.advance()
+        if kind == 'number':
+            if any(c in val for c in '.eE'):
+                return sp.Float(val)
+            return sp.Integer(val)
+        if kind == 'name':
+            if val in FUNCTIONS:
+                return self.call(val, pos)
+            if val in CONSTANTS:
+                return CONSTANTS[val]
+            if val in self.variables:
+                return self.variables[val]
+            if self.detect and val not in RESERVED_NAMES and VARIABLE_NAME_RE.fullmatch(val):
+                if len(self.variables) >= MAX_VARIABLES:
+                    raise ExpressionError(f"Too many variables (max {MAX_VARIABLES})", pos)
+                self.variables[val] = sp.Symbol(val)
+                return self.variables[val]
+            raise ExpressionError(f"Unknown token: {val}", pos)
+        if kind == 'op' and val == '(':
+            self._enter(pos)
+            inner = self.expr()
+            self.depth -= 1
+            self.expect(')')
+            return inner
+        if kind == 'end':
+            raise ExpressionError("Unexpected end of expression", pos)
+        raise ExpressionError(f"Unexpected token: {val!r}", pos)
+
+    def call(self, name, pos):
+        kind, val, paren_pos = self.peek()
+        if val != '(' or kind != 'op':
+            raise ExpressionError(f"Function {name} requires parentheses", paren_pos)
+        self.advance()
+        self._enter(paren_pos)
+        args = [self.expr()]
+        while self.peek()[1] == ',' and self.peek()[0] == 'op':
+            self.advance()
+            args.append(self.expr())
+        self.depth -= 1
+        self.expect(')')
+        lo, hi = ARITY[name]
+        if not lo <= len(args) <= hi:
+            raise ExpressionError(f"Function {name} takes {lo if lo == hi else f'{lo} or {hi}'} argument(s)", pos)
+        return FUNCTIONS[name](*args)
+
+    def _enter(self, pos):
+        self.depth += 1
+        if self.depth > MAX_DEPTH:
+            raise ExpressionError("Expression is nested too deeply", pos)
+
+
+def parse_expression(text, variables=DEFAULT_VARIABLES, allow_relations=False):
+    """
+    Parse text into a SymPy expression, validating it against the allowed grammar.
+
+    Accepts numbers, the variables given, pi, E, the functions in FUNCTIONS, + - * /,
+    ^ or ** and parentheses. With variables=None any single-letter name with an optional
+    numeric subscript (z, w, x1, x_2) is accepted as a variable. With allow_relations=True a single =, <, <=, > or >= is
+    accepted and a SymPy relational is returned. Raises ExpressionError with the position
+    of the offending token.
+    """
+    if not isinstance(text, str):
+        raise ExpressionError("Expression must be a string")
+    if len(text) > MAX_LENGTH:
+        raise ExpressionError(f"Expression is too long (max {MAX_LENGTH} characters)")
+    if not text.strip():
+        raise ExpressionError("Expression is empty")
+    try:
+        return _Parser(text, variables, allow_relations).parse()
+    except RecursionError:
+        # Red de seguridad: el anidamiento (o la construcción en SymPy) agotó la pila
+        raise ExpressionError("Expression is nested too deeply") from None
+
+
+def parse_number(value):
+    """
+    Convert a number or a constant expression (pi, E, + - * /, functions) into a SymPy number.
+
+    Raises ExpressionError if the value is not numeric or does not evaluate to a finite real.
+    """
+    if isinstance(value, bool):
+        raise ExpressionError("Value must be numeric")
+    if isinstance(value, int):
+        return sp.Integer(value)
+    if isinstance(value, float):
+        return sp.Float(value)
+    if isinstance(value, sp.Basic):
+        expr = value
+    else:
+        expr = parse_expression(value if isinstance(value, str) else str(value), variables=())
+    try:
+        num = complex(sp.N(expr))
+    except (TypeError, ValueError):
+        raise ExpressionError("Value must be numeric")
+    if num.imag != 0 or num.real != num.real or abs(num.real) == float('inf'):
+        raise ExpressionError("Value must be a finite real number")
+    return expr
+
+
+def order_variables(symbols):
+    """
+    Sort variable symbols in the conventional order: x, y, z, w first, then the rest
+    alphabetically with numeric subscripts compared as numbers (x2 before x10).
+    """
+    preferred = {'x': 0, 'y': 1, 'z': 2, 'w': 3}
+
+    def key(sym):
+        letter, digits = sym.name[0], sym.name[1:].lstrip('_')
+        return (preferred.get(letter, 4), letter, int(digits) if digits else -1)
+
+    return tuple(sorted(symbols, key=key))
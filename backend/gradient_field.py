@@ -0,0 +1,176 @@
+import base64
+import math
+
+import numpy as np
+import sympy as sp
+
+from backend.evaluator import compile_kernel
+
+# Campo de gradiente y trayectorias de ascenso/descenso para f(x,y).
+# ∇f se evalúa con un kernel NumPy compilado (fx, fy) sobre toda la rejilla de una vez y se
+# devuelve en float32. Las trayectorias siguen dx/dt = ±∇f con RK4 para todas las semillas a
+# la vez (arreglos (P, 2)); cada una se detiene al converger, salir del rectángulo o llegar a
+# un punto indefinido, y las que terminan junto a un punto crítico se cierran en ese punto.
+
+x, y = sp.symbols('x y')
+
+MAX_GRID_SIZE = 400
+MAX_SEEDS = 1000
+MAX_STEPS = 2000
+# Fracción del lado mayor del rectángulo usada como paso de RK4 por defecto
+DEFAULT_STEP_FRACTION = 0.01
+# Distancia mínima entre vértices consecutivos de una polilínea (fracción de la diagonal)
+POLYLINE_SPACING = 0.01
+# Radio para unir el final de una trayectoria con un punto crítico (fracción de la diagonal)
+SNAP_FRACTION = 0.02
+
+
+def _field(a):
+    # Kernel (fx, fy) compartido con la caché del evaluador
+    return compile_kernel((a.fx, a.fy))
+
+
+def _encode(values, binary):
+    values = np.ascontiguousarray(values, dtype=np.float32)
+    if binary:
+        return base64.b64encode(values.astype("<f4").tobytes()).decode("ascii")
+    return [[float(v) if math.isfinite(v) else None for v in row] for row in values.tolist()]
+
+
+def gradient_grid(a, x_limits, y_limits, n=41, stride=1, binary=True):
+    """
+    ∇f on an n×n grid over the rectangle, keeping every stride-th node in each direction.
+
+    u, v are float32 arrays of shape (rows, cols) indexed [j, i] = (y_j, x_i); with
+    binary=True they are base64 little-endian float32 buffers, otherwise nested lists
+    (undefined values as null).
+    """
+    (ax, bx), (ay, by) = x_limits, y_limits
+    n = max(2, min(int(n), MAX_GRID_SIZE))
+    stride = max(1, int(stride))
+    xs = np.linspace(ax, bx, n)[::stride]
+    ys = np.linspace(ay, by, n)[::stride]
+    X, Y = np.meshgrid(xs, ys)
+    u, v = _field(a)(X, Y)
+    u, v = u.astype(np.float32), v.astype(np.float32)
+    magnitude = np.hypot(u, v)
+    finite = magnitude[np.isfinite(magnitude)]
+    return {
+        "x": xs.tolist(),
+        "y": ys.tolist(),
+        "shape": [len(ys), len(xs)],
+        "dtype": "float32",
+        "encoding": "base64" if binary else "json",
+        "u": _encode(u, binary),
+        "v": _encode(v, binary),
+        "max_magnitude": float(finite.max()) if finite.size else None,
+    }
+
+
+def _polyline(points, spacing, decimals):
+    # Se conservan los vértices separados al menos por spacing, siempre el primero y el último
+    kept = [points[0]]
+    for p in points[1:-1]:
+        if math.hypot(p[0] - kept[-1][0], p[1] - kept[-1][1]) >= spacing:
+            kept.append(p)
+    if len(points) > 1:
+        kept.append(points[-1])
+    return np.round(np.array(kept), decimals).tolist()
+
+
+def gradient_paths(a, seeds, x_limits, y_limits, direction=1, step=None, max_steps=500,
+                   tol=1e-6, critical_points=()):
+    """
+    Integrate steepest ascent (direction=1) or descent (direction=-1) paths from all seeds at once.
+
+    Each RK4 step moves along ±∇f/max(1, |∇f|) (speed capped at 1, so steep regions do not
+    overshoot and the flow slows down near critical points). A path stops when |∇f| < tol,
+    when it leaves the rectangle or when ∇f is undefined. Paths that end within a small radius
+    of one of critical_points ((x, y) pairs, e.g. the ones /optimize reports) are closed at
+    that point. Returns one dict per seed with the compact polyline, status and end point.
+    """
+    (ax, bx), (ay, by) = x_limits, y_limits
+    width, height = bx - ax, by - ay
+    diagonal = math.hypot(width, height)
+    h = float(step) if step else DEFAULT_STEP_FRACTION * max(width, height)
+    max_steps = max(1, min(int(max_steps), MAX_STEPS))
+    field = _field(a)
+    sign = 1.0 if direction >= 0 else -1.0
+
+    def velocity(P):
+        u, v = field(P[:, 0], P[:, 1])
+        g = np.stack([u, v], axis=1)
+        norm = np.hypot(u, v)
+        with np.errstate(invalid="ignore"):
+            return sign * g / np.maximum(1.0, norm)[:, None], norm
+
+    P = np.array(seeds, dtype=float).reshape(-1, 2)
+    count = P.shape[0]
+    history = [P.copy()]
+    stop = np.full(count, -1)
+    status = np.array(["max_steps"] * count, dtype=object)
+    active = np.ones(count, dtype=bool)
+
+    for k in range(max_steps):
+        idx = np.nonzero(active)[0]
+        if idx.size == 0:
+            break
+        Q = P[idx]
+        k1, norm = velocity(Q)
+        # Convergencia o gradiente indefinido en el punto actual
+        converged = norm < tol
+        undefined = ~np.isfinite(norm)
+        k2, _ = velocity(Q + 0.5 * h * k1)
+        k3, _ = velocity(Q + 0.5 * h * k2)
+        k4, _ = velocity(Q + h * k3)
+        nxt = Q + (h / 6.0) * (k1 + 2 * k2 + 2 * k3 + k4)
+        undefined |= ~np.all(np.isfinite(nxt), axis=1)
+        outside = ~undefined & ((nxt[:, 0] < ax) | (nxt[:, 0] > bx) | (nxt[:, 1] < ay) | (nxt[:, 1] > by))
+        moving = ~(converged | undefined)
+        P[idx[moving]] = nxt[moving]
+        history.append(P.copy())
+        for mask, label in ((converged, "converged"), (undefined & ~converged, "undefined"), (outside & moving, "left_domain")):
+            done = idx[mask]
+            status[done] = label
+            stop[done] = k + 1 if label == "left_domain" else k
+            active[done] = False
+
+    stop[stop < 0] = len(history) - 1
+    trail = np.stack(history)
+    crit = np.array(critical_points, dtype=float).reshape(-1, 2)
+    snap = SNAP_FRACTION * diagonal
+    spacing = POLYLINE_SPACING * diagonal
+    # Cuatro cifras significativas respecto del tamaño del rectángulo
+    decimals = max(2, 4 - int(math.floor(math.log10(max(diagonal, 1e-12)))))
+    paths = []
+    for i in range(count):
+        points = trail[:stop[i] + 1, i]
+        end_index = None
+        if crit.size and status[i] in ("converged", "max_steps"):
+            dist = np.hypot(crit[:, 0] - points[-1, 0], crit[:, 1] - points[-1, 1])
+            nearest = int(np.argmin(dist))
+            if dist[nearest] <= snap:
+                end_index = nearest
+                points = np.vstack([points, crit[nearest]])
+                status[i] = "critical_point"
+        polyline = _polyline(points, spacing, decimals)
+        paths.append({
+            "seed": [float(v) for v in trail[0, i]],
+            "points": polyline,
+            "end": polyline[-1],
+            "status": status[i],
+            "critical_point": end_index,
+            "steps": int(stop[i]),
+        })
+    return paths
+
+
+def seed_grid(x_limits, y_limits, k):
+    """
+    k×k seeds at the centers of a regular subdivision of the rectangle.
+    """
+    (ax, bx), (ay, by) = x_limits, y_limits
+    k = max(1, int(k))
+    xs = ax + (np.arange(k) + 0.5) * (bx - ax) / k
+    ys = ay + (np.arange(k) + 0.5) * (by - ay) / k
+    return [(float(sx), float(sy)) for sy in ys for sx in xs]
@@ -0,0 +1,178 @@
+import os
+import threading
+from collections import OrderedDict
+
+import sympy as sp
+from sympy.core.function import ArgumentIndexError, Function
+
+from backend.memory import register_cache
+
+# Memo de derivadas y antiderivadas por subárbol. Las expresiones de SymPy tienen un hash
+# estructural, así que cada subárbol sirve de clave: al editar f(x,y) poco a poco
+# (x**2*sin(y) -> x**2*sin(y) + exp(x*y)) la linealidad y las reglas del producto y de la
+# cadena reutilizan los resultados de los subárboles que no cambiaron y solo se deriva o
+# integra lo nuevo. Las reglas replican las de SymPy, así que el resultado es idéntico a sp.diff.
+
+MEMO_SIZE = int(os.environ.get("CALCULUS_MEMO_SIZE", "8192"))
+# Presupuesto aproximado en bytes, como en el caché del evaluador: una derivada de orden alto
+# puede tener millones de nodos y el límite de entradas por sí solo no acota la memoria
+MEMO_BYTES = int(os.environ.get("CALCULUS_MEMO_BYTES", str(64 << 20)))
+_ENTRY_BYTES = 256
+_NODE_BYTES = 160
+
+_memo = OrderedDict()
+_memo_bytes = 0
+_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0}
+
+
+def _estimate_bytes(key, value):
+    # Nodos de la expresión de la clave y del resultado (o longitud del LaTeX); se deja de
+    # contar al pasar el presupuesto, porque esa entrada no se va a guardar
+    cap = MEMO_BYTES // _NODE_BYTES + 1
+    size = _ENTRY_BYTES
+    for part in (key[1], value):
+        if isinstance(part, str):
+            size += len(part)
+            continue
+        nodes = 0
+        for _ in sp.preorder_traversal(part):
+            nodes += 1
+            if nodes > cap:
+                break
+        size += _NODE_BYTES * nodes
+    return size
+
+
+def _get(key):
+    with _lock:
+        entry = _memo.get(key)
+        if entry is None:
+            _stats["misses"] += 1
+            return None
+        _memo.move_to_end(key)
+        _stats["hits"] += 1
+        return entry[0]
+
+
+def _put(key, value):
+    global _memo_bytes
+    size = _estimate_bytes(key, value)
+    if size > MEMO_BYTES:
+        return value
+    with _lock:
+        previous = _memo.get(key)
+        _memo_bytes += size - (previous[1] if previous else 0)
+        _memo[key] = (value, size)
+        # Se descartan las menos usadas hasta respetar el número de entradas y el presupuesto de bytes
+        while len(_memo) > MEMO_SIZE or _memo_bytes > MEMO_BYTES:
+            _, (_, dropped) = _memo.popitem(last=False)
+            _memo_bytes -= dropped
+    return value
+
+
+def _memo_stats():
+    with _lock:
+        return {"entries": len(_memo), "bytes": _memo_bytes, "max_entries": MEMO_SIZE, "max_bytes": MEMO_BYTES, **_stats}
+
+
+def _memo_clear():
+    global _memo_bytes
+    with _lock:
+        _memo.clear()
+        _memo_bytes = 0
+
+
+register_cache("calculus_memo", _memo_stats, _memo_clear)
+
+
+def memo_diff(expr, var):
+    """
+    ∂expr/∂var with every intermediate subtree derivative memoized across requests.
+
+    Sums, products, powers and functions are differentiated with the same rules SymPy
+    uses (linearity, product rule, chain rule), so the result equals sp.diff(expr, var);
+    other node types fall back to sp.diff.
+    """
+    if not expr.has(var):
+        return sp.S.Zero
+    if expr == var:
+        return sp.S.One
+    key = ("d", expr, var)
+    cached = _get(key)
+    if cached is not None:
+        return cached
+
+    if isinstance(expr, sp.Add):
+        result = sp.Add(*[memo_diff(a, var) for a in expr.args])
+    elif isinstance(expr, sp.Mul):
+        # Regla del producto: Σ_i a_1 ··· a_i' ··· a_n (mismo orden de factores que SymPy)
+        args = list(expr.args)
+        terms = []
+        for i, a in enumerate(args):
+            d = memo_diff(a, var)
+            if d:
+                term = sp.S.One
+                for factor in args[:i] + [d] + args[i + 1:]:
+                    term = term * factor
+                terms.append(term)
+        result = sp.Add.fromiter(terms)
+    elif isinstance(expr, sp.Pow):
+        dbase = memo_diff(expr.base, var)
+        dexp = memo_diff(expr.exp, var)
+        result = expr * (dexp * sp.log(expr.base) + dbase * expr.exp / expr.base)
+    elif isinstance(expr, Function) and type(expr)._eval_derivative is Function._eval_derivative:
+        # Regla de la cadena: Σ_i f_i(args) · args_i'
+        terms = []
+        for i, a in enumerate(expr.args, start=1):
+            da = memo_diff(a, var)
+            if da.is_zero:
+                continue
+            try:
+                df = expr.fdiff(i)
+            except ArgumentIndexError:
+                df = Function.fdiff(expr, i)
+            terms.append(df * da)
+        result = sp.Add(*terms)
+    else:
+        result = sp.diff(expr, var)
+    return _put(key, result)
+
+
+def memo_integrate(expr, var):
+    """
+    Indefinite ∫ expr d(var), integrating each term of a sum separately (linearity) and
+    pulling out factors independent of var; every term's antiderivative is memoized.
+
+    If some term has no closed form the whole expression is handed to sp.integrate.
+    """
+    key = ("i", expr, var)
+    cached = _get(key)
+    if cached is not None:
+        return cached
+    terms = sp.Add.make_args(expr)
+    if len(terms) > 1:
+        parts = [memo_integrate(t, var) for t in terms]
+        result = sp.Add(*parts)
+        if result.has(sp.Integral):
+            result = sp.integrate(expr, var)
+    else:
+        coeff, rest = expr.as_independent(var, as_Add=False)
+        if coeff != 1 and rest != 1:
+            # Se distribuye el factor como lo deja sp.integrate: c·(A + B) -> c·A + c·B
+            result = sp.Add(*[coeff * t for t in sp.Add.make_args(memo_integrate(rest, var))])
+        else:
+            result = sp.integrate(expr, var)
+    return _put(key, result)
+
+
+def memo_latex(expr):
+    """
+    sp.latex(expr) memoized across requests (the printer is not composable per subtree,
+    so whole expressions are the unit: f, each derivative, each antiderivative).
+    """
+    key = ("tex", expr)
+    cached = _get(key)
+    if cached is not None:
+        return cached
+    return _put(key, sp.latex(expr))
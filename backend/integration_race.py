@@ -0,0 +1,186 @@
+import multiprocessing as mp
+import os
+import threading
+import time
+from multiprocessing.connection import Pipe, wait
+
+import sympy as sp
+
+from backend.caching import is_load_dependent, mark_load_dependent, reset_load_dependent
+from backend.planner import planner
+from backend.simplification import canonical_form, tiered_simplify
+
+# Integral doble iterada sobre un rectángulo: primero en el proceso y, si tarda, carrera.
+# Con límites constantes ∫∫ f dy dx = ∫∫ f dx dy (Fubini), pero sp.integrate puede tardar
+# mucho más en un orden que en el otro (p. ej. y·e^(xy): en x primero es inmediata) o solo
+# terminar en uno. El orden dy dx se intenta en un hilo con un presupuesto corto; casi todas
+# las integrales terminan ahí, sin arrancar procesos, y esa respuesta es determinista. Si el
+# presupuesto se agota, los dos órdenes corren además en procesos propios (sp.integrate no se
+# puede interrumpir dentro de un hilo) y gana la primera forma cerrada que llegue de cualquiera
+# de los tres. El valor se lleva a una forma canónica para que no dependa del orden ganador;
+# el orden y los pasos sí dependen, así que esas respuestas se marcan como no cacheables.
+
+x, y = sp.symbols('x y')
+
+ORDERS = ("dy dx", "dx dy")
+CANONICAL_ORDER = ORDERS[0]
+# Presupuesto (s) del intento en el proceso antes de arrancar la carrera
+INPROCESS_BUDGET = float(os.environ.get("INTEGRATION_INPROCESS_BUDGET", "0.5"))
+# Hilos de intento en el proceso a la vez: uno que se pasa del presupuesto sigue hasta terminar
+# (no se puede cancelar), así que si no hay hueco se va directo a la carrera
+INPROCESS_SLOTS = int(os.environ.get("INTEGRATION_INPROCESS_SLOTS", "2"))
+# Plazo común de la carrera (s); al vencer, el planificador pasa a la ruta numérica
+RACE_DEADLINE = float(os.environ.get("INTEGRATION_RACE_DEADLINE", "10"))
+# "0" desactiva la carrera: se integra en el proceso, primero en y y luego en x
+RACE_ENABLED = os.environ.get("INTEGRATION_RACE", "1") != "0"
+# waitress atiende con varios hilos y fork desde un proceso con hilos puede heredar cerrojos
+# tomados; forkserver bifurca desde un servidor de un solo hilo que ya tiene SymPy cargado
+# (create_app precarga este módulo)
+_START_METHOD = os.environ.get(
+    "INTEGRATION_RACE_START", "forkserver" if "forkserver" in mp.get_all_start_methods() else "spawn",
+)
+
+
+def iterated_integral(f, order, ax, bx, ay, by):
+    """
+    Iterated integral of f over [ax, bx] × [ay, by] in the given order ("dy dx" integrates y first).
+
+    Returns (inner, outer, simplified, tier).
+    """
+    if order == "dy dx":
+        inner = sp.integrate(f, (y, ay, by))
+        outer = sp.integrate(inner, (x, ax, bx))
+    else:
+        inner = sp.integrate(f, (x, ax, bx))
+        outer = sp.integrate(inner, (y, ay, by))
+    return (inner, outer, *tiered_simplify(outer))
+
+
+_inprocess_slots = threading.BoundedSemaphore(INPROCESS_SLOTS)
+
+
+def _send_result(conn, f, order, limits):
+    # El resultado (o None si falla) vuelve por la tubería junto con la marca de si el plazo
+    # de tiered_simplify lo cortó
+    reset_load_dependent()
+    try:
+        message = (iterated_integral(f, order, *limits), is_load_dependent())
+    except Exception:
+        message = (None, False)
+    try:
+        conn.send(message)
+    except (OSError, ValueError):
+        # Nadie espera ya este resultado: la carrera terminó antes
+        pass
+    finally:
+        conn.close()
+
+
+def _race_worker(conn, f, order, limits):
+    # Proceso hijo: un solo orden
+    _send_result(conn, f, order, limits)
+
+
+def _inprocess_worker(conn, f, order, limits):
+    # Hilo del intento en el proceso; libera su hueco al terminar, aunque ya no se le espere
+    try:
+        _send_result(conn, f, order, limits)
+    finally:
+        _inprocess_slots.release()
+
+
+def _closed(computed):
+    return computed is not None and not computed[2].has(sp.Integral)
+
+
+def _result(order, computed, race):
+    inner, outer, simplified, tier = computed
+    return {"order": order, "inner": inner, "outer": outer, "value": canonical_form(simplified),
+            "simplification": tier, "race": race}
+
+
+def definite_iterated_integral(f, ax, bx, ay, by, budget=INPROCESS_BUDGET, deadline=RACE_DEADLINE):
+    """
+    Iterated integral of f over the rectangle, in-process first and raced if that is slow.
+
+    "dy dx" runs in a thread for up to budget seconds; when it returns a closed form in
+    time that is the (deterministic) result, with race None. Otherwise both orders also start
+    in separate processes and the first closed form from any of them is returned before
+    deadline, with a race summary (order used, source, deadline) and the request marked load
+    dependent. If nothing gives a closed form, the first unevaluated result in ORDERS order
+    is returned; None when nothing finished before the deadline.
+    """
+    started = time.perf_counter()
+    limits = (ax, bx, ay, by)
+    running = {}
+    finished, cut = {}, set()
+
+    def collect(timeout):
+        # Recibe lo que llegue antes de timeout; devuelve (orden, origen) de la primera forma cerrada
+        for conn in wait(list(running), timeout=timeout):
+            order, source, proc = running.pop(conn)
+            try:
+                computed, was_cut = conn.recv()
+            except (EOFError, OSError):
+                computed, was_cut = None, False
+            conn.close()
+            if proc is not None:
+                proc.join()
+            planner.note(f"integrate-{source}-{order.replace(' ', '')}", (time.perf_counter() - started) * 1e3)
+            if computed is not None and (order not in finished or _closed(computed)):
+                finished[order] = computed
+                cut.discard(order)
+                if was_cut:
+                    cut.add(order)
+            if _closed(computed):
+                return order, source
+        return None
+
+    winner = None
+    if _inprocess_slots.acquire(blocking=False):
+        parent, child = Pipe(duplex=False)
+        threading.Thread(target=_inprocess_worker, args=(child, f, CANONICAL_ORDER, limits), daemon=True,
+                         name="integrate-inprocess").start()
+        running[parent] = (CANONICAL_ORDER, "inprocess", None)
+        winner = collect(budget)
+        if winner is not None:
+            if CANONICAL_ORDER in cut:
+                mark_load_dependent()
+            return _result(CANONICAL_ORDER, finished[CANONICAL_ORDER], None)
+
+    # Carrera: los órdenes que aún pueden dar forma cerrada, cada uno en su proceso
+    ctx = mp.get_context(_START_METHOD)
+    for order in ORDERS:
+        if order in finished:
+            continue
+        parent, child = ctx.Pipe(duplex=False)
+        proc = ctx.Process(target=_race_worker, args=(child, f, order, limits), daemon=True)
+        proc.start()
+        child.close()
+        running[parent] = (order, "process", proc)
+    try:
+        end = started + deadline
+        while running and winner is None:
+            remaining = end - time.perf_counter()
+            if remaining <= 0:
+                break
+            winner = collect(remaining)
+    finally:
+        # Los procesos que siguen se terminan; el hilo (si sigue) acaba solo y su envío se descarta
+        for conn, (order, source, proc) in running.items():
+            if proc is not None:
+                proc.terminate()
+                proc.join(1.0)
+            conn.close()
+
+    # Quién termina primero depende de la carga
+    mark_load_dependent()
+    if winner is not None:
+        order, source = winner
+    else:
+        pending = [o for o in ORDERS if o in finished]
+        if not pending:
+            return None
+        order, source = pending[0], None
+    race = {"order": order, "source": source, "deadline_s": deadline}
+    return _result(order, finished[order], race)
@@ -0,0 +1,285 @@
+import math
+import multiprocessing as mp
+import os
+from fractions import Fraction
+
+import numpy as np
+import sympy as sp
+
+from backend.caching import mark_load_dependent
+from backend.evaluator import compile_expression, x, y
+
+# Estimador numérico de límites en dos variables.
+# En lugar de un límite iterado simbólico, se evalúa f a lo largo de muchas trayectorias
+# de aproximación (rayos, parábolas, cúbicas y cuárticas) con pasos geométricos y se comparan
+# los resultados.
+
+# Parámetros de las trayectorias
+N_ANGLES = 24
+# Giro de todos los rayos (rad): sobre un eje exacto se evaluaría f justo en sus polos o
+# indeterminaciones (x/y en (1, 0) a lo largo de y = 0)
+RAY_OFFSET = 1e-3
+PARABOLA_COEFFS = (-2.0, -1.0, -0.5, 0.5, 1.0, 2.0)
+# Curvas y - y0 = a (x - x0)^k (y simétricas): k = 3 y 4 detectan x³y/(x⁶+y²) o x⁴y/(x⁸+y²),
+# que valen 0 en todos los rayos y parábolas
+CURVE_POWERS = (2, 3, 4)
+_CURVE_NAMES = {2: ("parábola", "²"), 3: ("cúbica", "³"), 4: ("cuártica", "⁴")}
+R_MAX = 1e-1
+R_MIN = 1e-6
+N_STEPS = 11  # factor 1/sqrt(10) entre pasos consecutivos
+TAIL = 4
+
+# Tolerancias para decidir convergencia, divergencia y dependencia de la trayectoria
+CONVERGENCE_RTOL = 1e-4
+AGREEMENT_RTOL = 1e-3
+DIVERGENCE_THRESHOLD = 1e6
+
+# La confirmación simbólica opcional corre en un proceso aparte: sp.limit no se puede
+# interrumpir dentro de un hilo, y un proceso se termina al vencer el plazo. forkserver evita
+# bifurcar el proceso multihilo de waitress y arranca los hijos con SymPy ya importado
+# (create_app precarga este módulo).
+_START_METHOD = os.environ.get(
+    "LIMIT_CONFIRM_START", "forkserver" if "forkserver" in mp.get_all_start_methods() else "spawn",
+)
+
+
+def _approach_paths(x0, y0):
+    """
+    Build the approach paths as coordinate arrays of shape (paths, steps) plus labels.
+
+    Every path moves towards (x0, y0) through the same geometric sequence of steps t.
+    """
+    t = np.geomspace(R_MAX, R_MIN, N_STEPS)
+    xs, ys, labels = [], [], []
+
+    # Comentario: Rayos rectos en muchas direcciones (girados RAY_OFFSET respecto a los ejes)
+    for k in range(N_ANGLES):
+        theta = 2.0 * math.pi * k / N_ANGLES + RAY_OFFSET
+        xs.append(x0 + t * math.cos(theta))
+        ys.append(y0 + t * math.sin(theta))
+        labels.append(f"rayo θ≈{math.degrees(theta):.0f}°")
+
+    # Comentario: Curvas parabólicas, cúbicas y cuárticas en ambas orientaciones y ambos lados
+    for power in CURVE_POWERS:
+        name, sup = _CURVE_NAMES[power]
+        for a in PARABOLA_COEFFS:
+            for s in (1.0, -1.0):
+                xs.append(x0 + s * t)
+                ys.append(y0 + a * t ** power)
+                labels.append(f"{name} y-y0={a:g}(x-x0){sup}, x{'>' if s > 0 else '<'}x0")
+                xs.append(x0 + a * t ** power)
+                ys.append(y0 + s * t)
+                labels.append(f"{name} x-x0={a:g}(y-y0){sup}, y{'>' if s > 0 else '<'}y0")
+
+    return np.array(xs), np.array(ys), labels
+
+
+def _trusted_prefix(vals):
+    """
+    Cut a path sequence where round-off takes over.
+
+    A sequence that was converging and then jumps well above its smallest step so far is
+    treated as floating-point cancellation (e.g. 1 - cos(t) for tiny t), so only the values
+    before the jump are used.
+    """
+    d = np.abs(np.diff(vals))
+    for k in range(2, len(d)):
+        smallest = d[:k].min()
+        converging = (d[1:k] < d[:k - 1]).any()
+        if converging and d[k] > 8.0 * smallest + 1e-12:
+            return vals[:k + 1]
+    return vals
+
+
+def _analyze_path(vals):
+    """
+    Classify one path sequence: ("converges", estimate), ("diverges", ±inf),
+    ("outside", None) when it leaves the domain, or ("oscillates", None).
+    """
+    finite = np.isfinite(vals)
+    if not finite[-TAIL:].any():
+        inf_tail = vals[-TAIL:]
+        if np.isinf(inf_tail).all() and (np.sign(inf_tail) == np.sign(inf_tail[-1])).all():
+            return "diverges", float(inf_tail[-1])
+        return "outside", None
+    if not finite[-TAIL:].all():
+        return "oscillates", None
+
+    # Comentario: Solo se usa el último tramo continuo de valores finitos
+    start = len(vals) - int(np.argmin(finite[::-1])) if not finite.all() else 0
+    seq = _trusted_prefix(vals[start:])
+    if len(seq) < 3:
+        return "oscillates", None
+
+    tail = seq[-TAIL:]
+    d = np.diff(tail)
+    last = tail[-1]
+    scale = 1.0 + abs(last)
+
+    shrinking = all(abs(d[i + 1]) <= 0.9 * abs(d[i]) + 1e-15 for i in range(len(d) - 1))
+    if abs(d[-1]) <= CONVERGENCE_RTOL * scale or (shrinking and abs(d[-1]) <= 1e-2 * scale):
+        # Extrapolación de Aitken cuando la convergencia es geométrica
+        estimate = last
+        denom = d[-1] - d[-2] if len(d) >= 2 else 0.0
+        if shrinking and abs(denom) > 1e-300:
+            aitken = last - d[-1] ** 2 / denom
+            if math.isfinite(aitken) and abs(aitken - last) <= 10.0 * abs(d[-1]) + 1e-15:
+                estimate = aitken
+        return "converges", float(estimate)
+
+    growing = all(abs(tail[i + 1]) > abs(tail[i]) for i in range(len(tail) - 1))
+    same_sign = (np.sign(tail) == np.sign(last)).all()
+    if growing and same_sign and not shrinking and (abs(last) > DIVERGENCE_THRESHOLD or abs(last) > 4.0 * abs(seq[0]) + 1.0):
+        return "diverges", math.copysign(math.inf, last)
+    return "oscillates", None
+
+
+def _symbolic_limits(f, x0, y0):
+    # Límites iterados en ambos órdenes (solo se usan para confirmar el resultado numérico)
+    lxy = sp.limit(sp.limit(f, x, x0), y, y0)
+    lyx = sp.limit(sp.limit(f, y, y0), x, x0)
+    return lxy, lyx
+
+
+def _confirm_worker(conn, f, x0, y0):
+    # Proceso hijo: los dos límites iterados (o None si sp.limit falla) vuelven por la tubería
+    try:
+        conn.send(_symbolic_limits(f, x0, y0))
+    except Exception:
+        conn.send(None)
+    finally:
+        conn.close()
+
+
+def _confirm(f, x0, y0, numeric, time_budget):
+    """
+    Run the iterated symbolic limits under a time budget and compare them with the numeric value.
+
+    The limits are computed in a child process that is terminated when the budget runs out.
+    Returns (confirmed, exact) where confirmed is True/False, or None when the budget ran out.
+    """
+    ctx = mp.get_context(_START_METHOD)
+    parent, child = ctx.Pipe(duplex=False)
+    proc = ctx.Process(target=_confirm_worker, args=(child, f, x0, y0), daemon=True)
+    proc.start()
+    child.close()
+    try:
+        limits = parent.recv() if parent.poll(time_budget) else None
+    except (EOFError, OSError):
+        limits = None
+    finally:
+        if proc.is_alive():
+            proc.terminate()
+        proc.join(1.0)
+        parent.close()
+    if limits is None:
+        if proc.exitcode is None or proc.exitcode < 0:
+            # Se terminó por el plazo: otra carga podría haber confirmado el límite
+            mark_load_dependent()
+        return None, None
+    lxy, lyx = limits
+
+    if lxy != lyx:
+        return False, None
+    if lxy in (sp.oo, -sp.oo):
+        return numeric == float(lxy), lxy
+    try:
+        exact = float(sp.N(lxy))
+    except Exception:
+        return None, None
+    if not math.isfinite(numeric):
+        return False, lxy
+    return abs(exact - numeric) <= AGREEMENT_RTOL * (1.0 + abs(exact)), lxy
+
+
+def estimate_limit(f, x0, y0, confirm=False, time_budget=1.0):
+    """
+    Estimate lim_{(x,y)->(x0,y0)} f(x,y) numerically along many approach paths.
+
+    f is a SymPy expression; x0, y0 may be numbers or SymPy numbers.
+    Returns a dict with the status ("exists", "infinity", "-infinity", "path_dependent",
+    "oscillates" or "undefined"), the numeric value when it exists, the paths evidence and,
+    if confirm=True, the result of the symbolic check run within time_budget seconds.
+    """
+    x0f = float(sp.N(x0))
+    y0f = float(sp.N(y0))
+    xs, ys, labels = _approach_paths(x0f, y0f)
+    # Comentario: Todas las trayectorias se evalúan en una sola llamada vectorizada
+    values = compile_expression(f)(xs, ys)
+
+    converged, diverged, oscillating = [], [], []
+    for label, vals in zip(labels, values):
+        kind, estimate = _analyze_path(vals)
+        if kind == "converges":
+            converged.append((label, estimate))
+        elif kind == "diverges":
+            diverged.append((label, estimate))
+        elif kind == "oscillates":
+            oscillating.append(label)
+
+    result = {
+        "status": "undefined",
+        "value": None,
+        "paths_checked": len(labels),
+        "paths_used": len(converged) + len(diverged) + len(oscillating),
+        "evidence": [],
+        "confirmed": None,
+    }
+
+    if oscillating:
+        result["status"] = "oscillates"
+        result["evidence"] = [{"path": p, "estimate": None} for p in oscillating[:2]]
+    elif diverged and not converged:
+        signs = {math.copysign(1.0, v) for _, v in diverged}
+        if len(signs) == 1:
+            result["status"] = "infinity" if signs.pop() > 0 else "-infinity"
+        else:
+            result["status"] = "path_dependent"
+            lo = min(diverged, key=lambda p: p[1])
+            hi = max(diverged, key=lambda p: p[1])
+            result["evidence"] = [{"path": lo[0], "estimate": "-infinity"}, {"path": hi[0], "estimate": "infinity"}]
+    elif converged and diverged:
+        result["status"] = "path_dependent"
+        result["evidence"] = [
+            {"path": converged[0][0], "estimate": converged[0][1]},
+            {"path": diverged[0][0], "estimate": "infinity" if diverged[0][1] > 0 else "-infinity"},
+        ]
+    elif converged:
+        estimates = np.array([v for _, v in converged])
+        ref = float(np.median(estimates))
+        lo = int(np.argmin(estimates))
+        hi = int(np.argmax(estimates))
+        if estimates[hi] - estimates[lo] > AGREEMENT_RTOL * (1.0 + abs(ref)):
+            result["status"] = "path_dependent"
+            result["evidence"] = [
+                {"path": converged[lo][0], "estimate": float(estimates[lo])},
+                {"path": converged[hi][0], "estimate": float(estimates[hi])},
+            ]
+        else:
+            result["status"] = "exists"
+            # Redondeo suave para absorber el error de truncamiento de las trayectorias
+            # Se redondea a una fracción sencilla si está dentro del error de truncamiento
+            nice = Fraction(ref).limit_denominator(1000)
+            value = float(nice) if abs(float(nice) - ref) <= 1e-6 * (1.0 + abs(ref)) else ref
+            result["value"] = value + 0.0  # evita reportar -0.0
+
+    if confirm and result["status"] in ("exists", "infinity", "-infinity"):
+        numeric = result["value"] if result["status"] == "exists" else math.copysign(math.inf, 1.0 if result["status"] == "infinity" else -1.0)
+        confirmed, exact = _confirm(f, sp.sympify(x0), sp.sympify(y0), numeric, time_budget)
+        result["confirmed"] = confirmed
+        if confirmed and exact is not None and exact.is_finite:
+            result["exact_latex"] = sp.latex(exact)
+
+    return result
+
+
+def limit_value_text(result):
+    """
+    Convert an estimate_limit result into the legacy "limit_value" string of /analyze_domain.
+    """
+    status = result.get("status")
+    if status == "exists":
+        return str(float(result["value"]))
+    if status in ("infinity", "-infinity"):
+        return status
+    return "undefined"
@@ -0,0 +1,142 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+import time
+import uuid
+
+from flask import g as flask_g, has_request_context
+
+# Registro estructurado sin bloquear el hilo de la solicitud: los registros se encolan con
+# put_nowait y un hilo de fondo (QueueListener) los serializa en JSON y los escribe en stderr.
+# Cada solicitud deja un registro de acceso con su id, operación, estado y duración; las
+# solicitudes correctas y rápidas se muestrean, los errores y las lentas se registran siempre.
+
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+# Fracción de solicitudes correctas (2xx/3xx, no lentas) que se registran
+LOG_SAMPLE_RATE = float(os.environ.get("LOG_SAMPLE_RATE", "0.1"))
+# A partir de esta duración (ms) una solicitud se registra siempre, con su cuerpo
+LOG_SLOW_MS = float(os.environ.get("LOG_SLOW_MS", "1000"))
+LOG_QUEUE_SIZE = int(os.environ.get("LOG_QUEUE_SIZE", "10000"))
+# Longitud máxima del cuerpo incluido en los registros de errores y solicitudes lentas
+MAX_PAYLOAD_CHARS = 2000
+
+REQUEST_ID_HEADER = "X-Request-ID"
+
+# Atributos estándar de LogRecord que no se copian como campos extra
+_RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_listener = None
+_handler = None
+_lock = threading.Lock()
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per line: time, level, logger, message, request id and any extra fields.
+    """
+
+    def format(self, record):
+        out = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RESERVED and not key.startswith("_"):
+                out[key] = value
+        if record.exc_text:
+            out["exc"] = record.exc_text
+        return json.dumps(out, ensure_ascii=False, default=str)
+
+
+class _RequestContextFilter(logging.Filter):
+    # Añade el id de la solicitud en el hilo que registra (antes de pasar a la cola)
+    def filter(self, record):
+        if not hasattr(record, "request_id") and has_request_context():
+            record.request_id = flask_g.get("request_id")
+        return True
+
+
+class _NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that never blocks: when the queue is full the record is dropped and counted.
+    """
+
+    dropped = 0
+
+    def prepare(self, record):
+        # Solo se fija el mensaje y el traceback como texto; el JSON se arma en el hilo de fondo
+        record = logging.makeLogRecord(vars(record))
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            type(self).dropped += 1
+
+
+def configure_logging(level=LOG_LEVEL, stream=None):
+    """
+    Route the root logger through a bounded queue to a JSON stream handler on a background
+    thread. Safe to call several times (the app factory calls it on every create_app).
+    """
+    global _listener, _handler
+    with _lock:
+        root = logging.getLogger()
+        root.setLevel(level)
+        if _handler is not None:
+            return
+        target = logging.StreamHandler(stream or sys.stderr)
+        target.setFormatter(JsonFormatter())
+        _handler = _NonBlockingQueueHandler(queue.Queue(LOG_QUEUE_SIZE))
+        _handler.addFilter(_RequestContextFilter())
+        root.handlers = [_handler]
+        _listener = logging.handlers.QueueListener(_handler.queue, target, respect_handler_level=False)
+        _listener.start()
+        atexit.register(_listener.stop)
+
+
+def request_id(incoming=None):
+    """
+    Reuse a client/proxy supplied request id when it is sane, otherwise create a new one.
+    """
+    if incoming and len(incoming) <= 64 and incoming.replace("-", "").isalnum():
+        return incoming
+    return uuid.uuid4().hex[:16]
+
+
+def should_log(status, duration_ms, sample_rate=LOG_SAMPLE_RATE, slow_ms=LOG_SLOW_MS):
+    """
+    Decide whether an access record is written and whether it carries the full payload.
+
+    Returns (log, full): errors (status >= 400) and slow requests are always logged in
+    full; the rest are sampled at sample_rate without payload.
+    """
+    if status >= 400 or duration_ms >= slow_ms:
+        return True, True
+    return random.random() < sample_rate, False
+
+
+def payload_excerpt(data):
+    """
+    Compact JSON of a request payload, truncated to MAX_PAYLOAD_CHARS.
+    """
+    text = json.dumps(data, ensure_ascii=False, default=str, separators=(",", ":"))
+    return text if len(text) <= MAX_PAYLOAD_CHARS else text[:MAX_PAYLOAD_CHARS] + "…"
+
+
+def dropped_records():
+    return _NonBlockingQueueHandler.dropped
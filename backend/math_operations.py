@@ -1,5 +1,16 @@
+import math
+
+import numpy as np
 import sympy as sp
 
+from backend.analysis import ExpressionAnalysis, lam
+from backend.autodiff import newton_critical_points
+from backend.evaluator import compile_expression
+from backend.expression_parser import parse_expression, parse_number
+from backend.multivariable import MultiAnalysis, classify_hessians
+from backend.planner import planner
+from backend.polynomial import solve_polynomial_system
+
 # Módulo de operaciones matemáticas para cálculo multivariable.
 # Los comentarios están en español explicando la intención de cada función y pasos importantes.
 
@@ -11,15 +22,28 @@ def _parse_expression(expr_str):
     """
     Helper to safely parse a string expression into a SymPy object.
 
+    Already parsed SymPy expressions are returned unchanged.
     Returns a SymPy expression or raises an Exception.
     """
-    # Convierte la cadena a una expresión simbólica y maneja errores de parseo
+    # Convierte la cadena a una expresión simbólica con el parser propio (sin eval) y maneja errores
+    if isinstance(expr_str, sp.Basic):
+        return expr_str
     try:
-        return sp.sympify(expr_str)
+        return parse_expression(expr_str)
     except Exception as exc:
         raise ValueError(f"Invalid expression: {exc}")
 
 
+def _analysis(expression):
+    """
+    Helper to obtain the request-scoped ExpressionAnalysis for a string, SymPy expression
+    or an existing analysis (which is reused so nothing is recomputed).
+    """
+    if isinstance(expression, ExpressionAnalysis):
+        return expression
+    return ExpressionAnalysis(_parse_expression(expression))
+
+
 def _to_string(value):
     """
     Helper to convert SymPy objects or Python values into a clean string.
@@ -37,10 +61,8 @@ def calculate_partials(expression):
     """
     # Calcula las derivadas parciales respecto a x e y, devolviendo una representación en texto
     try:
-        expr = _parse_expression(expression)
-        fx = sp.diff(expr, x)
-        fy = sp.diff(expr, y)
-        return _to_string(f"df/dx = {fx}, df/dy = {fy}")
+        a = _analysis(expression)
+        return _to_string(f"df/dx = {a.fx}, df/dy = {a.fy}")
     except Exception as exc:
         return _to_string(f"Error: {exc}")
 
@@ -51,10 +73,8 @@ def calculate_gradient(expression):
     """
     # Calcula el gradiente como un par ordenado y lo devuelve en formato string
     try:
-        expr = _parse_expression(expression)
-        fx = sp.diff(expr, x)
-        fy = sp.diff(expr, y)
-        return _to_string(f"({fx}, {fy})")
+        a = _analysis(expression)
+        return _to_string(f"({a.fx}, {a.fy})")
     except Exception as exc:
         return _to_string(f"Error: {exc}")
 
@@ -65,10 +85,9 @@ def evaluate_function(expression, x0, y0):
     """
     # Evalúa la función en el punto dado, usando sustitución simbólica y conversión numérica
     try:
-        expr = _parse_expression(expression)
-        val = expr.subs({x: sp.sympify(x0), y: sp.sympify(y0)})
+        a = _analysis(expression)
         # Intenta obtener una evaluación numérica si es posible
-        val_num = sp.N(val)
+        val_num = a.value_at(parse_number(x0), parse_number(y0))
         return _to_string(val_num)
     except Exception as exc:
         return _to_string(f"Error: {exc}")
@@ -86,32 +105,53 @@ def calculate_double_integral(expression, x_limits=None, y_limits=None):
     """
     # Comentario: Manejo de integrales dobles, devolviendo salida estructurada
     try:
-        expr = _parse_expression(expression)
+        a = _analysis(expression)
+        expr = a.f
 
         is_def_x = isinstance(x_limits, (list, tuple)) and len(x_limits) == 2
         is_def_y = isinstance(y_limits, (list, tuple)) and len(y_limits) == 2
 
         if is_def_x and is_def_y:
             # Comentario: Integración definida ∫∫ f dy dx (primero en y, luego en x)
-            ax, bx = sp.sympify(x_limits[0]), sp.sympify(x_limits[1])
-            ay, by = sp.sympify(y_limits[0]), sp.sympify(y_limits[1])
+            ax, bx = parse_number(x_limits[0]), parse_number(x_limits[1])
+            ay, by = parse_number(y_limits[0]), parse_number(y_limits[1])
 
-            inner_def = sp.integrate(expr, (y, ay, by))  # ∫_y f(x,y) dy con límites
-            outer_def = sp.integrate(inner_def, (x, ax, bx))  # ∫_x [∫_y f dy] dx con límites
-            simplified = sp.simplify(outer_def)
+            # El planificador elige entre ∫∫ simbólica (con simplificación) y Gauss-Legendre
+            planned = a.double_integral(ax, bx, ay, by)
+            simplified = planned["value"]
             approx = float(sp.N(simplified))
 
             # Construye pasos didácticos en español
-            steps = [
-                f"1️⃣ Se identifica la función f(x,y) = {expr}.",
-                f"2️⃣ Primero se integra respecto a y entre {ay} y {by}: ∫_{{y={ay}}}^{{{by}}} f(x,y) dy = {inner_def}.",
-                f"3️⃣ Luego se integra respecto a x entre {ax} y {bx}: ∫_{{x={ax}}}^{{{bx}}} [∫ f dy] dx = {outer_def}.",
-                "4️⃣ Finalmente, se simplifica la expresión y se obtiene una aproximación numérica."
-            ]
+            if planned["inner"] is not None:
+                inner_def, outer_def = planned["inner"], planned["outer"]
+                # Orden usado: dy dx, o dx dy si ese orden ganó la carrera con la primera forma cerrada
+                if planned["order"] == "dx dy":
+                    first, a1, b1, second, a2, b2 = "x", ax, bx, "y", ay, by
+                else:
+                    first, a1, b1, second, a2, b2 = "y", ay, by, "x", ax, bx
+                order_note = f" (orden {planned['order']})" if planned.get("race") else ""
+                steps = [
+                    f"1️⃣ Se identifica la función f(x,y) = {expr}.",
+                    f"2️⃣ Primero se integra respecto a {first} entre {a1} y {b1}{order_note}: "
+                    f"∫_{{{first}={a1}}}^{{{b1}}} f(x,y) d{first} = {inner_def}.",
+                    f"3️⃣ Luego se integra respecto a {second} entre {a2} y {b2}: "
+                    f"∫_{{{second}={a2}}}^{{{b2}}} [∫ f d{first}] d{second} = {outer_def}.",
+                    "4️⃣ Finalmente, se simplifica la expresión y se obtiene una aproximación numérica "
+                    f"(simplificación: {planned['simplification']})."
+                ]
+            else:
+                steps = [
+                    f"1️⃣ Se identifica la función f(x,y) = {expr}.",
+                    "2️⃣ La antiderivada probablemente no es elemental, así que se integra numéricamente.",
+                    f"3️⃣ Se aplica la cuadratura de Gauss-Legendre en el rectángulo [{ax}, {bx}] × [{ay}, {by}], "
+                    f"duplicando los nodos hasta que dos reglas coinciden (error estimado {planned['error']:.1e}).",
+                    f"4️⃣ Resultado numérico: {approx}."
+                ]
+            order_text = "en x y luego en y" if planned["order"] == "dx dy" else "en y y luego en x"
             explanation = (
                 "La integral doble definida calcula el volumen bajo la superficie z = f(x,y) "
-                "sobre el rectángulo determinado por los límites de x e y. Primero se integra en y "
-                "y luego en x, aplicando los límites para evaluar el resultado."
+                f"sobre el rectángulo determinado por los límites de x e y. Primero se integra {order_text}, "
+                "aplicando los límites para evaluar el resultado."
             )
 
             return {
@@ -120,11 +160,15 @@ def calculate_double_integral(expression, x_limits=None, y_limits=None):
                 "approx": approx,
                 "steps": steps,
                 "explanation": explanation,
+                "simplification": planned["simplification"],
+                "integration_order": planned["order"],
+                "race": planned["race"],
+                "plan": planned["plan"],
             }
         else:
             # Comentario: Integración indefinida (antiderivada iterada): primero en y, luego en x
-            inner = sp.integrate(expr, y)  # ∫ f dy
-            outer = sp.integrate(inner, x)  # ∫(∫ f dy) dx
+            inner = a.integral_y  # ∫ f dy
+            outer = a.integral_yx  # ∫(∫ f dy) dx
 
             # Pasos y explicación para modo indefinido
             steps = [
@@ -156,16 +200,11 @@ def lagrange_method(expression, constraint):
     """
     # Aplica el método de multiplicadores de Lagrange para encontrar puntos críticos con una restricción
     try:
-        f = _parse_expression(expression)
+        a = _analysis(expression)
         g = _parse_expression(constraint)
-        lam = sp.symbols('lambda')
 
-        L = f + lam * g
-        eq1 = sp.Eq(sp.diff(L, x), 0)
-        eq2 = sp.Eq(sp.diff(L, y), 0)
-        eq3 = sp.Eq(g, 0)
-
-        solutions = sp.solve((eq1, eq2, eq3), (x, y, lam), dict=True)
+        # Sistema ∂L/∂x = 0, ∂L/∂y = 0, g = 0 con L = f + λg (compartido con la capa de presentación)
+        solutions = a.lagrange(g)["solutions"]
 
         if not solutions:
             return _to_string("No critical points found")
@@ -183,113 +222,115 @@ def lagrange_method(expression, constraint):
         return _to_string(f"Error: {exc}")
 
 
-def calculate_unconstrained_optimization(expression):
+def calculate_unconstrained_optimization(expression, presentation=True):
     """
     Compute unconstrained optimization for f(x,y):
     - Find critical points solving ∇f = 0
     - Compute Hessian at each point
     - Classify points using determinant D = f_xx*f_yy - (f_xy)^2 and f_xx
 
-    Returns a structured dict ready for JSON serialization.
+    Returns a structured dict ready for JSON serialization. With presentation=False the
+    gradient LaTeX and the explanation are not built (compact mode).
     """
     # Comentario: Optimización sin restricciones usando SymPy, con fallback numérico cuando sea necesario
     try:
-        f = _parse_expression(expression)
+        a = _analysis(expression)
+        f = a.f
 
         # Derivadas de primer y segundo orden
-        fx = sp.diff(f, x)
-        fy = sp.diff(f, y)
-        fxx = sp.diff(fx, x)
-        fyy = sp.diff(fy, y)
-        fxy = sp.diff(fx, y)
-
-        # Intentar resolver ∇f=0 simbólicamente
-        solutions = []
-        try:
-            sols = sp.solve((sp.Eq(fx, 0), sp.Eq(fy, 0)), (x, y), dict=True)
-            for sol in sols:
-                xs = sol.get(x, None)
-                ys = sol.get(y, None)
-                # Filtrar soluciones simbólicas no numéricas; intentar evaluar
+        fx, fy = a.fx, a.fy
+        fxx, fyy, fxy = a.fxx, a.fyy, a.fxy
+
+        # El planificador decide el orden: vía polinomial (Gröbner), sp.solve o Newton con AD
+        def polynomial():
+            points = solve_polynomial_system([fx, fy], (x, y))
+            return list(points) if points is not None else None
+
+        def symbolic():
+            points = []
+            for sol in sp.solve((sp.Eq(fx, 0), sp.Eq(fy, 0)), (x, y), dict=True):
+                xs, ys = sol.get(x, None), sol.get(y, None)
+                # Filtrar soluciones simbólicas no numéricas (paramétricas o complejas)
                 if xs is None or ys is None:
                     continue
                 try:
-                    xsn = float(sp.N(xs))
-                    ysn = float(sp.N(ys))
-                    solutions.append((xsn, ysn))
-                except Exception:
-                    # Mantener solución si es racional/exacta y evaluable después
-                    try:
-                        xsn = float(sp.N(sp.sympify(xs)))
-                        ysn = float(sp.N(sp.sympify(ys)))
-                        solutions.append((xsn, ysn))
-                    except Exception:
-                        continue
-        except Exception:
-            solutions = []
+                    points.append((float(sp.N(xs)), float(sp.N(ys))))
+                except (TypeError, ValueError):
+                    continue
+            return points or None
 
-        # Si no hay soluciones simbólicas, usar búsqueda numérica con nsolve desde semillas
-        if not solutions:
-            seeds = []
-            # Comentario: Generar semillas en una rejilla moderada para buscar raíces del gradiente
-            for sx in [-2.0, -1.0, 0.0, 1.0, 2.0]:
-                for sy in [-2.0, -1.0, 0.0, 1.0, 2.0]:
-                    seeds.append((sx, sy))
-            eqs = [fx, fy]
-            for (sx, sy) in seeds:
+        def numeric():
+            # Comentario: Semillas en una rejilla moderada para buscar raíces del gradiente
+            seeds = [(sx, sy) for sx in [-2.0, -1.0, 0.0, 1.0, 2.0] for sy in [-2.0, -1.0, 0.0, 1.0, 2.0]]
+            return newton_critical_points(f, (x, y), seeds) or None
+
+        plan = planner.plan("optimize", [fx, fy], (x, y))
+        solutions, solver = planner.run(plan, {"polynomial": polynomial, "symbolic": symbolic, "numeric": numeric})
+        solutions = solutions or []
+        solver = solver or plan["order"][-1]
+
+        # Clasificar puntos usando la prueba de la segunda derivada
+        # Comentario: f y el Hessiano se evalúan en todos los puntos a la vez con el kernel fusionado (CSE)
+        try:
+            if solutions:
+                pts = np.array(solutions, dtype=float)
+                fv, _, _, fxxv, fyyv, fxyv = a.kernel(pts[:, 0], pts[:, 1])
+                jets = [tuple(float(v) for v in row) for row in zip(fv, fxxv, fyyv, fxyv)]
+            else:
+                jets = []
+        except Exception:
+            jets = []
+            for (px, py) in solutions:
+                point = {x: px, y: py}
                 try:
-                    root = sp.nsolve(eqs, (x, y), (sx, sy), tol=1e-12, maxsteps=100)
-                    rx = float(root[0])
-                    ry = float(root[1])
-                    # Evitar duplicados por cercanía
-                    if all((abs(rx - px) > 1e-6 or abs(ry - py) > 1e-6) for (px, py) in solutions):
-                        solutions.append((rx, ry))
+                    jets.append(tuple(float(sp.N(e.subs(point))) for e in (f, fxx, fyy, fxy)))
                 except Exception:
-                    continue
+                    jets.append(None)
 
-        # Clasificar puntos usando la prueba de la segunda derivada
         results = []
-        for (px, py) in solutions:
-            try:
-                # Evaluar Hessiano y determinante en el punto
-                fxxv = float(sp.N(fxx.subs({x: px, y: py})))
-                fyyv = float(sp.N(fyy.subs({x: px, y: py})))
-                fxyv = float(sp.N(fxy.subs({x: px, y: py})))
-                D = fxxv * fyyv - (fxyv ** 2)
-                # Evaluar f en el punto
-                fv = float(sp.N(f.subs({x: px, y: py})))
-
-                # Clasificación según D y f_xx
-                if D > 1e-10 and fxxv > 0:
-                    cls = "Mínimo local"
-                    color = "green"
-                elif D > 1e-10 and fxxv < 0:
-                    cls = "Máximo local"
-                    color = "blue"
-                elif abs(D) <= 1e-10:
-                    cls = "Prueba inconclusa"
-                    color = "orange"
-                else:
-                    cls = "Punto de silla"
-                    color = "red"
-
-                results.append({
-                    "x": px,
-                    "y": py,
-                    "f": fv,
-                    "classification": cls,
-                    "color": color,
-                    "determinant": D,
-                    "fxx": fxxv,
-                    "fyy": fyyv,
-                    "fxy": fxyv,
-                })
-            except Exception:
+        for (px, py), jet in zip(solutions, jets):
+            if jet is None or not all(math.isfinite(v) for v in jet):
                 continue
+            fv, fxxv, fyyv, fxyv = jet
+            D = fxxv * fyyv - (fxyv ** 2)
+
+            # Clasificación según D y f_xx
+            if D > 1e-10 and fxxv > 0:
+                cls = "Mínimo local"
+                color = "green"
+            elif D > 1e-10 and fxxv < 0:
+                cls = "Máximo local"
+                color = "blue"
+            elif abs(D) <= 1e-10:
+                cls = "Prueba inconclusa"
+                color = "orange"
+            else:
+                cls = "Punto de silla"
+                color = "red"
+
+            results.append({
+                "x": px,
+                "y": py,
+                "f": fv,
+                "classification": cls,
+                "color": color,
+                "determinant": D,
+                "fxx": fxxv,
+                "fyy": fyyv,
+                "fxy": fxyv,
+            })
+
+        result = {
+            "critical_points": results,
+            "solver": solver,
+            "plan": plan,
+        }
+        if not presentation:
+            return result
 
         # Construir explicación textual
-        latex_fx = sp.latex(fx)
-        latex_fy = sp.latex(fy)
+        latex_fx = a.tex(fx)
+        latex_fy = a.tex(fy)
         explanation = (
             "Se resuelve el sistema ∇f = 0 para encontrar puntos críticos. "
             "Luego se calcula el Hessiano H y el determinante D = f_{xx} f_{yy} - (f_{xy})^2. "
@@ -299,8 +340,131 @@ def calculate_unconstrained_optimization(expression):
 
         return {
             "gradient_latex": rf"\\nabla f = \left( {latex_fx},\; {latex_fy} \right)",
-            "critical_points": results,
+            **result,
             "explanation": explanation,
         }
     except Exception as exc:
-        return {"error": _to_string(f"Error: {exc}")}
\ No newline at end of file
+        return {"error": _to_string(f"Error: {exc}")}
+
+def _multi_analysis(expression, variables=None):
+    """
+    Helper to obtain a MultiAnalysis for f(v1, ..., vn), reusing an existing one.
+    """
+    if isinstance(expression, MultiAnalysis):
+        return expression
+    return MultiAnalysis(_parse_expression_n(expression, variables), variables)
+
+
+def _parse_expression_n(expr_str, variables=None):
+    # Igual que _parse_expression pero con detección automática de variables
+    if isinstance(expr_str, sp.Basic):
+        return expr_str
+    try:
+        return parse_expression(expr_str, variables=variables)
+    except Exception as exc:
+        raise ValueError(f"Invalid expression: {exc}")
+
+
+def calculate_gradient_n(expression, variables=None):
+    """
+    Gradient and distinct Hessian entries of f(v1, ..., vn).
+
+    Returns a dict with the variables, the gradient components and the Hessian entries
+    (upper triangle only, keyed "i,j") as strings.
+    """
+    # Comentario: Gradiente y Hessiana simbólicos para cualquier número de variables
+    try:
+        m = _multi_analysis(expression, variables)
+        return {
+            "variables": [str(v) for v in m.variables],
+            "gradient": [_to_string(g) for g in m.gradient],
+            "hessian_entries": {f"{i},{j}": _to_string(e) for (i, j), e in m.hessian_entries.items()},
+        }
+    except Exception as exc:
+        return {"error": _to_string(f"Error: {exc}")}
+
+
+def calculate_optimization_n(expression, variables=None):
+    """
+    Unconstrained optimization for f(v1, ..., vn): solve ∇f = 0 and classify every critical
+    point by the eigenvalues of its Hessian (all evaluated in one vectorized pass).
+    """
+    # Comentario: Generalización de calculate_unconstrained_optimization a n variables
+    try:
+        m = _multi_analysis(expression, variables)
+        if m.n == 0:
+            return {"error": "Error: the expression has no variables"}
+        points, solver = m.critical_points()
+        results = []
+        if points:
+            values, _, hessians = m.evaluate(points)
+            ok = np.isfinite(values) & np.isfinite(hessians).all(axis=(1, 2))
+            labels, colors, eig = classify_hessians(np.where(ok[:, None, None], hessians, 0.0))
+            for k, p in enumerate(points):
+                if not ok[k]:
+                    continue
+                results.append({
+                    "point": {str(v): float(c) for v, c in zip(m.variables, p)},
+                    "f": float(values[k]),
+                    "classification": labels[k],
+                    "color": colors[k],
+                    "eigenvalues": [float(e) for e in eig[k]],
+                })
+        return {
+            "variables": [str(v) for v in m.variables],
+            "critical_points": results,
+            "solver": solver,
+            "plan": m.critical_plan,
+        }
+    except Exception as exc:
+        return {"error": _to_string(f"Error: {exc}")}
+
+
+def lagrange_method_n(expression, constraints, variables=None):
+    """
+    Lagrange multipliers for f(v1, ..., vn) with several constraints g_k = 0.
+
+    Returns a dict with the candidate points, their multipliers and f values, and the
+    solver used.
+    """
+    # Comentario: L = f + Σ λ_k g_k; se resuelve ∇L = 0 en las variables y los multiplicadores
+    try:
+        m = _multi_analysis(expression, variables)
+        gs = [_parse_expression_n(g, variables) for g in constraints]
+        system = m.lagrange(gs)
+        lams = system["multipliers"]
+        F = compile_expression(m.f, m.variables)
+        results = []
+        for sol in system["solutions"]:
+            # Comentario: Solo soluciones reales (la parte imaginaria debe ser despreciable)
+            values = [complex(sp.N(c)) for c in sol]
+            if any(abs(v.imag) > 1e-12 * (1.0 + abs(v.real)) for v in values):
+                continue
+            # Comentario: Se anulan residuos numéricos despreciables (p. ej. 1e-28 en un multiplicador)
+            sol = [c if abs(v.real) > 1e-12 else sp.S.Zero for c, v in zip(sol, values)]
+            coords = [v.real if abs(v.real) > 1e-12 else 0.0 for v in values[:m.n]]
+            fv = float(F(*coords))
+            results.append({
+                "point": {str(v): c for v, c in zip(m.variables, coords)},
+                "multipliers": {str(l): v.real if abs(v.real) > 1e-12 else 0.0 for l, v in zip(lams, values[m.n:])},
+                "f": fv if math.isfinite(fv) else None,
+                "exact": [_to_string(c) for c in sol],
+            })
+        # Comentario: Entre los candidatos se marcan el mayor y el menor valor de f; con un solo
+        # candidato (o todos con el mismo valor, salvo redondeo) no hay con qué comparar y no se marca ninguno
+        finite = [r for r in results if r["f"] is not None]
+        if len(finite) >= 2:
+            highest = max(finite, key=lambda r: r["f"])
+            lowest = min(finite, key=lambda r: r["f"])
+            if highest["f"] - lowest["f"] > 1e-9 * (1.0 + abs(highest["f"]) + abs(lowest["f"])):
+                highest["extreme"] = "max"
+                lowest["extreme"] = "min"
+        return {
+            "variables": [str(v) for v in m.variables],
+            "multipliers": [str(l) for l in lams],
+            "critical_points": results,
+            "solver": system["solver"],
+            "plan": system["plan"],
+        }
+    except Exception as exc:
+        return {"error": _to_string(f"Error: {exc}")}
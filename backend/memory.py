@@ -0,0 +1,183 @@
+import gc
+import os
+import threading
+import time
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - Windows
+    resource = None
+
+from sympy.core import cache as sympy_cache
+
+# Gobierno de memoria para procesos de larga duración: registro de cachés (propias y de SymPy),
+# medición de la memoria residente (RSS) y limpieza periódica. Si tras limpiar el proceso sigue
+# por encima del umbral, o alcanza el máximo de solicitudes, se pide su reciclaje al supervisor
+# (backend/supervisor.py), que arranca un reemplazo y deja terminar al actual sin cortar solicitudes.
+
+MB = 1 << 20
+
+# Por encima de este RSS se vacían todas las cachés
+MEMORY_SOFT_LIMIT = int(float(os.environ.get("MEMORY_SOFT_LIMIT_MB", "280")) * MB)
+# Si después de limpiar el RSS sigue por encima de este valor se recicla el proceso
+MEMORY_RECYCLE_LIMIT = int(float(os.environ.get("MEMORY_RECYCLE_MB", "380")) * MB)
+# Solicitudes atendidas antes de reciclar el proceso (0 = sin límite)
+MAX_REQUESTS = int(os.environ.get("MAX_REQUESTS_PER_WORKER", "20000"))
+# La caché global de SymPy se vacía cada tantas solicitudes aunque haya memoria de sobra
+SYMPY_CLEAR_EVERY = int(os.environ.get("SYMPY_CLEAR_EVERY", "1000"))
+# Cada cuántas solicitudes se lee el RSS
+CHECK_EVERY = int(os.environ.get("MEMORY_CHECK_EVERY", "20"))
+# Separación mínima (s) entre limpiezas por RSS: el RSS no siempre baja al liberar objetos
+MIN_CLEAR_INTERVAL = 30.0
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+def register_cache(name, stats, clear):
+    """
+    Register a process-wide cache: stats() returns a dict (ideally with "entries" and
+    "bytes"), clear() empties it. Registered caches are reported and cleared by the governor.
+    """
+    with _registry_lock:
+        _registry[name] = (stats, clear)
+
+
+def rss_bytes():
+    """
+    Current resident set size of this process (falls back to the peak where /proc is missing).
+    """
+    try:
+        with open("/proc/self/statm", encoding="ascii") as fh:
+            return int(fh.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return peak_rss_bytes()
+
+
+def peak_rss_bytes():
+    # ru_maxrss está en KiB en Linux; sin el módulo resource no hay medición (0)
+    if resource is None:
+        return 0
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def sympy_cache_stats():
+    """
+    Entry counts of SymPy's global memoization caches (one LRU per cached function).
+    """
+    entries = hits = misses = 0
+    maxsize = None
+    for fn in getattr(sympy_cache, "CACHE", ()):
+        try:
+            info = fn.cache_info()
+        except AttributeError:
+            continue
+        entries += info.currsize
+        hits += info.hits
+        misses += info.misses
+        maxsize = info.maxsize
+    return {"functions": len(getattr(sympy_cache, "CACHE", ())), "entries": entries, "hits": hits,
+            "misses": misses, "maxsize_per_function": maxsize}
+
+
+def cache_report():
+    with _registry_lock:
+        caches = dict(_registry)
+    report = {"sympy": sympy_cache_stats()}
+    for name, (stats, _) in caches.items():
+        report[name] = stats()
+    return report
+
+
+def clear_caches(own=True):
+    """
+    Clear SymPy's cache and, with own=True, every registered cache; then run the collector.
+    """
+    sympy_cache.clear_cache()
+    if own:
+        with _registry_lock:
+            clears = [clear for _, clear in _registry.values()]
+        for clear in clears:
+            clear()
+    gc.collect()
+
+
+class MemoryGovernor:
+    """
+    Counts finished requests and periodically checks memory.
+
+    Every CHECK_EVERY requests the RSS is read: above soft_limit all caches are cleared;
+    if it is still above recycle_limit afterwards, or max_requests has been reached, the
+    on_recycle callback is called once with the reason (the supervised worker installs one
+    that asks the supervisor for a replacement).
+    """
+
+    def __init__(self, soft_limit=MEMORY_SOFT_LIMIT, recycle_limit=MEMORY_RECYCLE_LIMIT,
+                 max_requests=MAX_REQUESTS, sympy_clear_every=SYMPY_CLEAR_EVERY, check_every=CHECK_EVERY):
+        self.soft_limit = soft_limit
+        self.recycle_limit = recycle_limit
+        self.max_requests = max_requests
+        self.sympy_clear_every = sympy_clear_every
+        self.check_every = check_every
+        self.on_recycle = None
+        self.supervised = False
+        self.requests = 0
+        self.clears = 0
+        self.last_rss = rss_bytes()
+        self.recycle_reason = None
+        self.started = time.time()
+        self._last_clear = 0.0
+        self._lock = threading.Lock()
+
+    def request_done(self):
+        with self._lock:
+            self.requests += 1
+            n = self.requests
+        if self.sympy_clear_every and n % self.sympy_clear_every == 0:
+            clear_caches(own=False)
+        if n % self.check_every == 0 or (self.max_requests and n >= self.max_requests):
+            self.check()
+
+    def check(self):
+        """
+        Read the RSS, clear caches above the soft limit and request a recycle if needed.
+        """
+        rss = self.last_rss = rss_bytes()
+        if rss > self.soft_limit and time.monotonic() - self._last_clear >= MIN_CLEAR_INTERVAL:
+            clear_caches()
+            with self._lock:
+                self.clears += 1
+                self._last_clear = time.monotonic()
+            rss = self.last_rss = rss_bytes()
+        reason = None
+        if rss > self.recycle_limit:
+            reason = f"rss {rss // MB} MB > {self.recycle_limit // MB} MB"
+        elif self.max_requests and self.requests >= self.max_requests:
+            reason = f"{self.requests} requests"
+        if reason is not None:
+            with self._lock:
+                first = self.recycle_reason is None
+                if first:
+                    self.recycle_reason = reason
+            if first and self.on_recycle is not None:
+                self.on_recycle(reason)
+        return rss
+
+    def report(self):
+        return {
+            "pid": os.getpid(),
+            "rss_bytes": rss_bytes(),
+            "peak_rss_bytes": peak_rss_bytes(),
+            "uptime_s": round(time.time() - self.started, 1),
+            "requests": self.requests,
+            "cache_clears": self.clears,
+            "recycle_reason": self.recycle_reason,
+            "supervised": self.supervised,
+            "limits": {
+                "soft_bytes": self.soft_limit, "recycle_bytes": self.recycle_limit,
+                "max_requests": self.max_requests, "sympy_clear_every": self.sympy_clear_every,
+            },
+            "caches": cache_report(),
+        }
@@ -0,0 +1,184 @@
+from functools import cached_property
+
+import numpy as np
+import sympy as sp
+
+from backend.autodiff import newton_critical_points
+from backend.evaluator import compile_kernel
+from backend.expression_parser import order_variables, parse_expression
+from backend.incremental import memo_diff, memo_latex
+from backend.planner import planner
+from backend.polynomial import exact_or_float, solve_polynomial_system
+
+# Modo de n variables: gradiente, Hessiana, optimización y Lagrange con varias restricciones
+# para f(x, y, z, w, ...). Solo se derivan las entradas distintas de la Hessiana (i <= j) y
+# f, ∇f y esas entradas se compilan juntas en un kernel con subexpresiones comunes.
+
+# Semillas de Newton cuando el sistema no es polinomial
+SEED_BOX = 2.0
+SEEDS_PER_VARIABLE = 12
+
+# Tolerancia relativa para decidir el signo de los valores propios
+EIGEN_TOL = 1e-9
+
+
+def _seeds(n, count=None):
+    """
+    Deterministic Newton seeds in [-SEED_BOX, SEED_BOX]^n: the origin, the axis points and
+    a fixed pseudo-random sample.
+    """
+    count = count or SEEDS_PER_VARIABLE * n
+    rng = np.random.default_rng(0)
+    axes = np.concatenate([np.eye(n), -np.eye(n)]) * (SEED_BOX / 2)
+    sample = rng.uniform(-SEED_BOX, SEED_BOX, size=(count, n))
+    return np.concatenate([np.zeros((1, n)), axes, sample])
+
+
+def classify_hessians(hessians):
+    """
+    Classify stacked Hessians (P, n, n) by their eigenvalues in one vectorized call.
+
+    Returns (labels, colors, eigenvalues) using the same Spanish labels as the 2D optimizer.
+    """
+    eig = np.linalg.eigvalsh(hessians)
+    scale = 1.0 + np.abs(eig).max(axis=1, initial=0.0)
+    pos = eig > EIGEN_TOL * scale[:, None]
+    neg = eig < -EIGEN_TOL * scale[:, None]
+    labels, colors = [], []
+    for p, q in zip(pos, neg):
+        if p.all():
+            labels.append("Mínimo local")
+            colors.append("green")
+        elif q.all():
+            labels.append("Máximo local")
+            colors.append("blue")
+        elif p.any() and q.any():
+            labels.append("Punto de silla")
+            colors.append("red")
+        else:
+            labels.append("Prueba inconclusa")
+            colors.append("orange")
+    return labels, colors, eig
+
+
+class MultiAnalysis:
+    """
+    Lazily computed derivatives of f(v1, ..., vn) for an arbitrary list of variables.
+
+    Only the n(n+1)/2 distinct Hessian entries are differentiated; f, the gradient and
+    those entries are evaluated together by a single fused NumPy kernel.
+    """
+
+    def __init__(self, expr, variables=None):
+        self.f = expr if isinstance(expr, sp.Basic) else parse_expression(expr, variables=variables)
+        if variables is None:
+            self.variables = order_variables(self.f.free_symbols)
+        else:
+            self.variables = tuple(sp.Symbol(v) if isinstance(v, str) else v for v in variables)
+        self._memo = {}
+
+    @property
+    def n(self):
+        return len(self.variables)
+
+    @cached_property
+    def gradient(self):
+        return [memo_diff(self.f, v) for v in self.variables]
+
+    @cached_property
+    def hessian_entries(self):
+        """
+        Distinct Hessian entries as a dict {(i, j): expr} with i <= j.
+        """
+        entries = {}
+        for i in range(self.n):
+            for j in range(i, self.n):
+                entries[(i, j)] = memo_diff(self.gradient[i], self.variables[j])
+        return entries
+
+    @cached_property
+    def hessian(self):
+        H = sp.zeros(self.n, self.n)
+        for (i, j), e in self.hessian_entries.items():
+            H[i, j] = H[j, i] = e
+        return sp.ImmutableMatrix(H)
+
+    @cached_property
+    def kernel(self):
+        # Un solo kernel para f, ∇f y la mitad superior de la Hessiana
+        exprs = [self.f] + self.gradient + list(self.hessian_entries.values())
+        return compile_kernel(exprs, self.variables)
+
+    def evaluate(self, points):
+        """
+        Evaluate f, ∇f and the Hessian at points of shape (P, n).
+
+        Returns arrays with shapes (P,), (P, n) and (P, n, n).
+        """
+        pts = np.atleast_2d(np.asarray(points, dtype=float))
+        outs = self.kernel(*pts.T)
+        n = self.n
+        values = outs[0]
+        grads = np.stack(outs[1:1 + n], axis=1)
+        hess = np.empty((len(pts), n, n))
+        for k, (i, j) in enumerate(self.hessian_entries):
+            hess[:, i, j] = hess[:, j, i] = outs[1 + n + k]
+        return values, grads, hess
+
+    def tex(self, value):
+        key = ("tex", value)
+        if key not in self._memo:
+            self._memo[key] = memo_latex(value) if isinstance(value, sp.Basic) else sp.latex(value)
+        return self._memo[key]
+
+    def critical_points(self):
+        """
+        Solve ∇f = 0 and return (points, solver) with solver "polynomial" or "numeric".
+        The executed plan is available as critical_plan.
+        """
+        if "critical" not in self._memo:
+            plan = planner.plan("optimize_n", self.gradient, self.variables)
+            points, solver = planner.run(plan, {
+                "polynomial": lambda: solve_polynomial_system(self.gradient, self.variables),
+                "numeric": lambda: newton_critical_points(self.f, self.variables, _seeds(self.n)) or None,
+            })
+            self._memo["critical"] = (points or [], solver or plan["order"][-1])
+            self._memo["critical_plan"] = plan
+        return self._memo["critical"]
+
+    @property
+    def critical_plan(self):
+        self.critical_points()
+        return self._memo["critical_plan"]
+
+    def lagrange(self, constraints):
+        """
+        Lagrange system for several constraints g_k = 0 with multipliers lambda_1..lambda_m.
+
+        Returns a dict with the Lagrangian, the multiplier symbols, the equations ∇L = 0,
+        the solutions as tuples ordered like variables + multipliers, and the solver used.
+        """
+        constraints = tuple(constraints)
+        key = ("lagrange", constraints)
+        if key not in self._memo:
+            m = len(constraints)
+            lams = sp.symbols(f"lambda1:{m + 1}") if m > 1 else (sp.Symbol("lambda"),)
+            L = self.f + sum(l * g for l, g in zip(lams, constraints))
+            unknowns = self.variables + tuple(lams)
+            equations = [memo_diff(L, v) for v in self.variables] + list(constraints)
+
+            def polynomial():
+                points = solve_polynomial_system(equations, unknowns)
+                return None if points is None else [exact_or_float(equations, unknowns, p) for p in points]
+
+            # Los puntos de Lagrange son puntos críticos de L en (v, λ): Newton con diferenciación automática
+            plan = planner.plan("lagrange_n", equations, unknowns)
+            solutions, solver = planner.run(plan, {
+                "polynomial": polynomial,
+                "numeric": lambda: newton_critical_points(L, unknowns, _seeds(len(unknowns))) or None,
+            })
+            self._memo[key] = {
+                "L": L, "multipliers": lams, "equations": equations,
+                "solutions": solutions or [], "solver": solver or plan["order"][-1], "plan": plan,
+            }
+        return self._memo[key]
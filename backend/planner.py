@@ -0,0 +1,284 @@
+import json
+import math
+import os
+import threading
+import time
+
+import sympy as sp
+
+from backend.polynomial import MAX_DEGREE, MAX_VARIABLES, degree_bound
+
+# Planificador de estrategias: antes de ejecutar una operación se inspecciona la expresión
+# (¿polinomio?, ¿antiderivada elemental probable?, tamaño tras derivar) y se decide el orden
+# de los algoritmos: vía polinomial, simbólica (sp.solve / sp.integrate) o numérica.
+# Los tiempos y fallos de cada ejecución se registran por tipo de expresión y ajustan el
+# orden de las siguientes. El cuerpo de la respuesta lleva solo la parte determinista del
+# plan (orden, rasgos, estrategia usada); los tiempos de cada intento viajan en la cabecera
+# Server-Timing y el historial se consulta en /metrics/planner.
+
+# Estrategias posibles por operación, en orden de preferencia cuando no hay historial
+STRATEGIES = {
+    "optimize": ("polynomial", "symbolic", "numeric"),
+    "lagrange": ("polynomial", "symbolic", "numeric"),
+    "definite_integral": ("symbolic", "numeric"),
+    "optimize_n": ("polynomial", "numeric"),
+    "lagrange_n": ("polynomial", "numeric"),
+}
+
+# Estimaciones iniciales (ms, probabilidad de éxito) antes de tener mediciones propias
+PRIORS = {
+    "polynomial": (30.0, 0.95),
+    "symbolic": (300.0, 0.7),
+    "numeric": (150.0, 0.9),
+}
+
+# Un resultado numérico es aproximado: solo se prefiere si el exacto es bastante más caro
+NUMERIC_PENALTY = 4.0
+# Probabilidad de éxito relativa de sp.integrate cuando la heurística no ve antiderivada elemental
+NON_ELEMENTARY_FACTOR = 0.2
+# Mediciones necesarias antes de confiar en el historial frente a las estimaciones iniciales
+MIN_SAMPLES = 3
+# Peso de la última medición en la media móvil
+EWMA_ALPHA = 0.3
+
+# Archivo opcional donde se conserva el historial entre reinicios
+STATS_PATH = os.environ.get("PLANNER_STATS_PATH")
+SAVE_INTERVAL = 30.0
+
+_TRANSCENDENTAL = (sp.exp, sp.sin, sp.cos, sp.tan, sp.sinh, sp.cosh, sp.tanh, sp.log)
+
+
+def _nodes(expr):
+    return sum(1 for _ in sp.preorder_traversal(expr))
+
+
+def _degree_in(expr, var):
+    # Grado de expr como polinomio en var (cota leída del árbol, sin expandir), o None
+    return degree_bound(expr, (var,))
+
+
+def likely_elementary(expr, var):
+    """
+    Heuristic: True when ∫ expr d(var) probably has an elementary closed form.
+
+    Polynomials, and products of polynomials with exp/trig/log of arguments linear in var,
+    pass; transcendental functions of nonlinear arguments (sin(x**2)) or divided by a
+    polynomial in var (sin(x)/x) do not.
+    """
+    if var not in expr.free_symbols or expr.is_polynomial(var):
+        return True
+    transcendental = algebraic = False
+    for sub in sp.preorder_traversal(expr):
+        if isinstance(sub, _TRANSCENDENTAL) and var in sub.free_symbols:
+            transcendental = True
+            degree = _degree_in(sub.args[0], var)
+            if degree is None or degree > 1:
+                return False
+        elif isinstance(sub, sp.Pow) and var in sub.base.free_symbols:
+            degree = _degree_in(sub.base, var)
+            if degree is None or (not sub.exp.is_Integer and degree > 2):
+                return False
+            # 1/p(var) y raíces se integran solas, pero no multiplicadas por exp/trig (Si, erf, Ei)
+            algebraic = algebraic or sub.exp.is_negative or not sub.exp.is_Integer
+    return not (transcendental and algebraic)
+
+
+def expression_features(exprs, variables, integrand=None):
+    """
+    Features the planner decides on: polynomial system?, total degree, tree sizes and,
+    for integrals, whether the antiderivative is likely elementary in every variable.
+    """
+    exprs = [e.lhs - e.rhs if isinstance(e, sp.Equality) else e for e in exprs]
+    variables = tuple(variables)
+    # Cota del grado sin expandir: sp.Poly desarrollaría (x+y+1)**200 solo para medirlo
+    degrees = [degree_bound(e, variables) if not (e.free_symbols - set(variables)) else None for e in exprs]
+    polynomial = None not in degrees
+    degree = max(degrees, default=0) if polynomial else None
+    features = {
+        "polynomial": polynomial,
+        "degree": degree,
+        "nodes": sum(_nodes(e) for e in exprs),
+    }
+    if integrand is not None:
+        features["nodes"] = _nodes(integrand)
+        features["elementary"] = all(likely_elementary(integrand, v) for v in variables)
+    return features
+
+
+def _signature(operation, features, n_variables):
+    # Clase de la expresión para el historial: grado si es polinomio, tamaño (log2) si no
+    if features["polynomial"]:
+        return f"{operation}|n{n_variables}|poly{min(features['degree'], 12)}"
+    size = int(math.log2(features["nodes"] + 1))
+    elementary = features.get("elementary")
+    tag = "" if elementary is None else ("|elem" if elementary else "|nonelem")
+    return f"{operation}|n{n_variables}|size{size}{tag}"
+
+
+class Planner:
+    """
+    Chooses the order in which an operation's strategies are tried and learns from timings.
+
+    For every (expression class, strategy) it keeps a moving average of the run time and of
+    the success rate; the expected cost of a strategy is its time divided by its success
+    rate (times NUMERIC_PENALTY for approximate strategies).
+    """
+
+    def __init__(self, path=STATS_PATH):
+        self.path = path
+        self.stats = {}
+        self._lock = threading.Lock()
+        self._saved = time.monotonic()
+        # Tiempos y reordenamientos de la solicitud en curso (uno por hilo de waitress)
+        self._request = threading.local()
+        if path:
+            try:
+                with open(path, encoding="utf-8") as fh:
+                    self.stats = json.load(fh)
+            except (OSError, ValueError):
+                self.stats = {}
+
+    def _applicable(self, operation, features, variables):
+        candidates = []
+        for strategy in STRATEGIES[operation]:
+            if strategy == "polynomial" and not (
+                    features["polynomial"] and features["degree"] <= MAX_DEGREE and len(variables) <= MAX_VARIABLES):
+                continue
+            candidates.append(strategy)
+        return candidates
+
+    def _expected(self, signature, strategy, features, learned=True):
+        # Devuelve (costo esperado, True si proviene del historial); learned=False usa solo PRIORS
+        entry = self.stats.get(f"{signature}|{strategy}") if learned else None
+        if entry and entry["n"] >= MIN_SAMPLES:
+            ms, success, learned = entry["ms"], entry["success"], True
+        else:
+            (ms, success), learned = PRIORS[strategy], False
+            if strategy == "symbolic" and features.get("elementary") is False:
+                # Sin antiderivada elemental probable, sp.integrate queda como último recurso
+                success *= NON_ELEMENTARY_FACTOR
+        cost = ms / max(success, 0.05)
+        return cost * (NUMERIC_PENALTY if strategy == "numeric" else 1.0), learned
+
+    def plan(self, operation, exprs, variables, integrand=None):
+        """
+        Inspect the expressions and return the plan dict: the strategy order and the features
+        it was based on.
+
+        When learned timings put the strategies in a different order than the priors, the
+        answer may come from another algorithm than the same request on a fresh server; the
+        request is then marked as reordered (see finish_request) so it is not cached.
+        """
+        variables = tuple(variables)
+        features = expression_features(exprs, variables, integrand)
+        signature = _signature(operation, features, len(variables))
+        candidates = self._applicable(operation, features, variables)
+        with self._lock:
+            expected = {s: self._expected(signature, s, features) for s in candidates}
+        # El orden estable conserva la preferencia por defecto cuando los costos empatan
+        order = sorted(candidates, key=lambda s: expected[s][0])
+        default = sorted(candidates, key=lambda s: self._expected(signature, s, features, learned=False)[0])
+        if order != default:
+            self._request.reordered = True
+        return {
+            "operation": operation,
+            "signature": signature,
+            "order": order,
+            "features": features,
+        }
+
+    def record(self, signature, strategy, elapsed_ms, ok):
+        with self._lock:
+            key = f"{signature}|{strategy}"
+            entry = self.stats.get(key)
+            if entry is None:
+                ms, success = PRIORS[strategy]
+                entry = self.stats[key] = {"n": 0, "ms": ms, "success": success}
+            alpha = 1.0 if entry["n"] == 0 else EWMA_ALPHA
+            entry["n"] += 1
+            entry["ms"] += alpha * (elapsed_ms - entry["ms"])
+            entry["success"] += alpha * ((1.0 if ok else 0.0) - entry["success"])
+            due = self.path and time.monotonic() - self._saved > SAVE_INTERVAL
+        if due:
+            self.save()
+
+    def run(self, plan, runners):
+        """
+        Try the planned strategies in order until one succeeds.
+
+        runners maps each strategy to a callable returning its result, or None when the
+        strategy gives no answer (the next one is then tried). Exceptions count as failures.
+        Returns (result, strategy used or None); the plan dict is completed with the
+        strategy and the outcome of each attempt. The attempt times are kept for the
+        request's Server-Timing header, not in the plan.
+        """
+        attempts = []
+        result, used = None, None
+        for strategy in plan["order"]:
+            t0 = time.perf_counter()
+            try:
+                result = runners[strategy]()
+            except Exception:
+                result = None
+            elapsed = (time.perf_counter() - t0) * 1e3
+            ok = result is not None
+            self.record(plan["signature"], strategy, elapsed, ok)
+            attempts.append({"strategy": strategy, "ok": ok})
+            self.note(f"{plan['operation']}-{strategy}", elapsed)
+            if ok:
+                used = strategy
+                break
+        plan["strategy"] = used
+        plan["attempts"] = attempts
+        return result, used
+
+    def note(self, name, elapsed_ms):
+        """
+        Add a timing to the Server-Timing header of the current request (if one is open).
+        """
+        timings = getattr(self._request, "timings", None)
+        if timings is not None:
+            timings.append((name, elapsed_ms))
+
+    def start_request(self):
+        """
+        Begin collecting the attempt timings of the request served by this thread.
+        """
+        self._request.timings = []
+        self._request.reordered = False
+
+    def finish_request(self):
+        """
+        Stop collecting and return (timings, reordered): the (name, ms) of every strategy
+        attempt of the request and whether any plan departed from the prior order.
+        """
+        timings = getattr(self._request, "timings", None) or []
+        reordered = getattr(self._request, "reordered", False)
+        self._request.timings = None
+        self._request.reordered = False
+        return timings, reordered
+
+    def save(self):
+        """
+        Write the timing history to the stats file (atomically), if one is configured.
+        """
+        if not self.path:
+            return
+        with self._lock:
+            data = json.dumps(self.stats, sort_keys=True)
+            self._saved = time.monotonic()
+        tmp = f"{self.path}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as fh:
+                fh.write(data)
+            os.replace(tmp, self.path)
+        except OSError:
+            pass
+
+    def snapshot(self):
+        with self._lock:
+            return {k: dict(v) for k, v in sorted(self.stats.items())}
+
+
+# Instancia compartida por todas las solicitudes del proceso
+planner = Planner()
@@ -0,0 +1,256 @@
+from fractions import Fraction
+
+import numpy as np
+import sympy as sp
+
+# Motor para sistemas polinomiales (puntos críticos y Lagrange).
+# Se elimina variables con una base de Gröbner en orden lexicográfico, se aíslan las
+# raíces reales del polinomio univariado resultante con intervalos racionales y se
+# sustituye hacia atrás; al final cada punto se pule con Newton sobre el sistema original.
+
+# Límites para no intentar Gröbner en sistemas demasiado grandes
+MAX_DEGREE = 10
+MAX_VARIABLES = 6
+
+# Tolerancias numéricas
+IMAG_TOL = 1e-7
+DEDUP_TOL = 1e-8
+
+
+# Nodos como máximo que recorre degree_bound antes de rendirse
+DEGREE_WALK_LIMIT = 2000
+
+
+def degree_bound(expr, variables, limit=DEGREE_WALK_LIMIT):
+    """
+    Upper bound of the total degree of expr in variables, read from the tree without expanding.
+
+    Sums take the largest degree, products add them and integer powers multiply them, so
+    (x + y + 1)**1000 costs three nodes instead of an expansion. Returns None when expr is
+    not a polynomial in variables or has more than limit distinct nodes.
+    """
+    variables = set(variables)
+    memo = {}
+
+    def walk(node):
+        if node in memo:
+            return memo[node]
+        if len(memo) >= limit:
+            raise OverflowError
+        if node in variables:
+            deg = 1
+        elif not (node.free_symbols & variables):
+            deg = 0
+        elif node.is_Add:
+            degs = [walk(a) for a in node.args]
+            deg = None if None in degs else max(degs)
+        elif node.is_Mul:
+            degs = [walk(a) for a in node.args]
+            deg = None if None in degs else sum(degs)
+        elif node.is_Pow and node.exp.is_Integer and node.exp >= 0:
+            base = walk(node.base)
+            deg = None if base is None else base * int(node.exp)
+        else:
+            deg = None
+        memo[node] = deg
+        return deg
+
+    try:
+        return walk(expr)
+    except OverflowError:
+        return None
+
+
+def is_polynomial_system(equations, variables):
+    """
+    True when every equation is a polynomial in variables with numeric coefficients.
+    """
+    try:
+        for eq in equations:
+            if not eq.is_polynomial(*variables):
+                return False
+            if eq.free_symbols - set(variables):
+                return False
+        return True
+    except Exception:
+        return False
+
+
+def _to_poly(eq, variables):
+    # Coeficientes racionales exactos (los decimales se convierten a fracciones)
+    if eq.has(sp.Float):
+        eq = sp.nsimplify(eq, rational=True)
+    return sp.Poly(eq, *variables, domain=sp.QQ)
+
+
+def _real_roots_exact(poly, precision):
+    """
+    Isolate the real roots of an exact univariate polynomial to 10**-precision.
+    """
+    eps = sp.Rational(1, 10 ** precision)
+    roots = []
+    for (lo, hi), _mult in poly.intervals(eps=eps):
+        roots.append(float((lo + hi) / 2))
+    return roots
+
+
+def _real_roots_numeric(coeffs):
+    """
+    Real roots of a univariate polynomial with float coefficients (highest degree first).
+    """
+    coeffs = np.trim_zeros(np.asarray(coeffs, dtype=float), 'f')
+    if coeffs.size <= 1:
+        return []
+    roots = np.roots(coeffs)
+    real = roots[np.abs(roots.imag) <= IMAG_TOL * (1.0 + np.abs(roots.real))].real
+    return sorted(set(np.round(real, 12)))
+
+
+def _back_substitute(levels, variables, precision):
+    """
+    Solve the triangular set level by level, from the last variable to the first.
+
+    levels[i] holds the Gröbner polynomials whose leading variable is variables[i].
+    Returns a list of assignments (tuples ordered like variables), or None when a
+    fiber is positive-dimensional.
+    """
+    n = len(variables)
+    partial = [()]
+    for i in range(n - 1, -1, -1):
+        var = variables[i]
+        polys = levels[i]
+        if not polys:
+            return None
+        extended = []
+        for assignment in partial:
+            subs = dict(zip(variables[i + 1:], assignment))
+            if not subs:
+                # Primer nivel: polinomio univariado exacto, aislamiento de raíces con intervalos
+                univariate = sp.Poly(polys[0].as_expr(), var)
+                for p in polys[1:]:
+                    univariate = sp.gcd(univariate, sp.Poly(p.as_expr(), var))
+                candidates = _real_roots_exact(univariate, precision)
+            else:
+                # Niveles siguientes: sustitución numérica y raíces del polinomio de menor grado
+                numeric = []
+                for p in polys:
+                    q = sp.Poly(p.as_expr().subs(subs), var)
+                    coeffs = [float(c) for c in q.all_coeffs()]
+                    scale = max(abs(c) for c in coeffs) if coeffs else 0.0
+                    if scale > 1e-9:
+                        numeric.append((q.degree(), coeffs))
+                if not numeric:
+                    return None
+                numeric.sort(key=lambda item: item[0])
+                candidates = _real_roots_numeric(numeric[0][1])
+                # Cada candidato debe anular también los demás polinomios del nivel
+                checked = []
+                for c in candidates:
+                    ok = True
+                    for _deg, coeffs in numeric[1:]:
+                        scale = max(abs(v) for v in coeffs)
+                        if abs(np.polyval(coeffs, c)) > 1e-6 * scale * (1.0 + abs(c)) ** len(coeffs):
+                            ok = False
+                            break
+                    if ok:
+                        checked.append(c)
+                candidates = checked
+            for c in candidates:
+                extended.append((float(c),) + assignment)
+        partial = extended
+    return partial
+
+
+def _polish(equations, variables, points, iterations=8):
+    """
+    Refine points with a few Newton steps on the original system, keeping a step only
+    when it lowers the residual.
+    """
+    if not points:
+        return points
+    F = sp.lambdify(variables, list(equations), modules=["numpy"])
+    J = sp.lambdify(variables, sp.Matrix(equations).jacobian(variables).tolist(), modules=["numpy"])
+    pts = np.array(points, dtype=float)
+    for _ in range(iterations):
+        refined = []
+        for p in pts:
+            try:
+                fval = np.array(F(*p), dtype=float)
+                jval = np.array(J(*p), dtype=float)
+                step = np.linalg.lstsq(jval, fval, rcond=None)[0]
+                candidate = p - step
+                new_res = np.abs(np.array(F(*candidate), dtype=float)).max()
+                refined.append(candidate if new_res <= np.abs(fval).max() else p)
+            except Exception:
+                refined.append(p)
+        pts = np.array(refined)
+    return [tuple(float(v) for v in p) for p in pts]
+
+
+def _dedupe(points):
+    unique = []
+    for p in sorted(points):
+        if all(max(abs(a - b) for a, b in zip(p, q)) > DEDUP_TOL * (1.0 + max(abs(v) for v in p)) for q in unique):
+            unique.append(p)
+    return unique
+
+
+def solve_polynomial_system(equations, variables, precision=12):
+    """
+    Return all real solutions of a zero-dimensional polynomial system.
+
+    equations are SymPy expressions (= 0) polynomial in variables. Solutions are tuples of
+    floats ordered like variables and sorted lexicographically, so the output is
+    deterministic. Returns None when the fast path does not apply (not polynomial, too
+    large, or infinitely many solutions) so the caller can fall back to generic solving.
+    """
+    variables = tuple(variables)
+    equations = [sp.expand(eq) for eq in equations]
+    equations = [eq for eq in equations if eq != 0]
+    if not equations or len(variables) > MAX_VARIABLES:
+        return None
+    if not is_polynomial_system(equations, variables):
+        return None
+    try:
+        polys = [_to_poly(eq, variables) for eq in equations]
+    except Exception:
+        return None
+    if any(p.total_degree() > MAX_DEGREE for p in polys):
+        return None
+
+    G = sp.groebner(polys, *variables, order='lex')
+    if list(G.exprs) == [1]:
+        return []
+    if not G.is_zero_dimensional:
+        return None
+
+    # Agrupa la base triangular por variable principal (la primera que aparece en orden lex)
+    levels = [[] for _ in variables]
+    for g in G.polys:
+        for i, v in enumerate(variables):
+            if g.degree(v) > 0:
+                levels[i].append(g)
+                break
+
+    solutions = _back_substitute(levels, variables, precision)
+    if solutions is None:
+        return None
+    solutions = _polish(equations, variables, solutions)
+    return _dedupe(solutions)
+
+
+def exact_or_float(equations, variables, point, max_denominator=10000):
+    """
+    Convert a float solution into SymPy numbers, preferring exact rationals when the
+    rational point satisfies every equation exactly.
+    """
+    candidate = []
+    for v in point:
+        frac = Fraction(v).limit_denominator(max_denominator)
+        if abs(float(frac) - v) > 1e-9 * (1.0 + abs(v)):
+            return tuple(sp.Float(c, 15) for c in point)
+        candidate.append(sp.Rational(frac.numerator, frac.denominator))
+    subs = dict(zip(variables, candidate))
+    if all(eq.subs(subs) == 0 for eq in equations):
+        return tuple(candidate)
+    return tuple(sp.Float(c, 15) for c in point)
@@ -0,0 +1,166 @@
+import gzip
+
+try:
+    # Brotli es opcional: si no está instalado solo se ofrece gzip
+    import brotli
+except ImportError:  # pragma: no cover - depende del entorno
+    brotli = None
+
+# Capa de presentación compartida por las rutas: textos fijos por tipo de función,
+# selección de campos de la respuesta (fields / compact) y compresión HTTP.
+
+# Campos didácticos (LaTeX, pasos y explicaciones) que un cliente programático puede omitir
+PRESENTATION_FIELDS = frozenset({
+    "steps", "title", "summary", "explanation", "explanation_detailed",
+    "func_latex", "graph_explanation", "graph_explanation_detailed",
+    "resultado_latex", "result_latex", "gradient_latex", "hessian_latex", "lagrangian_latex",
+    "integral_latex", "definite_symbolic_latex", "expression_latex",
+    "inner_integral_latex", "double_integral_latex", "double_integral_symbolic_latex",
+})
+
+# Explicaciones de la gráfica por tipo de función: se construyen una sola vez al importar
+GRAPH_EXPLANATIONS = {
+    "trig": (
+        "La gráfica representa una superficie ondulada típica de funciones trigonométricas. "
+        "Se observan zonas de crestas y valles periódicos en el plano, donde los valores oscilan entre positivos y negativos."
+    ),
+    "exp": (
+        "La superficie crece de forma exponencial a medida que aumentan x y y. "
+        "Los valores más altos se concentran en la región positiva del plano."
+    ),
+    "log": (
+        "La superficie tiene un crecimiento logarítmico. "
+        "Cerca del origen, los valores son más bajos y se incrementan lentamente conforme x e y aumentan."
+    ),
+    "sqrt": (
+        "La gráfica muestra una superficie tipo cono o cuenco. "
+        "La raíz cuadrada suaviza los cambios y produce una forma radial simétrica alrededor del origen."
+    ),
+    "quadratic": (
+        "La función cuadrática genera una superficie parabólica. "
+        "Los valores aumentan rápidamente con x e y, creando un cuenco simétrico centrado en el origen."
+    ),
+    "general": (
+        "La superficie muestra el comportamiento general de la función en el plano xy. "
+        "Los valores más altos se observan donde x e y son mayores."
+    ),
+}
+
+DETAIL_EXPLANATIONS = {
+    "trig": (
+        "Las funciones trigonométricas como seno y coseno modelan oscilaciones. "
+        "En el espacio tridimensional, estas generan superficies onduladas. "
+        "Cada cresta y valle representa los puntos donde la función alcanza sus valores máximos y mínimos. "
+        "Estas funciones son fundamentales para describir fenómenos periódicos como ondas o vibraciones."
+    ),
+    "exp": (
+        "Las funciones exponenciales presentan un crecimiento acelerado. "
+        "En el plano xy, los valores aumentan rápidamente cuando x e y son positivos. "
+        "Estas superficies suelen aparecer en modelos de crecimiento y decaimiento en física y biología."
+    ),
+    "sqrt": (
+        "La raíz cuadrada produce una superficie suave que crece de forma radial. "
+        "El valor aumenta conforme nos alejamos del origen, pero con pendiente decreciente. "
+        "Este tipo de función se asocia a distancias o magnitudes con simetría circular."
+    ),
+    "log": (
+        "Las funciones logarítmicas aumentan lentamente y nunca alcanzan valores negativos para entradas positivas. "
+        "Su gráfica muestra un ascenso gradual, común en escalas perceptuales y fenómenos de saturación."
+    ),
+    "general": (
+        "La función ingresada genera una superficie general en el espacio tridimensional. "
+        "Su forma depende de las potencias y combinaciones de x e y. "
+        "El estudio de estas superficies permite analizar pendientes, máximos y mínimos locales."
+    ),
+}
+
+FALLBACK_GRAPH_EXPLANATION = "La superficie se grafica para z=f(x,y)."
+FALLBACK_DETAIL_EXPLANATION = "Explora la gráfica: rota y acerca para analizar pendientes y variaciones locales."
+
+# Compresión de respuestas
+COMPRESS_MIN_SIZE = 512
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript")
+
+
+class FieldSelection:
+    """
+    Which response fields a client asked for.
+
+    fields is an optional list (or comma-separated string) of keys to keep; compact=true
+    drops every presentation field. Routes check .presentation before building steps,
+    LaTeX and explanations, so skipped blocks are never computed.
+    """
+
+    def __init__(self, fields=None, compact=False):
+        self.fields = frozenset(fields) if fields is not None else None
+        self.compact = bool(compact)
+
+    @classmethod
+    def from_request(cls, data, args=None):
+        """
+        Read fields/compact from the JSON body, falling back to the query string.
+        """
+        data = data if isinstance(data, dict) else {}
+        args = args or {}
+        fields = data.get("fields", args.get("fields"))
+        if isinstance(fields, str):
+            fields = [f.strip() for f in fields.split(",") if f.strip()]
+        elif not isinstance(fields, (list, tuple)):
+            fields = None
+        compact = data.get("compact", args.get("compact", False))
+        if isinstance(compact, str):
+            compact = compact.lower() in ("1", "true", "yes")
+        return cls(fields, compact)
+
+    def wants(self, key):
+        if self.compact and key in PRESENTATION_FIELDS:
+            return False
+        return self.fields is None or key in self.fields
+
+    @property
+    def presentation(self):
+        # True si al menos un campo didáctico debe construirse
+        return any(self.wants(key) for key in PRESENTATION_FIELDS)
+
+    def apply(self, body):
+        if self.fields is None and not self.compact:
+            return body
+        return {k: v for k, v in body.items() if self.wants(k)}
+
+
+def _encoding_weights(accept_encoding):
+    # Accept-Encoding → {codificación: q}; q=0 significa que el cliente la rechaza
+    weights = {}
+    for part in (accept_encoding or "").split(","):
+        name, *params = [p.strip() for p in part.split(";")]
+        if not name:
+            continue
+        q = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        weights[name.lower()] = q
+    return weights
+
+
+def compress_body(data, accept_encoding):
+    """
+    Compress a response body with the best encoding the client accepts.
+
+    Encodings refused with q=0 are never used; among the rest the highest q wins, with
+    brotli preferred over gzip on ties. Returns (encoding, compressed) or (None, data) when
+    compression does not apply.
+    """
+    weights = _encoding_weights(accept_encoding)
+    available = ("br", "gzip") if brotli is not None else ("gzip",)
+    scored = [(weights.get(enc, weights.get("*", 0.0)), -k, enc) for k, enc in enumerate(available)]
+    q, _, encoding = max(scored)
+    if q <= 0.0:
+        return None, data
+    if encoding == "br":
+        return "br", brotli.compress(data, quality=5)
+    return "gzip", gzip.compress(data, compresslevel=6)
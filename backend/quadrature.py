@@ -0,0 +1,53 @@
+import numpy as np
+import sympy as sp
+
+from backend.evaluator import compile_expression
+
+# Integral doble numérica sobre un rectángulo con Gauss-Legendre tensorial.
+# Es la ruta numérica del planificador cuando la antiderivada probablemente no es elemental:
+# se duplica el número de nodos hasta que dos reglas consecutivas coinciden.
+
+x, y = sp.symbols('x y')
+
+FIRST_NODES = 16
+MAX_NODES = 256
+DEFAULT_TOL = 1e-10
+
+_rules = {}
+
+
+def _rule(n):
+    # Nodos y pesos en [-1, 1], calculados una vez por tamaño
+    if n not in _rules:
+        _rules[n] = np.polynomial.legendre.leggauss(n)
+    return _rules[n]
+
+
+def _tensor(fn, ax, bx, ay, by, n):
+    t, w = _rule(n)
+    xs = 0.5 * (bx - ax) * t + 0.5 * (bx + ax)
+    ys = 0.5 * (by - ay) * t + 0.5 * (by + ay)
+    X, Y = np.meshgrid(xs, ys, indexing="ij")
+    values = fn(X, Y)
+    return 0.25 * (bx - ax) * (by - ay) * float(w @ values @ w)
+
+
+def gauss_legendre_2d(expr, ax, bx, ay, by, tol=DEFAULT_TOL):
+    """
+    ∫_ax^bx ∫_ay^by expr dy dx by tensor Gauss-Legendre rules of doubling size.
+
+    Returns (value, error estimate, nodes per axis), or None when the integrand is not
+    finite on the nodes or the rules do not agree within tol (relative) by MAX_NODES.
+    """
+    fn = compile_expression(expr, (x, y))
+    ax, bx, ay, by = (float(v) for v in (ax, bx, ay, by))
+    previous = _tensor(fn, ax, bx, ay, by, FIRST_NODES)
+    n = FIRST_NODES
+    while np.isfinite(previous) and n < MAX_NODES:
+        n *= 2
+        current = _tensor(fn, ax, bx, ay, by, n)
+        error = abs(current - previous)
+        if error <= tol * max(1.0, abs(current)):
+            return current, error, n
+        previous = current
+    return None
@@ -0,0 +1,158 @@
+import math
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+import numpy as np
+import sympy as sp
+
+from backend.evaluator import compile_kernel
+from backend.incremental import memo_diff, memo_latex
+from backend.memory import register_cache
+
+# Sesiones de exploración interactiva: al arrastrar el punto sobre la gráfica 3D el cliente
+# manda muchas actualizaciones seguidas. La sesión analiza la expresión una sola vez y compila
+# f, ∂f/∂x y ∂f/∂y en un único kernel NumPy; cada actualización solo evalúa ese kernel en el
+# punto (sin parser, sympify ni subs) y arma el plano tangente. Cada actualización lleva un
+# número de secuencia creciente: las que llegan después de una más nueva se descartan.
+
+x, y = sp.symbols('x y')
+
+# Sesiones abiertas a la vez por proceso (se descartan las menos usadas)
+MAX_SESSIONS = int(os.environ.get("SESSION_MAX", "256"))
+# Una sesión sin actualizaciones durante este tiempo (s) expira
+SESSION_TTL = float(os.environ.get("SESSION_TTL", "900"))
+
+
+class SessionNotFound(KeyError):
+    """
+    Raised for an unknown or expired session id; the client opens a new session.
+    """
+
+
+def _number(value, name):
+    # Las actualizaciones solo aceptan números JSON: nada de parser en el camino rápido
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+        raise ValueError(f"{name} must be a finite number")
+    return float(value)
+
+
+def _finite(value):
+    return value if math.isfinite(value) else None
+
+
+class PointSession:
+    """
+    f, its gradient and the tangent plane compiled once for one expression.
+
+    update(seq, x0, y0) evaluates the fused kernel at the point; updates whose seq is not
+    newer than the last one answered are dropped (returns None). seq=None skips the check.
+    """
+
+    def __init__(self, f):
+        self.id = uuid.uuid4().hex
+        self.f = f
+        self.fx = memo_diff(f, x)
+        self.fy = memo_diff(f, y)
+        self.kernel = compile_kernel((f, self.fx, self.fy))
+        self.last_seq = -1
+        self.updates = 0
+        self.dropped = 0
+        self.last_used = time.monotonic()
+        self._lock = threading.Lock()
+
+    def describe(self):
+        return {
+            "session": self.id,
+            "expression_latex": memo_latex(self.f),
+            "fx_latex": memo_latex(self.fx),
+            "fy_latex": memo_latex(self.fy),
+            "ttl": SESSION_TTL,
+        }
+
+    def update(self, seq, x0, y0):
+        x0, y0 = _number(x0, "x0"), _number(y0, "y0")
+        seq = None if seq is None else int(_number(seq, "seq"))
+        with self._lock:
+            self.last_used = time.monotonic()
+            # Sin seq la actualización se responde siempre
+            if seq is not None:
+                if seq <= self.last_seq:
+                    self.dropped += 1
+                    return None
+                self.last_seq = seq
+            self.updates += 1
+        start = time.perf_counter()
+        f0, fx0, fy0 = (float(v) for v in self.kernel(np.float64(x0), np.float64(y0)))
+        # Plano tangente: z = f0 + fx0 (x - x0) + fy0 (y - y0) = c + a x + b y
+        plane = None
+        if math.isfinite(f0) and math.isfinite(fx0) and math.isfinite(fy0):
+            plane = {"constant": f0 - fx0 * x0 - fy0 * y0, "dx": fx0, "dy": fy0}
+        return {
+            "seq": seq,
+            "x0": x0,
+            "y0": y0,
+            "value": _finite(f0),
+            "gradient": [_finite(fx0), _finite(fy0)],
+            "tangent_plane": plane,
+            "compute_us": round((time.perf_counter() - start) * 1e6, 1),
+        }
+
+
+class SessionStore:
+    """
+    Process-wide LRU of open sessions with an idle timeout.
+    """
+
+    def __init__(self, max_sessions=MAX_SESSIONS, ttl=SESSION_TTL):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.opened = 0
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def open(self, f):
+        session = PointSession(f)
+        with self._lock:
+            self._expire()
+            self._sessions[session.id] = session
+            self.opened += 1
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        return session
+
+    def get(self, session_id):
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None or time.monotonic() - session.last_used > self.ttl:
+                self._sessions.pop(session_id, None)
+                raise SessionNotFound(session_id)
+            self._sessions.move_to_end(session_id)
+            return session
+
+    def close(self, session_id):
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def _expire(self):
+        now = time.monotonic()
+        for sid in [sid for sid, s in self._sessions.items() if now - s.last_used > self.ttl]:
+            del self._sessions[sid]
+
+    def stats(self):
+        with self._lock:
+            sessions = list(self._sessions.values())
+        return {
+            "entries": len(sessions), "max_entries": self.max_sessions, "opened": self.opened,
+            "updates": sum(s.updates for s in sessions), "dropped_stale": sum(s.dropped for s in sessions),
+        }
+
+    def clear(self):
+        with self._lock:
+            self._sessions.clear()
+
+
+sessions = SessionStore()
+register_cache("sessions", sessions.stats, sessions.clear)
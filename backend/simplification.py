@@ -0,0 +1,136 @@
+import math
+import os
+import time
+
+import sympy as sp
+
+from backend.caching import mark_load_dependent
+
+# Simplificación por niveles con trabajo acotado. sp.simplify prueba muchas heurísticas y
+# suele ser el paso más lento de una ruta; aquí se aplican pasadas baratas de menor a mayor
+# costo (together, expand, cancel y, si hay funciones trigonométricas, trigsimp) y se conserva
+# el candidato con menos operaciones (count_ops). El trabajo se acota por tamaño y no por
+# reloj, para que la misma entrada dé siempre el mismo resultado (las rutas cacheables dependen
+# de ello): una pasada cara se salta si la expresión es demasiado grande para ella (ver
+# TIER_LIMITS) y se hacen como mucho MAX_PASSES pasadas. Se detiene antes si ninguna pasada
+# reduce ya la expresión actual.
+
+# Presupuesto de reloj opcional (s) como red de seguridad; si lo corta, la respuesta no se cachea
+SIMPLIFY_BUDGET = float(os.environ["SIMPLIFY_BUDGET"]) if os.environ.get("SIMPLIFY_BUDGET") else None
+# Pasadas intentadas como máximo por expresión
+MAX_PASSES = 12
+
+_TRIG = (sp.sin, sp.cos, sp.tan, sp.cot, sp.sec, sp.csc)
+
+TIERS = (
+    ("together", sp.together),
+    ("expand", sp.expand),
+    ("cancel", sp.cancel),
+    ("trigsimp", sp.trigsimp),
+)
+
+# Tamaño máximo (count_ops) con que se intenta cada pasada; None = sin límite
+TIER_LIMITS = {"together": None, "expand": 400, "cancel": 200, "trigsimp": 60}
+# expand, cancel y trigsimp desarrollan productos y potencias: se saltan si el desarrollo
+# tendría más términos
+MAX_EXPANDED_TERMS = 500
+_EXPANDING = ("expand", "cancel", "trigsimp")
+
+
+def _expanded_terms(expr, cap=MAX_EXPANDED_TERMS):
+    # Cota del número de términos de expand(expr) sin expandir; se corta al superar cap
+    if expr.is_Add:
+        total = 0
+        for arg in expr.args:
+            total += _expanded_terms(arg, cap)
+            if total > cap:
+                break
+        return min(total, cap + 1)
+    if expr.is_Mul:
+        total = 1
+        for arg in expr.args:
+            total *= _expanded_terms(arg, cap)
+            if total > cap:
+                break
+        return min(total, cap + 1)
+    if expr.is_Pow and expr.exp.is_Integer and expr.exp > 1:
+        terms = _expanded_terms(expr.base, cap)
+        if terms == 1:
+            return 1
+        # Monomios de grado e en t términos: C(t + e - 1, e)
+        e = int(expr.exp)
+        if e > cap:
+            return cap + 1
+        return min(math.comb(terms + e - 1, e), cap + 1)
+    if expr.args:
+        # Dentro de una función se desarrolla su argumento, pero la función sigue siendo un término
+        return 1 if all(_expanded_terms(arg, cap) <= cap for arg in expr.args) else cap + 1
+    return 1
+
+
+def _affordable(name, expr, ops):
+    # True si la pasada cabe en el presupuesto por tamaño (no se puede interrumpir a la mitad)
+    limit = TIER_LIMITS.get(name)
+    if limit is not None and ops > limit:
+        return False
+    return name not in _EXPANDING or _expanded_terms(expr) <= MAX_EXPANDED_TERMS
+
+
+def tiered_simplify(expr, budget=SIMPLIFY_BUDGET):
+    """
+    Simplify expr with cheap passes first, bounding the work by expression size.
+
+    Passes are retried only after another one has shrunk the expression, at most MAX_PASSES
+    passes run, and a pass is skipped while the expression is too large for it (TIER_LIMITS,
+    MAX_EXPANDED_TERMS), so the result depends only on expr. budget (seconds) adds an
+    optional wall-clock cut-off; when it stops the passes the request is marked load
+    dependent. Returns (result, tier) where tier names the pass that produced the result
+    ("none" when no pass made the expression smaller).
+    """
+    if not isinstance(expr, sp.Basic) or expr.is_Atom:
+        return expr, "none"
+    deadline = None if budget is None else time.perf_counter() + budget
+    passes = 0
+    tiers = [(name, fn) for name, fn in TIERS if name != "trigsimp" or expr.has(*_TRIG)]
+    best, best_ops, tier = expr, sp.count_ops(expr), "none"
+    # Pasadas ya probadas sobre la expresión actual sin reducirla
+    tried = set()
+    while len(tried) < len(tiers):
+        for name, simplify_pass in tiers:
+            if name in tried:
+                continue
+            if deadline is not None and time.perf_counter() >= deadline:
+                # El resultado depende de la carga: con más tiempo otra pasada podría reducirlo
+                mark_load_dependent()
+                return best, tier
+            if not _affordable(name, best, best_ops):
+                tried.add(name)
+                continue
+            if passes >= MAX_PASSES:
+                return best, tier
+            passes += 1
+            try:
+                candidate = simplify_pass(best)
+            except Exception:
+                tried.add(name)
+                continue
+            ops = sp.count_ops(candidate)
+            if ops < best_ops:
+                best, best_ops, tier = candidate, ops, name
+                if best.is_Atom:
+                    return best, tier
+                tried = {name}
+            else:
+                tried.add(name)
+    return best, tier
+
+
+def canonical_form(expr):
+    """
+    Canonical printing form of expr: the expanded sum when the expansion stays within
+    MAX_EXPANDED_TERMS, otherwise expr unchanged. Equal constants reached by different routes
+    (e.g. the two integration orders) then print the same.
+    """
+    if not isinstance(expr, sp.Basic) or expr.has(sp.Integral) or _expanded_terms(expr) > MAX_EXPANDED_TERMS:
+        return expr
+    return sp.expand(expr)
@@ -0,0 +1,177 @@
+"""
+Run the backend under a supervisor that recycles worker processes.
+
+Usage:
+    python backend/supervisor.py            # PORT, WAITRESS_THREADS, MEMORY_* from the environment
+
+The supervisor binds the listening socket once and starts a worker process that serves it
+with waitress. When the worker's memory governor asks to be recycled (RSS above
+MEMORY_RECYCLE_MB after clearing caches, or MAX_REQUESTS_PER_WORKER reached) it signals
+the supervisor, which starts a replacement on the same socket. Once the replacement is
+ready the old worker stops accepting connections, finishes its in-flight requests and
+exits. Workers that crash are restarted.
+"""
+import _thread
+import logging
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+# Descriptor del socket compartido que recibe el proceso trabajador
+LISTEN_FD_ENV = "SUPERVISOR_LISTEN_FD"
+# Tiempo máximo para terminar las solicitudes en curso antes de salir
+DRAIN_TIMEOUT = float(os.environ.get("WORKER_DRAIN_TIMEOUT", "30"))
+# Tiempo máximo de arranque de un reemplazo (importar SymPy, crear la app)
+READY_TIMEOUT = 60.0
+# Espera antes de reiniciar un trabajador que terminó inesperadamente
+RESTART_BACKOFF = 1.0
+
+logger = logging.getLogger("backend.supervisor")
+
+
+def _idle(server):
+    # Sin solicitudes pendientes ni bytes por enviar en ningún canal abierto
+    from waitress.channel import HTTPChannel
+    for channel in list(server._map.values()):
+        if isinstance(channel, HTTPChannel) and (channel.requests or channel.total_outbufs_len):
+            return False
+    return True
+
+
+def run_worker(fd):
+    """
+    Serve the app on the inherited listening socket until drained by SIGTERM.
+    """
+    from waitress.server import create_server
+
+    from backend.admission import SERVER_THREADS
+    from backend.app import create_app
+
+    app = create_app()
+    sock = socket.socket(fileno=fd)
+    server = create_server(app, sockets=[sock], threads=SERVER_THREADS)
+    parent = os.getppid()
+    governor = app.extensions["memory_governor"]
+    governor.supervised = True
+
+    def request_recycle(reason):
+        logger.warning(f"worker {os.getpid()}: recycle requested ({reason})")
+        os.kill(parent, signal.SIGUSR1)
+
+    governor.on_recycle = request_recycle
+
+    def drain():
+        # Se espera a que terminen las solicitudes en curso y se detiene el lazo de waitress
+        deadline = time.monotonic() + DRAIN_TIMEOUT
+        while time.monotonic() < deadline and not _idle(server):
+            time.sleep(0.1)
+        _thread.interrupt_main()
+
+    def on_term(signum, frame):
+        if server.accepting:
+            server.accepting = False
+            threading.Thread(target=drain, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, on_term)
+    # Aviso de que el trabajador ya acepta conexiones
+    os.kill(parent, signal.SIGUSR2)
+    server.run()
+    logger.info(f"worker {os.getpid()}: drained after {governor.requests} requests")
+
+
+class Supervisor:
+    """
+    Keeps one active worker on the shared socket and replaces it on request or crash.
+    """
+
+    def __init__(self, port):
+        self.sock = socket.create_server(("0.0.0.0", port), backlog=1024)
+        self.sock.set_inheritable(True)
+        self.worker = None
+        self.draining = []
+        self.recycle = False
+        self.ready = False
+        self.stopping = False
+
+    def spawn(self):
+        env = dict(os.environ, **{LISTEN_FD_ENV: str(self.sock.fileno())})
+        self.ready = False
+        proc = subprocess.Popen([sys.executable, os.path.abspath(__file__)], env=env, pass_fds=(self.sock.fileno(),))
+        logger.info(f"supervisor: started worker {proc.pid}")
+        return proc
+
+    def _wait_ready(self, proc):
+        deadline = time.monotonic() + READY_TIMEOUT
+        while not self.ready and proc.poll() is None and time.monotonic() < deadline:
+            time.sleep(0.05)
+        return self.ready and proc.poll() is None
+
+    def replace(self):
+        old = self.worker
+        new = self.spawn()
+        if not self._wait_ready(new):
+            # El reemplazo no arrancó: se conserva el trabajador actual
+            logger.error(f"supervisor: replacement {new.pid} did not start, keeping {old.pid}")
+            new.kill()
+            new.wait()
+            return
+        self.worker = new
+        old.send_signal(signal.SIGTERM)
+        self.draining.append((old, time.monotonic() + DRAIN_TIMEOUT + 5))
+
+    def reap(self):
+        for proc, deadline in list(self.draining):
+            if proc.poll() is not None:
+                self.draining.remove((proc, deadline))
+            elif time.monotonic() > deadline:
+                proc.kill()
+
+    def run(self):
+        signal.signal(signal.SIGUSR1, lambda s, f: setattr(self, "recycle", True))
+        signal.signal(signal.SIGUSR2, lambda s, f: setattr(self, "ready", True))
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(sig, lambda s, f: setattr(self, "stopping", True))
+
+        self.worker = self.spawn()
+        while not self.stopping:
+            time.sleep(0.2)
+            if self.recycle:
+                self.recycle = False
+                self.replace()
+            elif self.worker.poll() is not None:
+                logger.error(f"supervisor: worker {self.worker.pid} exited with {self.worker.returncode}, restarting")
+                time.sleep(RESTART_BACKOFF)
+                self.worker = self.spawn()
+            self.reap()
+
+        # Apagado: todos los trabajadores terminan sus solicitudes en curso
+        for proc in [self.worker] + [p for p, _ in self.draining]:
+            if proc.poll() is None:
+                proc.send_signal(signal.SIGTERM)
+        for proc in [self.worker] + [p for p, _ in self.draining]:
+            try:
+                proc.wait(DRAIN_TIMEOUT + 5)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+
+def main():
+    fd = os.environ.get(LISTEN_FD_ENV)
+    if fd is not None:
+        run_worker(int(fd))
+        return
+    from backend.logging_setup import configure_logging
+    configure_logging()
+    Supervisor(int(os.environ.get("PORT", 5000))).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+import math
+from fractions import Fraction
+
+import numpy as np
+import sympy as sp
+
+from backend.autodiff import taylor_coefficients
+from backend.evaluator import compile_expression, x, y
+
+# Polinomio de Taylor de f(x,y) alrededor de (x0, y0) y su error sobre una rejilla.
+# Los coeficientes salen del modo de Taylor truncado de autodiff: un solo recorrido del árbol
+# de f propaga, en el punto, el desarrollo de cada subexpresión hasta el orden pedido. No se
+# construye la torre de derivadas simbólicas (a orden 10 exp(sin(xy))·cos(x+y²) tardaba decenas
+# de segundos y sus árboles quedaban en la memoria de memo_diff). El polinomio se evalúa sobre
+# la rejilla con NumPy.
+
+DEFAULT_ORDER = 2
+MAX_ORDER = 10
+DEFAULT_ERROR_GRID = 41
+MAX_ERROR_GRID = 201
+
+
+def _derivative_label(a, b):
+    # f_xxy para ∂³f/∂x²∂y
+    return "f" if a + b == 0 else "f_" + "x" * a + "y" * b
+
+
+def _coefficient(value, max_denominator=10000):
+    # Racional exacto si el valor lo es (a precisión de máquina); si no, Float con 12 cifras
+    frac = Fraction(value).limit_denominator(max_denominator)
+    if abs(float(frac) - value) <= 1e-12 * (1.0 + abs(value)):
+        return sp.Rational(frac.numerator, frac.denominator)
+    return sp.Float(value, 12)
+
+
+def taylor_polynomial(f, x0, y0, order=DEFAULT_ORDER):
+    """
+    Taylor polynomial of f of the given order around (x0, y0).
+
+    x0 and y0 are SymPy numbers. Returns (polynomial, terms) where the polynomial is written
+    in powers of (x - x0) and (y - y0) and terms lists every partial derivative up to the
+    order (labelled f_xxy, ...) with its value and coefficient f_{x^a y^b}(x0, y0) / (a! b!).
+    The values come from truncated Taylor-mode propagation (taylor_coefficients), so no
+    symbolic derivative is built. Raises ValueError if a derivative is not defined at the
+    point or f has a node that mode does not support.
+    """
+    series = taylor_coefficients(f, (x, y), (float(sp.N(x0)), float(sp.N(y0))), order)
+    terms, parts = [], []
+    for k in range(order + 1):
+        for j in range(k + 1):
+            a, b = k - j, j
+            scaled = float(series[a, b])
+            if not math.isfinite(scaled):
+                raise ValueError(f"the derivatives of order {k} could not be evaluated at ({x0}, {y0})")
+            v = scaled * math.factorial(a) * math.factorial(b)
+            coeff = _coefficient(scaled)
+            terms.append({"order": k, "dx": a, "dy": b, "derivative": _derivative_label(a, b), "value": v,
+                          "coefficient": str(coeff), "coefficient_value": float(coeff)})
+            if coeff != 0:
+                # Sin evaluar: SymPy distribuiría el coeficiente sobre (x - x0) y perdería la forma de Taylor
+                factors = [c for c in (coeff, (x - x0) ** a, (y - y0) ** b) if c != 1]
+                parts.append(sp.Mul(*factors, evaluate=False) if len(factors) > 1 else (factors or [sp.Integer(1)])[0])
+    polynomial = sp.Add(*parts, evaluate=False) if len(parts) > 1 else (parts[0] if parts else sp.Integer(0))
+    return polynomial, terms
+
+
+def error_grid(f, terms, x0, y0, radius=1.0, n=DEFAULT_ERROR_GRID):
+    """
+    |f - P| on an n×n grid over [x0 - radius, x0 + radius] × [y0 - radius, y0 + radius].
+
+    P is evaluated from the term coefficients with one table of powers of (x - x0) and
+    (y - y0), f with the cached vectorized evaluator. Undefined points are null in the grid
+    and skipped in the summary statistics.
+    """
+    x0, y0 = float(sp.N(x0)), float(sp.N(y0))
+    xs = np.linspace(x0 - radius, x0 + radius, n)
+    ys = np.linspace(y0 - radius, y0 + radius, n)
+    X, Y = np.meshgrid(xs, ys)
+    order = max(t["order"] for t in terms)
+    # Potencias de (x - x0) y (y - y0) calculadas una vez para todos los términos
+    U = np.cumprod(np.concatenate([np.ones((1,) + X.shape), np.broadcast_to(X - x0, (order,) + X.shape)]), axis=0)
+    V = np.cumprod(np.concatenate([np.ones((1,) + Y.shape), np.broadcast_to(Y - y0, (order,) + Y.shape)]), axis=0)
+    P = np.zeros_like(X)
+    for t in terms:
+        P += t["coefficient_value"] * U[t["dx"]] * V[t["dy"]]
+    with np.errstate(all="ignore"):
+        F = np.asarray(compile_expression(f)(X, Y), dtype=float) * np.ones_like(X)
+        err = np.abs(F - P)
+    finite = np.isfinite(err)
+    return {
+        "x": xs.tolist(),
+        "y": ys.tolist(),
+        "error": [[float(v) if math.isfinite(v) else None for v in row] for row in err.tolist()],
+        "max_error": float(err[finite].max()) if finite.any() else None,
+        "rms_error": float(np.sqrt(np.mean(err[finite] ** 2))) if finite.any() else None,
+        "undefined_points": int((~finite).sum()),
+    }
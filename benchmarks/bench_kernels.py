@@ -0,0 +1,73 @@
+"""
+Benchmark: fused CSE kernel for (f, fx, fy, fxx, fyy, fxy) vs. six separate lambdify functions.
+
+Usage:
+    python benchmarks/bench_kernels.py [--points N] [--repeat N]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from backend.analysis import ExpressionAnalysis  # noqa: E402
+from backend.evaluator import compile_expression  # noqa: E402
+
+# Expresiones cuyas derivadas comparten muchos subtérminos
+CORPUS = [
+    "x**2 + y**2",
+    "sin(x)*cos(y)",
+    "exp(-(x^2 + y^2))",
+    "log(x**2 + y**2 + 1)",
+    "exp(sin(x*y))*cos(x + y) + x**2*y**3",
+    "sqrt(x^2 + y^2 + 1)*atan(x*y)",
+    "tanh(x*y)*exp(x - y)/(1 + x**2)",
+]
+
+
+def _time(fn, X, Y, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(X, Y)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--points", type=int, default=200_000)
+    ap.add_argument("--repeat", type=int, default=10)
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(0)
+    X = rng.uniform(-2.0, 2.0, args.points)
+    Y = rng.uniform(-2.0, 2.0, args.points)
+
+    print(f"points: {args.points}, best of {args.repeat}")
+    print(f"{'expression':42s} {'separate':>10s} {'fused':>10s} {'speedup':>8s}")
+    for expr in CORPUS:
+        a = ExpressionAnalysis(expr)
+        exprs = (a.f, a.fx, a.fy, a.fxx, a.fyy, a.fxy)
+        separate_fns = [compile_expression(e) for e in exprs]
+        fused = a.kernel
+
+        def separate(X, Y):
+            return tuple(fn(X, Y) for fn in separate_fns)
+
+        # Ambas rutas deben dar los mismos valores
+        for u, v in zip(separate(X, Y), fused(X, Y)):
+            assert np.allclose(u, v, equal_nan=True, rtol=1e-12, atol=1e-12), expr
+
+        t_sep = _time(separate, X, Y, args.repeat)
+        t_fused = _time(fused, X, Y, args.repeat)
+        print(f"{expr:42s} {t_sep * 1e3:8.2f}ms {t_fused * 1e3:8.2f}ms {t_sep / t_fused:7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
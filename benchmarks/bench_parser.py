@@ -0,0 +1,86 @@
+"""
+Benchmark: single-pass parser vs. the previous validate_expression + sp.sympify path.
+
+Usage:
+    python benchmarks/bench_parser.py [--repeat N]
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+import sympy as sp
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from backend.expression_parser import parse_expression  # noqa: E402
+
+# Expresiones típicas que escriben los estudiantes
+CORPUS = [
+    "x**2 + y**2",
+    "x^2*sin(y)",
+    "3*x**2*y - y**3",
+    "exp(-(x^2 + y^2))",
+    "sin(x)*cos(y)",
+    "log(x**2 + y**2 + 1)",
+    "sqrt(x^2 + y^2)",
+    "x*y/(x**2 + y**2)",
+    "x**3 - 3*x*y**2 + 2*y",
+    "atan(y/x) + tanh(x*y)",
+    "(x + y)**4 - 2*(x - y)**2",
+    "exp(sin(x*y))*cos(x + y) + x**2*y**3",
+]
+
+# Ruta anterior: validación por subcadenas + regex y luego sympify
+_LEGACY_TOKENS = {
+    'x', 'y', 'sin', 'cos', 'tan', 'asin', 'acos', 'atan', 'csc', 'sec', 'cot', 'acsc', 'asec', 'acot',
+    'sinh', 'cosh', 'tanh', 'asinh', 'acosh', 'atanh', 'csch', 'sech', 'coth', 'exp', 'log', 'sqrt', 'abs',
+    'pi', 'E',
+}
+
+
+def legacy_parse(expr):
+    lowered = expr.lower()
+    forbidden = ['__', 'import', 'eval', 'exec', 'lambda', 'open', 'subprocess', 'os.', 'sys.']
+    if any(fs in lowered for fs in forbidden):
+        raise ValueError('Expression contains forbidden tokens')
+    for t in re.findall(r'[A-Za-z_]+', expr):
+        if t not in _LEGACY_TOKENS:
+            raise ValueError(f'Unknown token: {t}')
+    return sp.sympify(expr)
+
+
+def _time(fn, repeat):
+    # Se limpia la caché de SymPy antes de cada ronda para medir trabajo real, no aciertos de caché
+    best = float('inf')
+    for _ in range(repeat):
+        sp.core.cache.clear_cache()
+        t0 = time.perf_counter()
+        for expr in CORPUS:
+            fn(expr)
+        best = min(best, time.perf_counter() - t0)
+    return best / len(CORPUS)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--repeat", type=int, default=20)
+    args = ap.parse_args()
+
+    # Ambas rutas deben producir el mismo árbol
+    for expr in CORPUS:
+        assert parse_expression(expr) == legacy_parse(expr), expr
+
+    legacy = _time(legacy_parse, args.repeat)
+    new = _time(parse_expression, args.repeat)
+    print(f"expressions: {len(CORPUS)}, best of {args.repeat}")
+    print(f"validate_expression + sympify: {legacy * 1e6:9.1f} us/expr")
+    print(f"parse_expression:              {new * 1e6:9.1f} us/expr")
+    print(f"speedup:                       {legacy / new:9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+"""
+Load test: replay the traffic corpus against a running backend and report latency percentiles.
+
+Usage:
+    python benchmarks/load_test.py [--url http://127.0.0.1:5000] [--concurrency 8]
+                                   [--rate 20] [--duration 30] [--label baseline]
+    python benchmarks/load_test.py --spawn --port 5055 ...   # start backend/app.py under waitress
+    python benchmarks/load_test.py --compare results/a.json results/b.json
+
+With --rate 0 the generator runs closed-loop (each worker sends its next request as soon
+as the previous one finishes). With --rate > 0 requests arrive as a Poisson process and
+latency is measured from the scheduled arrival time, so queueing inside the server is
+included (no coordinated omission). Results are written to benchmarks/results/ as JSON.
+"""
+import argparse
+import json
+import os
+import queue
+import random
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime, timezone
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CORPUS_PATH = os.path.join(BASE_DIR, "benchmarks", "corpus", "traffic.jsonl")
+RESULTS_DIR = os.path.join(BASE_DIR, "benchmarks", "results")
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+def load_corpus(path=CORPUS_PATH):
+    with open(path, encoding="utf-8") as fh:
+        return [json.loads(line) for line in fh if line.strip()]
+
+
+def _send(url, entry, timeout):
+    """
+    Send one corpus request. Returns (status, error kind or None).
+    """
+    body = json.dumps(entry["body"]).encode("utf-8")
+    req = urllib.request.Request(url + entry["path"], data=body, method=entry.get("method", "POST"),
+                                 headers={"Content-Type": "application/json", "Accept-Encoding": "gzip"})
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            resp.read()
+            return resp.status, None
+    except urllib.error.HTTPError as exc:
+        exc.read()
+        return exc.code, None
+    except TimeoutError:
+        return None, "timeout"
+    except urllib.error.URLError as exc:
+        return None, "timeout" if isinstance(exc.reason, TimeoutError) else "connection"
+    except OSError:
+        return None, "connection"
+
+
+def _percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    k = min(len(sorted_values) - 1, max(0, int(round(p / 100.0 * (len(sorted_values) - 1)))))
+    return sorted_values[k]
+
+
+def summarize(samples, elapsed):
+    """
+    Aggregate (path, status, error, latency) samples into overall and per-path statistics.
+    """
+    def stats(rows):
+        lat = sorted(r[3] for r in rows if r[2] is None)
+        ok = sum(1 for r in rows if r[1] is not None and 200 <= r[1] < 300)
+        client_errors = sum(1 for r in rows if r[1] is not None and 400 <= r[1] < 500 and r[1] != 429)
+        rejected = sum(1 for r in rows if r[1] in (429, 503))
+        server_errors = sum(1 for r in rows if r[1] is not None and r[1] >= 500 and r[1] != 503)
+        timeouts = sum(1 for r in rows if r[2] == "timeout")
+        connection = sum(1 for r in rows if r[2] == "connection")
+        out = {
+            "requests": len(rows),
+            "ok": ok,
+            "client_errors": client_errors,
+            "rejected": rejected,
+            "server_errors": server_errors,
+            "timeouts": timeouts,
+            "connection_errors": connection,
+            "error_rate": (server_errors + timeouts + connection) / len(rows) if rows else 0.0,
+            "throughput_rps": len(lat) / elapsed if elapsed > 0 else 0.0,
+            "latency_ms": {f"p{p}": (_percentile(lat, p) * 1e3 if lat else None) for p in PERCENTILES},
+        }
+        out["latency_ms"]["max"] = lat[-1] * 1e3 if lat else None
+        out["latency_ms"]["mean"] = sum(lat) / len(lat) * 1e3 if lat else None
+        return out
+
+    by_path = {}
+    for row in samples:
+        by_path.setdefault(row[0], []).append(row)
+    return {"overall": stats(samples), "paths": {p: stats(rows) for p, rows in sorted(by_path.items())}}
+
+
+def run(url, corpus, concurrency, rate, duration, timeout, seed=0):
+    """
+    Run the load for duration seconds and return the raw samples and the elapsed time.
+    """
+    rng = random.Random(seed)
+    weights = [e.get("weight", 1) for e in corpus]
+    samples = []
+    lock = threading.Lock()
+    jobs = queue.Queue(maxsize=concurrency * 4 if rate > 0 else 0)
+    start = time.perf_counter()
+    deadline = start + duration
+
+    def record(entry, scheduled):
+        status, error = _send(url, entry, timeout)
+        with lock:
+            samples.append((entry["path"], status, error, time.perf_counter() - scheduled))
+
+    def worker():
+        if rate > 0:
+            # Lazo abierto: cada trabajo trae su instante de llegada programado
+            while True:
+                job = jobs.get()
+                if job is None:
+                    return
+                record(*job)
+        else:
+            local = random.Random(rng.random())
+            while time.perf_counter() < deadline:
+                record(local.choices(corpus, weights)[0], time.perf_counter())
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+
+    if rate > 0:
+        # Llegadas de Poisson; si la cola se llena, la espera cuenta en la latencia
+        scheduled = start
+        while True:
+            scheduled += rng.expovariate(rate)
+            if scheduled >= deadline:
+                break
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            jobs.put((rng.choices(corpus, weights)[0], scheduled))
+        for _ in threads:
+            jobs.put(None)
+
+    for t in threads:
+        t.join()
+    return samples, time.perf_counter() - start
+
+
+def _spawn_server(port):
+    env = dict(os.environ, PORT=str(port))
+    proc = subprocess.Popen([sys.executable, os.path.join(BASE_DIR, "backend", "app.py")], env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            urllib.request.urlopen(url + "/ping", timeout=1).read()
+            return proc, url
+        except OSError:
+            time.sleep(0.1)
+    proc.terminate()
+    raise RuntimeError("backend did not start")
+
+
+def compare(paths):
+    """
+    Print overall throughput and latency percentiles of several saved runs side by side.
+    """
+    runs = []
+    for path in paths:
+        with open(path, encoding="utf-8") as fh:
+            runs.append(json.load(fh))
+    header = f"{'label':24s} {'conc':>5s} {'rate':>6s} {'rps':>8s} {'p50':>8s} {'p95':>8s} {'p99':>8s} {'err%':>6s} {'rej%':>6s}"
+    print(header)
+    for r in runs:
+        o = r["summary"]["overall"]
+        lat = o["latency_ms"]
+        fmt = lambda v: f"{v:8.1f}" if v is not None else f"{'-':>8s}"
+        print(f"{r['label'][:24]:24s} {r['config']['concurrency']:5d} {r['config']['rate']:6g} {o['throughput_rps']:8.1f} "
+              f"{fmt(lat['p50'])} {fmt(lat['p95'])} {fmt(lat['p99'])} {100 * o['error_rate']:6.2f} "
+              f"{100 * o['rejected'] / max(1, o['requests']):6.2f}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--url", default="http://127.0.0.1:5000")
+    ap.add_argument("--corpus", default=CORPUS_PATH)
+    ap.add_argument("--concurrency", type=int, default=8)
+    ap.add_argument("--rate", type=float, default=0.0, help="arrivals per second (0 = closed loop)")
+    ap.add_argument("--duration", type=float, default=30.0)
+    ap.add_argument("--timeout", type=float, default=30.0)
+    ap.add_argument("--label", default="run")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--spawn", action="store_true", help="start backend/app.py (waitress) on --port")
+    ap.add_argument("--port", type=int, default=5055)
+    ap.add_argument("--out", default=RESULTS_DIR)
+    ap.add_argument("--compare", nargs="+", metavar="RESULT")
+    args = ap.parse_args()
+
+    if args.compare:
+        compare(args.compare)
+        return
+
+    proc = None
+    url = args.url
+    if args.spawn:
+        proc, url = _spawn_server(args.port)
+    try:
+        corpus = load_corpus(args.corpus)
+        samples, elapsed = run(url, corpus, args.concurrency, args.rate, args.duration, args.timeout, args.seed)
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait()
+
+    summary = summarize(samples, elapsed)
+    result = {
+        "label": args.label,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "config": {"url": url, "concurrency": args.concurrency, "rate": args.rate, "duration": args.duration,
+                   "timeout": args.timeout, "seed": args.seed, "corpus": os.path.relpath(args.corpus, BASE_DIR)},
+        "elapsed": elapsed,
+        "summary": summary,
+    }
+    os.makedirs(args.out, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    path = os.path.join(args.out, f"{stamp}-{args.label}.json")
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump(result, fh, indent=2)
+
+    o = summary["overall"]
+    print(f"{o['requests']} requests in {elapsed:.1f}s, {o['throughput_rps']:.1f} req/s, "
+          f"errors {100 * o['error_rate']:.2f}%, rejected {o['rejected']}, timeouts {o['timeouts']}")
+    for name, s in summary["paths"].items():
+        lat = s["latency_ms"]
+        p = lambda k: f"{lat[k]:8.1f}" if lat[k] is not None else f"{'-':>8s}"
+        print(f"  {name:18s} n={s['requests']:5d} p50={p('p50')} p95={p('p95')} p99={p('p99')} ms")
+    print(f"saved {os.path.relpath(path, BASE_DIR)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+// Compilador de expresiones para evaluar rejillas (hilo principal y Web Workers)
+// Comentario: Se recorre una sola vez el árbol de Math.js y se genera una función nativa
+// (x, y) => número con Math.*; así cada celda de la rejilla es una llamada directa, sin
+// objeto scope ni try por celda. Si el árbol usa algo no soportado se recurre a Math.js
+// compilado reutilizando un único objeto scope.
+
+const GRID_UNARY = {
+  sin: "Math.sin", cos: "Math.cos", tan: "Math.tan",
+  asin: "Math.asin", acos: "Math.acos", atan: "Math.atan",
+  sinh: "Math.sinh", cosh: "Math.cosh", tanh: "Math.tanh",
+  asinh: "Math.asinh", acosh: "Math.acosh", atanh: "Math.atanh",
+  exp: "Math.exp", sqrt: "Math.sqrt", cbrt: "Math.cbrt", abs: "Math.abs",
+  log10: "Math.log10", log2: "Math.log2", sign: "Math.sign",
+  floor: "Math.floor", ceil: "Math.ceil", round: "Math.round",
+};
+const GRID_RECIPROCAL = {
+  csc: "Math.sin", sec: "Math.cos", cot: "Math.tan",
+  csch: "Math.sinh", sech: "Math.cosh", coth: "Math.tanh",
+};
+const GRID_CONSTANTS = { pi: "Math.PI", e: "Math.E", E: "Math.E" };
+const GRID_BINARY = { add: "+", subtract: "-", multiply: "*", divide: "/", pow: "**" };
+
+function gridNodeToJS(node) {
+  switch (node.type) {
+    case "ConstantNode": {
+      const v = Number(node.value);
+      if (!Number.isFinite(v)) throw new Error("constante no numérica");
+      return `(${v})`;
+    }
+    case "SymbolNode":
+      if (node.name === "x" || node.name === "y") return node.name;
+      if (GRID_CONSTANTS[node.name]) return GRID_CONSTANTS[node.name];
+      throw new Error(`símbolo no soportado: ${node.name}`);
+    case "ParenthesisNode":
+      return gridNodeToJS(node.content);
+    case "OperatorNode": {
+      const args = node.args.map(gridNodeToJS);
+      if (args.length === 1 && node.fn === "unaryMinus") return `(-${args[0]})`;
+      if (args.length === 1 && node.fn === "unaryPlus") return args[0];
+      if (args.length === 2 && GRID_BINARY[node.fn]) return `(${args[0]} ${GRID_BINARY[node.fn]} ${args[1]})`;
+      throw new Error(`operador no soportado: ${node.op}`);
+    }
+    case "FunctionNode": {
+      const name = node.fn?.name ?? node.name;
+      const args = node.args.map(gridNodeToJS);
+      if (name === "log" && args.length === 1) return `Math.log(${args[0]})`;
+      if (name === "log" && args.length === 2) return `(Math.log(${args[0]}) / Math.log(${args[1]}))`;
+      if (args.length === 1 && GRID_UNARY[name]) return `${GRID_UNARY[name]}(${args[0]})`;
+      if (args.length === 1 && GRID_RECIPROCAL[name]) return `(1 / ${GRID_RECIPROCAL[name]}(${args[0]}))`;
+      if (name === "pow" && args.length === 2) return `(${args[0]} ** ${args[1]})`;
+      throw new Error(`función no soportada: ${name}`);
+    }
+    default:
+      throw new Error(`nodo no soportado: ${node.type}`);
+  }
+}
+
+// Devuelve { fn: (x, y) => número (NaN si no está definido), native: bool, source }; source es
+// el cuerpo JS generado (solo si native), que basta para reconstruir fn en un worker sin Math.js
+function compileGridFunction(mathLib, exprLocal) {
+  const node = mathLib.parse(exprLocal);
+  try {
+    const source = `return ${gridNodeToJS(node)};`;
+    return { fn: gridFunctionFromSource(source), native: true, source };
+  } catch (_) {
+    const compiled = node.compile();
+    const scope = { x: 0, y: 0 };
+    const fn = (x, y) => {
+      scope.x = x; scope.y = y;
+      try { return Number(compiled.evaluate(scope)); } catch { return NaN; }
+    };
+    return { fn, native: false, source: null };
+  }
+}
+
+// Función (x, y) a partir del cuerpo generado por gridNodeToJS
+function gridFunctionFromSource(source) {
+  // eslint-disable-next-line no-new-func
+  return new Function("x", "y", source);
+}
+
+// Llena out (Float64Array, fila j = ys[j]) con f(xs[i], ys[j]); los valores no finitos quedan NaN
+function fillGrid(fn, xs, ys, out) {
+  const nx = xs.length;
+  for (let j = 0; j < ys.length; j++) {
+    const y = ys[j];
+    const row = j * nx;
+    for (let i = 0; i < nx; i++) {
+      const v = fn(xs[i], y);
+      out[row + i] = (typeof v === "number" && Number.isFinite(v)) ? v : NaN;
+    }
+  }
+  return out;
+}
+
+// Suma de f sobre la rejilla ignorando los valores no definidos (para sumas de Riemann)
+function sumGrid(fn, xs, ys) {
+  let sum = 0;
+  for (let j = 0; j < ys.length; j++) {
+    const y = ys[j];
+    for (let i = 0; i < xs.length; i++) {
+      const v = fn(xs[i], y);
+      if (typeof v === "number" && Number.isFinite(v)) sum += v;
+    }
+  }
+  return sum;
+}
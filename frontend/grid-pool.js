@@ -0,0 +1,154 @@
+// Evaluación de rejillas fuera del hilo principal
+// Comentario: Un grupo de Web Workers (grid-worker.js) evalúa f(x,y) sobre bloques de filas y
+// devuelve Float64Array transferibles; las rejillas grandes se reparten entre varios workers.
+// La expresión se analiza con Math.js en el hilo principal y a los workers solo se envía el
+// cuerpo JS generado, así que no cargan Math.js. Sin soporte de Workers (p. ej. páginas
+// abiertas como file://) o si la expresión no se pudo traducir a JS nativo se usa el mismo
+// compilador en el hilo principal, también con arreglos tipados.
+
+// A partir de este número de celdas la rejilla se divide entre varios workers
+const GRID_SPLIT_CELLS = 4096;
+const GRID_MAX_WORKERS = 4;
+
+class GridPool {
+  constructor(size = Math.min(navigator.hardwareConcurrency || 2, GRID_MAX_WORKERS), workerUrl = "grid-worker.js") {
+    this.size = Math.max(1, size);
+    this.workerUrl = workerUrl;
+    this.workers = null;
+    this.pending = new Map();
+    this.nextId = 1;
+    this.next = 0;
+    this.localCache = { expr: null, compiled: null };
+  }
+
+  // Crea los workers la primera vez; devuelve false si el navegador no lo permite
+  ensureWorkers() {
+    if (this.workers) return this.workers.length > 0;
+    this.workers = [];
+    if (typeof Worker === "undefined" || window.location?.protocol === "file:") return false;
+    try {
+      for (let k = 0; k < this.size; k++) {
+        const w = new Worker(this.workerUrl);
+        w.onmessage = (ev) => this.settle(ev.data);
+        w.onerror = (ev) => this.fail(w, ev);
+        this.workers.push(w);
+      }
+    } catch (err) {
+      console.warn("Web Workers no disponibles; se evalúa en el hilo principal:", err);
+      this.workers.forEach((w) => w.terminate());
+      this.workers = [];
+    }
+    return this.workers.length > 0;
+  }
+
+  settle(data) {
+    const job = this.pending.get(data.id);
+    if (!job) return;
+    this.pending.delete(data.id);
+    if (data.error) job.reject(new Error(data.error));
+    else job.resolve(data);
+  }
+
+  // Un worker que no pudo arrancar se descarta y sus trabajos fallan
+  fail(worker, ev) {
+    ev?.preventDefault?.();
+    for (const [id, job] of this.pending) {
+      if (job.worker === worker) {
+        this.pending.delete(id);
+        job.reject(new Error("worker no disponible"));
+      }
+    }
+    worker.terminate();
+    this.workers = this.workers.filter((w) => w !== worker);
+  }
+
+  post(message) {
+    const worker = this.workers[this.next++ % this.workers.length];
+    const id = this.nextId++;
+    return new Promise((resolve, reject) => {
+      this.pending.set(id, { resolve, reject, worker });
+      // Se copian xs/ys del bloque: son pequeños frente a la salida, que sí se transfiere
+      worker.postMessage({ id, ...message });
+    });
+  }
+
+  // Compilación en el hilo principal, reutilizada para la expresión actual: { fn, native, source }
+  compiled(expr) {
+    if (this.localCache.expr !== expr) {
+      this.localCache = { expr, compiled: compileGridFunction(math, expr) };
+    }
+    return this.localCache.compiled;
+  }
+
+  // Bloques de filas [j0, j1) para repartir ny filas de nx celdas
+  rowBlocks(nx, ny) {
+    const parts = nx * ny >= GRID_SPLIT_CELLS ? Math.min(this.workers.length, ny) : 1;
+    const blocks = [];
+    for (let k = 0; k < parts; k++) {
+      const j0 = Math.floor((k * ny) / parts);
+      const j1 = Math.floor(((k + 1) * ny) / parts);
+      if (j1 > j0) blocks.push([j0, j1]);
+    }
+    return blocks;
+  }
+
+  // f sobre la rejilla: Float64Array de ny·nx valores (fila j = ys[j]), NaN donde no está definida
+  async evaluate(exprLocal, xVals, yVals) {
+    const xs = Float64Array.from(xVals);
+    const ys = Float64Array.from(yVals);
+    const { fn, native, source } = this.compiled(exprLocal);
+    if (native && this.ensureWorkers()) {
+      try {
+        const out = new Float64Array(xs.length * ys.length);
+        const blocks = this.rowBlocks(xs.length, ys.length);
+        const results = await Promise.all(blocks.map(([j0, j1]) =>
+          this.post({ source, xs, ys: ys.subarray(j0, j1), mode: "grid" })));
+        results.forEach((res, k) => out.set(res.values, blocks[k][0] * xs.length));
+        return out;
+      } catch (err) {
+        console.warn("Evaluación en workers fallida; se usa el hilo principal:", err);
+      }
+    }
+    return fillGrid(fn, xs, ys, new Float64Array(xs.length * ys.length));
+  }
+
+  // Σ f sobre la rejilla (valores no definidos se omiten)
+  async sum(exprLocal, xVals, yVals) {
+    const xs = Float64Array.from(xVals);
+    const ys = Float64Array.from(yVals);
+    const { fn, native, source } = this.compiled(exprLocal);
+    if (native && this.ensureWorkers()) {
+      try {
+        const blocks = this.rowBlocks(xs.length, ys.length);
+        const results = await Promise.all(blocks.map(([j0, j1]) =>
+          this.post({ source, xs, ys: ys.subarray(j0, j1), mode: "sum" })));
+        return results.reduce((acc, res) => acc + res.sum, 0);
+      } catch (err) {
+        console.warn("Suma en workers fallida; se usa el hilo principal:", err);
+      }
+    }
+    return sumGrid(fn, xs, ys);
+  }
+
+  terminate() {
+    (this.workers || []).forEach((w) => w.terminate());
+    this.workers = null;
+  }
+}
+
+// Convierte el Float64Array plano en filas para Plotly (NaN -> null)
+function gridRows(values, nx, ny, map = (v) => v) {
+  const rows = new Array(ny);
+  for (let j = 0; j < ny; j++) {
+    const row = new Array(nx);
+    const base = j * nx;
+    for (let i = 0; i < nx; i++) {
+      const v = values[base + i];
+      row[i] = Number.isNaN(v) ? null : map(v);
+    }
+    rows[j] = row;
+  }
+  return rows;
+}
+
+const gridPool = new GridPool();
@@ -0,0 +1,29 @@
+// Web Worker de evaluación de rejillas
+// Comentario: Recibe el cuerpo JS ya generado en el hilo principal (compileGridFunction) y un
+// bloque de filas (xs, ys como Float64Array), así que no necesita Math.js: solo el compilador
+// compartido, servido desde el mismo origen. La función se construye una vez por worker y se
+// reutiliza entre mensajes; el resultado vuelve como Float64Array transferible (sin copia) o,
+// en modo "sum", como un número.
+
+importScripts("grid-compiler.js");
+
+let lastSource = null;
+let lastFn = null;
+
+self.onmessage = (ev) => {
+  const { id, source, xs, ys, mode } = ev.data;
+  try {
+    if (source !== lastSource) {
+      lastFn = gridFunctionFromSource(source);
+      lastSource = source;
+    }
+    if (mode === "sum") {
+      self.postMessage({ id, sum: sumGrid(lastFn, xs, ys) });
+      return;
+    }
+    const out = fillGrid(lastFn, xs, ys, new Float64Array(xs.length * ys.length));
+    self.postMessage({ id, values: out }, [out.buffer]);
+  } catch (err) {
+    self.postMessage({ id, error: String(err?.message || err) });
+  }
+};
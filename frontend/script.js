@@ -179,6 +179,11 @@ async function analyzeDomainRange() {
     const domainText = typeof data?.domain_conditions === "string" ? data.domain_conditions : "";
     const rangeEst = Array.isArray(data?.range_estimated) ? data.range_estimated : null;
     const limitVal = typeof data?.limit_value === "string" ? data.limit_value : null;
+    // Evidencia de dependencia de la trayectoria (dos caminos con valores distintos)
+    const limitInfo = data?.limit_analysis || null;
+    const pathEvidence = (limitInfo?.status === 'path_dependent' && Array.isArray(limitInfo.evidence) && limitInfo.evidence.length === 2)
+      ? `<p style="color:#b75a00">Depende de la trayectoria: ${limitInfo.evidence.map(e => `${e.path} → ${typeof e.estimate === 'number' ? e.estimate.toFixed(6) : e.estimate}`).join('; ')}</p>`
+      : '';
 
     // Tarjeta de resultados con dominio, rango y límite
     const texExpr = (() => { try { const n = math.parse(normalizeExpressionForLocal(expr)); return n.toTex({ parenthesis: 'auto', implicit: 'hide' }); } catch { return expr.replace(/\*\*/g,'^'); } })();
@@ -188,7 +193,7 @@ async function analyzeDomainRange() {
         <p class="math-expression">Función: \\( f(x,y) = ${sanitizeLatex(texExpr)} \\)</p>
         <p><b>Dominio:</b> ${domainText ? domainText : 'No se detectaron restricciones adicionales.'}</p>
         ${rangeEst ? `<p><b>Rango (aprox.):</b> [${Number(rangeEst[0]).toFixed(6)}, ${Number(rangeEst[1]).toFixed(6)}]</p>` : `<p style="color:#b75a00">No se pudo estimar el rango.</p>`}
-        ${hasPoint ? `<p><b>Límite en \((x_0,y_0)\):</b> ${limitVal === 'undefined' ? '⚠️ El límite no existe' : (limitVal === 'infinity' || limitVal === '-infinity') ? `⚠️ Diverge (${limitVal})` : `\( ${limitVal} \)`}</p>` : ''}
+        ${hasPoint ? `<p><b>Límite en \((x_0,y_0)\):</b> ${limitVal === 'undefined' ? '⚠️ El límite no existe' : (limitVal === 'infinity' || limitVal === '-infinity') ? `⚠️ Diverge (${limitVal})` : `\( ${limitVal} \)`}</p>${pathEvidence}` : ''}
       </div>
       <div class="summary-card animate-fade">
         <div class="summary-title">Interpretación</div>
@@ -233,20 +238,9 @@ async function plotDomain2D(expression) {
     const range = { min: -10, max: 10 };
     const xVals = createRange(range.min, range.max, 121);
     const yVals = createRange(range.min, range.max, 121);
-    const node = math.compile(normalizeExpressionForLocal(expression));
-    const mask = [];
-    for (let i = 0; i < xVals.length; i++) {
-      const row = [];
-      for (let j = 0; j < yVals.length; j++) {
-        const x = xVals[i]; const y = yVals[j];
-        try {
-          const z = node.evaluate({ x, y });
-          const ok = Number.isFinite(Number(z));
-          row.push(ok ? 1 : null);
-        } catch { row.push(null); }
-      }
-      mask.push(row);
-    }
+    // Máscara con filas = y (la orientación que espera el heatmap de Plotly)
+    const values = await evaluateGridLocal(expression, xVals, yVals);
+    const mask = gridRows(values, xVals.length, yVals.length, () => 1);
 
     const heatTrace = {
       type: 'heatmap',
@@ -380,6 +374,188 @@ async function postJSON(path, payload) {
   throw new Error(`Error de red: ${lastErr?.message || "conexión fallida"}. Verifica que el backend esté corriendo en ${base}`);
 }
 
+// Sesión de exploración con el backend: f, ∇f y el plano tangente se compilan una sola vez
+// (POST /session) y al mover el cursor solo se envían puntos. Los movimientos se agrupan con
+// un debounce corto, cada envío lleva un número de secuencia y las respuestas más viejas que
+// la última mostrada se ignoran. Usa WebSocket si el backend lo ofrece y, si no, HTTP.
+const EXPLORE_DEBOUNCE_MS = 30;
+// Plazo para que el WebSocket abra la sesión; si no, se sigue por HTTP
+const EXPLORE_WS_OPEN_MS = 3000;
+
+class PointExplorer {
+  constructor(expression, onUpdate) {
+    this.expression = expression;
+    this.onUpdate = onUpdate;
+    this.sessionId = null;
+    this.ws = null;
+    this.seq = 0;
+    this.applied = 0;
+    this.pending = null;
+    this.timer = null;
+    this.inFlight = false;
+    this.closed = false;
+  }
+
+  async open() {
+    const data = await postJSON("/session", { expression: this.expression });
+    this.sessionId = data.session;
+    if (data.websocket && typeof WebSocket !== "undefined") {
+      try {
+        await this.openSocket();
+      } catch (_) {
+        // Comentario: Si el servidor no acepta WebSocket se sigue por HTTP
+        this.ws = null;
+      }
+    }
+    return data;
+  }
+
+  // Se resuelve cuando el servidor confirma la sesión; cualquier cierre, error o mensaje de
+  // error antes de eso (o el plazo vencido) la rechaza y open() sigue por HTTP
+  openSocket() {
+    return new Promise((resolve, reject) => {
+      const ws = new WebSocket(`${BASE_URL.replace(/^http/, "ws")}/session/ws`);
+      let settled = false;
+      const fail = (reason) => {
+        if (settled) return;
+        settled = true;
+        clearTimeout(timer);
+        ws.close();
+        reject(new Error(reason));
+      };
+      const timer = setTimeout(() => fail("WebSocket sin respuesta"), EXPLORE_WS_OPEN_MS);
+      ws.onopen = () => ws.send(JSON.stringify({ expression: this.expression }));
+      ws.onerror = () => fail("WebSocket no disponible");
+      ws.onclose = () => {
+        if (this.ws === ws) this.ws = null;
+        fail("WebSocket cerrado");
+      };
+      ws.onmessage = (ev) => {
+        let data;
+        try { data = JSON.parse(ev.data); } catch { return; }
+        if (!settled) {
+          if (!data.session) {
+            fail(data.error || "Respuesta inesperada del WebSocket");
+            return;
+          }
+          settled = true;
+          clearTimeout(timer);
+          this.ws = ws;
+          resolve();
+          return;
+        }
+        this.handle(data);
+      };
+    });
+  }
+
+  // Registra el último punto; se envía al vencer el debounce
+  move(x, y) {
+    if (this.closed || !this.sessionId || !Number.isFinite(x) || !Number.isFinite(y)) return;
+    this.pending = { x, y };
+    if (!this.timer) this.timer = setTimeout(() => this.flush(), EXPLORE_DEBOUNCE_MS);
+  }
+
+  async flush() {
+    this.timer = null;
+    if (!this.pending || this.closed) return;
+    const { x, y } = this.pending;
+    this.pending = null;
+    const message = { seq: ++this.seq, x0: x, y0: y };
+    if (this.ws && this.ws.readyState === WebSocket.OPEN) {
+      this.ws.send(JSON.stringify(message));
+      return;
+    }
+    // Comentario: Por HTTP hay como máximo una solicitud en curso; los puntos intermedios se descartan
+    if (this.inFlight) {
+      this.pending = { x, y };
+      return;
+    }
+    this.inFlight = true;
+    try {
+      const res = await fetch(`${BASE_URL}/session/${this.sessionId}/point`, {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify(message),
+      });
+      if (res.status === 404) {
+        // Comentario: La sesión expiró en el servidor; se abre otra y se reenvía el punto
+        this.sessionId = null;
+        await this.open();
+        this.pending = this.pending || { x, y };
+      } else if (res.ok) {
+        this.handle(await res.json());
+      }
+    } catch (err) {
+      console.warn("Exploración interrumpida:", err);
+    } finally {
+      this.inFlight = false;
+      if (this.pending && !this.timer) this.timer = setTimeout(() => this.flush(), EXPLORE_DEBOUNCE_MS);
+    }
+  }
+
+  handle(data) {
+    if (!data || data.error || data.stale || !(data.seq > this.applied)) return;
+    this.applied = data.seq;
+    this.onUpdate(data);
+  }
+
+  close() {
+    this.closed = true;
+    if (this.timer) clearTimeout(this.timer);
+    if (this.ws) this.ws.close();
+    if (this.sessionId) {
+      fetch(`${BASE_URL}/session/${this.sessionId}`, { method: "DELETE" }).catch(() => {});
+    }
+  }
+}
+
+let activeExplorer = null;
+
+// Conecta la superficie graficada con una sesión: al pasar el cursor se muestran el punto,
+// f, ∇f y un parche del plano tangente (trazas pointIdx y planeIdx)
+async function attachPointExplorer(targetDiv, expression, range, pointIdx, planeIdx) {
+  if (activeExplorer) activeExplorer.close();
+  activeExplorer = null;
+  // Cada redibujo conecta un explorador nuevo: se quita el manejador anterior para no acumularlos
+  if (targetDiv._pointExplorerHover && typeof targetDiv.removeListener === "function") {
+    targetDiv.removeListener("plotly_hover", targetDiv._pointExplorerHover);
+    targetDiv._pointExplorerHover = null;
+  }
+  if (!window.BACKEND_AVAILABLE || typeof targetDiv.on !== "function") return;
+  const half = (range.max - range.min) / 8;
+  const explorer = new PointExplorer(normalizeExpressionForBackend(expression), (data) => {
+    const z0 = data.value;
+    if (!Number.isFinite(z0)) return;
+    const update = {
+      x: [[data.x0]], y: [[data.y0]], z: [[z0]],
+      text: [[`f = ${z0.toFixed(4)}, ∇f = (${(data.gradient[0] ?? NaN).toFixed(3)}, ${(data.gradient[1] ?? NaN).toFixed(3)})`]],
+    };
+    window.Plotly.restyle(targetDiv, update, [pointIdx]);
+    const plane = data.tangent_plane;
+    if (plane) {
+      const xs = [data.x0 - half, data.x0 + half];
+      const ys = [data.y0 - half, data.y0 + half];
+      const zs = ys.map(yy => xs.map(xx => plane.constant + plane.dx * xx + plane.dy * yy));
+      window.Plotly.restyle(targetDiv, { x: [xs], y: [ys], z: [zs], visible: true }, [planeIdx]);
+    } else {
+      window.Plotly.restyle(targetDiv, { visible: false }, [planeIdx]);
+    }
+  });
+  try {
+    await explorer.open();
+  } catch (err) {
+    console.warn("No se pudo abrir la sesión de exploración:", err);
+    return;
+  }
+  activeExplorer = explorer;
+  targetDiv._pointExplorerHover = (ev) => {
+    const pt = ev?.points?.[0];
+    if (pt && pt.curveNumber === 0) explorer.move(Number(pt.x), Number(pt.y));
+  };
+  targetDiv.on("plotly_hover", targetDiv._pointExplorerHover);
+}
+
 // Verifica la conexión con el backend sin interrumpir la UI
 async function pingBackend() {
   try {
@@ -467,85 +643,21 @@ function analyzeExpressionType(expr) {
   return { kind, brief, detailed };
 }
 
-// Evalúa una cuadrícula utilizando Math.js localmente (sin backend)
-function evaluateGridLocal(expression, xVals, yVals) {
-  // Usa math.js para evaluar f(x,y) sobre una malla de puntos.
-  const exprForMath = normalizeExpressionForLocal(expression);
-  let compiled = null;
-  let useNaive = false;
-  try {
-    if (typeof math === "undefined" || !math?.compile) throw new Error("math.js no está disponible");
-    compiled = math.compile(exprForMath);
-  } catch (e) {
-    // Fallback: evaluador nativo básico con Math.*
-    useNaive = true;
+// Evalúa una cuadrícula localmente (sin backend)
+// Comentario: Devuelve un Float64Array plano (fila j = yVals[j]) con NaN donde f no está definida.
+// Con Math.js la expresión se compila una vez y se evalúa en Web Workers (grid-pool.js); sin
+// Math.js se recurre al evaluador nativo punto a punto.
+async function evaluateGridLocal(expression, xVals, yVals) {
+  if (typeof math !== "undefined" && math?.parse && typeof gridPool !== "undefined") {
+    return gridPool.evaluate(normalizeExpressionForLocal(expression), xVals, yVals);
   }
-
-  // Prepara expresión para evaluador nativo si es necesario
-  let exprForJS = String(expression || "");
-  if (useNaive) {
-    // Potencias: ^ -> ** y asegura ** permanece
-    exprForJS = exprForJS.replace(/\^/g, "**");
-    // Normalizaciones de nombres
-    exprForJS = exprForJS.replace(/\bln\b/gi, "log");
-    exprForJS = exprForJS.replace(/\bsen\b/gi, "sin");
-    // Constantes
-    exprForJS = exprForJS.replace(/π/gi, "pi");
-    exprForJS = exprForJS.replace(/\bpi\b/gi, "Math.PI");
-    exprForJS = exprForJS.replace(/\bE\b/g, "Math.E");
-    exprForJS = exprForJS.replace(/\be\b/g, "Math.E");
-    // Funciones base a Math.*
-    exprForJS = exprForJS.replace(/\blog\s*\(/gi, "Math.log(");
-    exprForJS = exprForJS.replace(/\bsqrt\s*\(/gi, "Math.sqrt(");
-    exprForJS = exprForJS.replace(/\bexp\s*\(/gi, "Math.exp(");
-    exprForJS = exprForJS.replace(/\babs\s*\(/gi, "Math.abs(");
-    exprForJS = exprForJS.replace(/\bsin\s*\(/gi, "Math.sin(");
-    exprForJS = exprForJS.replace(/\bcos\s*\(/gi, "Math.cos(");
-    exprForJS = exprForJS.replace(/\btan\s*\(/gi, "Math.tan(");
-    exprForJS = exprForJS.replace(/\basin\s*\(/gi, "Math.asin(");
-    exprForJS = exprForJS.replace(/\bacos\s*\(/gi, "Math.acos(");
-    exprForJS = exprForJS.replace(/\batan\s*\(/gi, "Math.atan(");
-    // Hiperbólicas
-    exprForJS = exprForJS.replace(/\bsinh\s*\(/gi, "Math.sinh(");
-    exprForJS = exprForJS.replace(/\bcosh\s*\(/gi, "Math.cosh(");
-    exprForJS = exprForJS.replace(/\btanh\s*\(/gi, "Math.tanh(");
-    // Recíprocas (csc, sec, cot) y sus hiperbólicas
-    exprForJS = exprForJS.replace(/\bcsc\s*\(/gi, "(1/Math.sin(");
-    exprForJS = exprForJS.replace(/\bsec\s*\(/gi, "(1/Math.cos(");
-    exprForJS = exprForJS.replace(/\bcot\s*\(/gi, "(1/Math.tan(");
-    exprForJS = exprForJS.replace(/\bcsch\s*\(/gi, "(1/Math.sinh(");
-    exprForJS = exprForJS.replace(/\bsech\s*\(/gi, "(1/Math.cosh(");
-    exprForJS = exprForJS.replace(/\bcoth\s*\(/gi, "(1/Math.tanh(");
-    // Cierra paréntesis extra agregados por las recíprocas cuando se evalúa
-    // Nota: el cierre lo maneja el propio usuario al escribir la función (ej: csc(x)) → (1/Math.sin(x))
-  }
-
-  const z = Array(yVals.length)
-    .fill(0)
-    .map(() => Array(xVals.length).fill(0));
-
+  const out = new Float64Array(xVals.length * yVals.length);
   for (let j = 0; j < yVals.length; j++) {
     for (let i = 0; i < xVals.length; i++) {
-      const scope = { x: xVals[i], y: yVals[j] };
-      try {
-        let val;
-        if (!useNaive) {
-          val = compiled.evaluate(scope);
-        } else {
-          // Evaluación nativa segura: expone solo x,y y Math
-          // eslint-disable-next-line no-new-func
-          const f = new Function("x", "y", `return ${exprForJS}`);
-          val = f(scope.x, scope.y);
-        }
-        z[j][i] = Number(val);
-        if (!Number.isFinite(z[j][i])) z[j][i] = NaN;
-      } catch (e) {
-        // En caso de error de evaluación, marcamos como NaN
-        z[j][i] = NaN;
-      }
+      out[j * xVals.length + i] = evaluateLocalAtPoint(expression, xVals[i], yVals[j]);
     }
   }
-  return z;
+  return out;
 }
 
 // Evalúa f(x,y) en un punto de forma local (usa Math.js si está, si no, evaluador nativo)
@@ -709,15 +821,18 @@ function findCriticalPointsLocal(expression) {
   return results;
 }
 
-// Integral doble definida por suma de Riemann sobre rejilla rectangular
-function numericDoubleIntegralRect(expression, x0, x1, y0, y1, nx = 60, ny = 60) {
+// Integral doble definida por suma de Riemann (punto medio) sobre rejilla rectangular
+async function numericDoubleIntegralRect(expression, x0, x1, y0, y1, nx = 60, ny = 60) {
   const dx = (x1 - x0) / nx;
   const dy = (y1 - y0) / ny;
+  const xs = Array.from({ length: nx }, (_, i) => x0 + (i + 0.5) * dx);
+  const ys = Array.from({ length: ny }, (_, j) => y0 + (j + 0.5) * dy);
+  if (typeof math !== "undefined" && math?.parse && typeof gridPool !== "undefined") {
+    return (await gridPool.sum(normalizeExpressionForLocal(expression), xs, ys)) * dx * dy;
+  }
   let sum = 0;
-  for (let j = 0; j < ny; j++) {
-    const y = y0 + (j + 0.5) * dy;
-    for (let i = 0; i < nx; i++) {
-      const x = x0 + (i + 0.5) * dx;
+  for (const y of ys) {
+    for (const x of xs) {
       const val = evaluateLocalAtPoint(expression, x, y);
       if (Number.isFinite(val)) sum += val * dx * dy;
     }
@@ -738,12 +853,6 @@ function pickSafeRangeForExpr(expression) {
   return { min: -limit, max: limit };
 }
 
-// Sanitiza la malla Z convirtiendo NaN/±Infinity en null para compatibilidad con Plotly
-function sanitizeZGrid(zGrid) {
-  // Comentario: Recorrer la grilla y reemplazar valores no definidos por null
-  return zGrid.map(row => row.map(v => (Number.isFinite(v) ? v : null)));
-}
-
 // Dibuja la gráfica 3D global z = f(x,y) usando Plotly.js
 // Comentario: Ajusta rango automáticamente y marca el punto evaluado si se proporciona
 async function draw3DGraph(func, x0 = null, y0 = null, fValue = null) {
@@ -762,9 +871,9 @@ async function draw3DGraph(func, x0 = null, y0 = null, fValue = null) {
     const xVals = createRange(range.min, range.max, 41);
     const yVals = createRange(range.min, range.max, 41);
 
-    // Evaluación local y sanitización
-    const zRaw = evaluateGridLocal(expression, xVals, yVals);
-    const z = sanitizeZGrid(zRaw);
+    // Evaluación local; NaN/±Infinity pasan a null para Plotly
+    const zRaw = await evaluateGridLocal(expression, xVals, yVals);
+    const z = gridRows(zRaw, xVals.length, yVals.length);
 
     // Trazo de superficie (azul semitransparente)
     const surfaceTrace = {
@@ -843,6 +952,18 @@ async function draw3DGraph(func, x0 = null, y0 = null, fValue = null) {
     } catch (_) { /* opcional */ }
 
     const data = criticalTrace ? (pointTrace ? [surfaceTrace, pointTrace, criticalTrace] : [surfaceTrace, criticalTrace]) : (pointTrace ? [surfaceTrace, pointTrace] : [surfaceTrace]);
+    // Trazas de la exploración interactiva (se rellenan desde la sesión del backend)
+    const exploreIdx = data.length;
+    data.push(
+      {
+        type: "scatter3d", mode: "markers+text", x: [], y: [], z: [], text: [],
+        marker: { color: "orange", size: 5 }, textposition: "top center", name: "Exploración",
+      },
+      {
+        type: "surface", x: [], y: [], z: [], opacity: 0.5, showscale: false, visible: false,
+        colorscale: [[0, "orange"], [1, "orange"]], hoverinfo: "skip", name: "Plano tangente",
+      },
+    );
     const layout = {
       title: "Superficie de f(x,y)",
       autosize: true,
@@ -856,6 +977,7 @@ async function draw3DGraph(func, x0 = null, y0 = null, fValue = null) {
 
     // Renderizar gráfica; si hay nulls, Plotly ignora sin romper
     window.Plotly.newPlot(targetDiv, data, layout, { responsive: true });
+    attachPointExplorer(targetDiv, expression, range, exploreIdx, exploreIdx + 1);
 
     // Explicación contextual debajo de la gráfica
     if (explBox) {
@@ -1110,9 +1232,9 @@ async function plotSurface(expression, contextData) {
     const xVals = createRange(range.min, range.max, 41);
     const yVals = createRange(range.min, range.max, 41);
 
-    // Evaluación local y sanitización de la malla Z
-    const zRaw = evaluateGridLocal(expression, xVals, yVals);
-    const z = sanitizeZGrid(zRaw);
+    // Evaluación local de la malla Z; NaN/±Infinity pasan a null para Plotly
+    const zRaw = await evaluateGridLocal(expression, xVals, yVals);
+    const z = gridRows(zRaw, xVals.length, yVals.length);
 
     // Traza de superficie principal (azul semitransparente)
     const surfaceTrace = {
@@ -1601,7 +1723,7 @@ async function getDoubleIntegral() {
         const yn0 = parseNumberFlexible(yStartEl?.value);
         const yn1 = parseNumberFlexible(yEndEl?.value);
         if ([xn0,xn1,yn0,yn1].every(Number.isFinite)) {
-          const approx = numericDoubleIntegralRect(expr, xn0, xn1, yn0, yn1);
+          const approx = await numericDoubleIntegralRect(expr, xn0, xn1, yn0, yn1);
           resultsBox.innerHTML = `
             <div class="result-card result-card--integral">
               <h3>Resultado (modo local):</h3>
@@ -1621,7 +1743,7 @@ async function getDoubleIntegral() {
       } else {
         // Sin límites: usar un rango seguro por defecto y calcular aproximación numérica
         const range = pickSafeRangeForExpr(expr);
-        const approx = numericDoubleIntegralRect(expr, range.min, range.max, range.min, range.max);
+        const approx = await numericDoubleIntegralRect(expr, range.min, range.max, range.min, range.max);
         resultsBox.innerHTML = `
           <div class="result-card result-card--integral">
             <h3>Resultado (modo local):</h3>
@@ -1699,7 +1821,7 @@ async function getDoubleIntegral() {
       `;
       // Además, ofrecer una aproximación numérica en un rango por defecto
       const rangeDef = pickSafeRangeForExpr(expr);
-      const approxDef = numericDoubleIntegralRect(expr, rangeDef.min, rangeDef.max, rangeDef.min, rangeDef.max);
+      const approxDef = await numericDoubleIntegralRect(expr, rangeDef.min, rangeDef.max, rangeDef.min, rangeDef.max);
       resultsBox.innerHTML += `
         <div class="summary-card animate-fade">
           <div class="summary-title">Aproximación numérica (rango por defecto)</div>
@@ -1749,7 +1871,7 @@ async function getDoubleIntegral() {
       const yn0 = parseNumberFlexible(yStartEl?.value);
       const yn1 = parseNumberFlexible(yEndEl?.value);
       if ([xn0,xn1,yn0,yn1].every(Number.isFinite)) {
-        const approx = numericDoubleIntegralRect(expr, xn0, xn1, yn0, yn1);
+        const approx = await numericDoubleIntegralRect(expr, xn0, xn1, yn0, yn1);
         resultsBox.innerHTML = `
           <div class="result-card">
             <h3>Resultado (modo local):</h3>